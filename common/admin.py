@@ -1,6 +1,12 @@
 from django.contrib import admin
+from django.contrib.admin import helpers
+from django.template.response import TemplateResponse
+from django.utils.translation import gettext_lazy as _
 
+from common.enums import TicketStatusChoices
+from common.forms import AnonymousTicketAnswerForm
 from common.models import TicketCategory, AnonymousTicket
+from common.pagination import KeysetPaginationAdminMixin
 
 
 @admin.register(TicketCategory)
@@ -9,5 +15,35 @@ class TicketCategoryAdmin(admin.ModelAdmin):
 
 
 @admin.register(AnonymousTicket)
-class AnonymousTicketAdmin(admin.ModelAdmin):
-    pass
+class AnonymousTicketAdmin(KeysetPaginationAdminMixin, admin.ModelAdmin):
+    list_display = ('name', 'email', 'category', 'status', 'created_at', 'answered_at', )
+    list_filter = ('status', 'category', )
+    list_select_related = ('category', )
+    sortable_by = ('status', 'created_at', )
+    readonly_fields = ('email', 'name', 'category', 'description', 'created_at', 'answered_at', )
+    actions = ('answer_tickets', 'close_tickets', )
+
+    @admin.action(description=_('پاسخ به تیکت‌های انتخاب شده'))
+    def answer_tickets(self, request, queryset):
+        form = AnonymousTicketAnswerForm(request.POST if 'apply' in request.POST else None)
+        if form.is_valid():
+            count = queryset.answer(form.cleaned_data['answer'])
+            self.message_user(request, _('به %(count)s تیکت پاسخ داده شد.') % {'count': count})
+            return None
+
+        context = {
+            **self.admin_site.each_context(request),
+            'title': _('پاسخ به تیکت‌ها'),
+            'opts': self.model._meta,
+            'form': form,
+            'open_count': queryset.filter(status=TicketStatusChoices.OPEN).count(),
+            'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            'select_across': request.POST.get('select_across', '0'),
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        }
+        return TemplateResponse(request, 'admin/common/anonymousticket/answer_tickets.html', context)
+
+    @admin.action(description=_('بستن تیکت‌های انتخاب شده'))
+    def close_tickets(self, request, queryset):
+        count = queryset.close()
+        self.message_user(request, _('%(count)s تیکت بسته شد.') % {'count': count})
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Tags, Warning, register
+from django.utils.module_loading import import_string
+
+
+def get_shared_caches() -> dict:
+    """What is kept in a cache that every worker process must see: its alias, and what goes wrong otherwise."""
+    from users.otp import CacheOTPBackend
+
+    shared_caches = {
+        'RATE_LIMIT_CACHE_ALIAS': (
+            settings.RATE_LIMIT_CACHE_ALIAS,
+            'each worker process counts on its own, so the rate limits are multiplied by the number of workers',
+        ),
+        'common.helpers.bump_cache_version': (
+            DEFAULT_CACHE_ALIAS,
+            'a version bumped by one worker process never reaches the others, so their geography and cached tree '
+            'fragments stay stale',
+        ),
+    }
+    if issubclass(import_string(settings.OTP_BACKEND), CacheOTPBackend):
+        shared_caches['OTP_CACHE_ALIAS'] = (
+            settings.OTP_CACHE_ALIAS,
+            'a code sent by one worker process is not found by the others, so checking it fails at random',
+        )
+    return shared_caches
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_caches(app_configs, **kwargs):
+    """Warn on deployment when entries that every worker process must see are kept in the per process LocMemCache."""
+    warnings = []
+    for name, (alias, consequence) in get_shared_caches().items():
+        if isinstance(caches[alias], LocMemCache):
+            warnings.append(Warning(
+                f'{name} uses the cache {alias!r}, a LocMemCache: {consequence}.',
+                hint='Use a shared cache such as django.core.cache.backends.redis.RedisCache with several workers.',
+                id='common.W001',
+            ))
+    return warnings
@@ -0,0 +1,8 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class TicketStatusChoices(models.IntegerChoices):
+    OPEN = 0, _('در انتظار پاسخ')
+    ANSWERED = 1, _('پاسخ داده شده')
+    CLOSED = 2, _('بسته شده')
@@ -0,0 +1,114 @@
+import asyncio
+import json
+import threading
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+EVENT_QUEUE_SIZE = 100
+POSTGRES_CHANNEL = 'shn_events'
+
+
+@dataclass(eq=False)
+class Subscription:
+    loop: asyncio.AbstractEventLoop
+    queue: asyncio.Queue
+    channels: frozenset
+
+    def put(self, channel: str, data):
+        # A client too slow to drain its queue misses events rather than holding memory for them.
+        if not self.queue.full():
+            self.queue.put_nowait((channel, data))
+
+
+class BaseEventBroker:
+    """
+    Strategy that carries events from the code changing the data to ``shajarehnaameh.sse.event_stream``. ``publish``
+    is sync and may be called from any thread; ``subscribe`` yields an ``asyncio.Queue`` of ``(channel, data)`` tuples.
+    """
+
+    def publish(self, channel: str, data):
+        raise NotImplementedError('subclasses of BaseEventBroker must provide a publish() method')
+
+    def subscribe(self, channels):
+        raise NotImplementedError('subclasses of BaseEventBroker must provide a subscribe() method')
+
+
+class InProcessEventBroker(BaseEventBroker):
+    """Delivers events to the streams of the same process only; enough for a single ASGI worker."""
+
+    def __init__(self):
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    def dispatch(self, channel: str, data):
+        with self._lock:
+            subscriptions = [s for s in self._subscriptions if channel in s.channels]
+        for subscription in subscriptions:
+            subscription.loop.call_soon_threadsafe(subscription.put, channel, data)
+
+    def publish(self, channel, data):
+        self.dispatch(channel, data)
+
+    @asynccontextmanager
+    async def subscribe(self, channels):
+        subscription = Subscription(asyncio.get_running_loop(), asyncio.Queue(EVENT_QUEUE_SIZE), frozenset(channels))
+        with self._lock:
+            self._subscriptions.add(subscription)
+        try:
+            yield subscription.queue
+        finally:
+            with self._lock:
+                self._subscriptions.discard(subscription)
+
+
+class PostgresEventBroker(InProcessEventBroker):
+    """
+    Publishes with ``pg_notify`` so that every worker receives the events. Each process keeps a single ``LISTEN``
+    connection, read from the event loop without a thread, and fans the events out to its own streams.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+
+    def publish(self, channel, data):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [POSTGRES_CHANNEL, json.dumps([channel, data])])
+
+    def _listen(self, loop):
+        import psycopg2
+
+        listener = psycopg2.connect(**connection.get_connection_params())
+        listener.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        listener.cursor().execute(f'LISTEN {POSTGRES_CHANNEL}')
+
+        def read_notifications():
+            listener.poll()
+            while listener.notifies:
+                channel, data = json.loads(listener.notifies.pop(0).payload)
+                self.dispatch(channel, data)
+
+        loop.add_reader(listener.fileno(), read_notifications)
+        return listener
+
+    @asynccontextmanager
+    async def subscribe(self, channels):
+        if self._listener is None:
+            self._listener = self._listen(asyncio.get_running_loop())
+        async with super().subscribe(channels) as queue:
+            yield queue
+
+
+@lru_cache(maxsize=None)
+def get_event_broker() -> BaseEventBroker:
+    return import_string(settings.EVENT_BROKER)()
+
+
+def publish_on_commit(channel: str, data):
+    """Publish the event once the current transaction commits, so streams never see rolled back changes."""
+    transaction.on_commit(lambda: get_event_broker().publish(channel, data))
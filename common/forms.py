@@ -0,0 +1,6 @@
+from django import forms
+from django.utils.translation import gettext_lazy as _
+
+
+class AnonymousTicketAnswerForm(forms.Form):
+    answer = forms.CharField(widget=forms.Textarea, label=_('پاسخ تیکت'))
@@ -0,0 +1,43 @@
+"""
+ASGI handler of the project. Django 4.1 iterates streaming responses inside the event loop: the export generators of
+``persons.exports`` then raise ``SynchronousOnlyOperation`` on their ORM queries, and the file responses of
+``common.middleware.StaticFilesMiddleware`` block every other connection while they read from disk.
+``StreamingASGIHandler`` reads their content in the thread where sync views run, one chunk at a time.
+"""
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIHandler
+
+
+class StreamingASGIHandler(ASGIHandler):
+
+    def read_chunk(self, parts) -> bytes:
+        """The next parts of a streaming response, up to about ``chunk_size`` bytes; empty at its end."""
+        chunk = b''
+        for part in parts:
+            chunk += part
+            if len(chunk) >= self.chunk_size:
+                break
+        return chunk
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+        response_headers = []
+        for header, value in response.items():
+            if isinstance(header, str):
+                header = header.encode('ascii')
+            if isinstance(value, str):
+                value = value.encode('latin1')
+            response_headers.append((bytes(header), bytes(value)))
+        for cookie in response.cookies.values():
+            response_headers.append((b'Set-Cookie', cookie.output(header='').encode('ascii').strip()))
+        await send({'type': 'http.response.start', 'status': response.status_code, 'headers': response_headers})
+        # Thread sensitive, so that the database connection of the view (and its server-side cursors) is kept.
+        read_chunk = sync_to_async(self.read_chunk, thread_sensitive=True)
+        try:
+            parts = iter(response)
+            while chunk := await read_chunk(parts):
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await send({'type': 'http.response.body'})
+        finally:
+            await sync_to_async(response.close, thread_sensitive=True)()
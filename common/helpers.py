@@ -0,0 +1,51 @@
+import re
+import time
+
+from django.core.cache import cache
+
+PERSIAN_CHARACTERS = str.maketrans({
+    'ي': 'ی',
+    'ى': 'ی',
+    'ئ': 'ی',
+    'ك': 'ک',
+    'ة': 'ه',
+    'أ': 'ا',
+    'إ': 'ا',
+    'ٱ': 'ا',
+    'ؤ': 'و',
+    '\u200c': '',
+    '\u200d': '',
+    '\u0640': '',
+    **{chr(0x06F0 + digit): str(digit) for digit in range(10)},
+    **{chr(0x0660 + digit): str(digit) for digit in range(10)},
+})
+PERSIAN_DIACRITICS_RE = re.compile('[\u064b-\u065f\u0670]')
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_persian(text: str) -> str:
+    """
+    Fold the spellings of a Persian text that should compare equal: Arabic ye/kaf and other letter variants, ZWNJ,
+    tatweel, diacritics and Persian/Arabic digits.
+    """
+    text = PERSIAN_DIACRITICS_RE.sub('', (text or '').translate(PERSIAN_CHARACTERS))
+    return WHITESPACE_RE.sub(' ', text).strip().lower()
+
+
+def get_cache_version(key: str) -> int:
+    """Current version of a group of cached entries, to be passed as ``version`` to the cache."""
+    return cache.get_or_set(key, 1, timeout=None)
+
+
+def get_cache_version_modified(key: str) -> float:
+    """Timestamp of the last ``bump_cache_version(key)``, e.g. for ``Last-Modified`` headers."""
+    return cache.get_or_set(f'{key}:modified', time.time(), timeout=None)
+
+
+def bump_cache_version(key: str):
+    """Invalidate every entry cached with the current version of ``key``."""
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, timeout=None)
+    cache.set(f'{key}:modified', time.time(), timeout=None)
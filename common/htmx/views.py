@@ -1,8 +1,55 @@
-from django.views.generic import FormView
+from django.views.generic import FormView, ListView
 
 from common.htmx.forms import AnonymousTicketForm
+from common.mixins import FragmentCacheMixin
+from common.models import TICKET_CATEGORIES_VERSION_CACHE_KEY
 
 
-class AnonymousTicketFormView(FormView):
+class AnonymousTicketFormView(FragmentCacheMixin, FormView):
     template_name = 'htmx/contact.html'
     form_class = AnonymousTicketForm
+    fragment_cache_version_keys = (TICKET_CATEGORIES_VERSION_CACHE_KEY, )
+
+
+class AutocompleteHTMXView(ListView):
+    """
+    Paginated results for ``common.widgets.AutocompleteSelect``. Pages are sliced without counting the matches: one
+    extra row is fetched to know whether a "more" link is needed.
+    """
+    template_name = 'htmx/autocomplete_htmx.html'
+    context_object_name = 'options'
+    page_size = 10
+
+    def get_search_queryset(self, query: str):
+        raise NotImplementedError('subclasses of AutocompleteHTMXView must provide a get_search_queryset() method')
+
+    def get_label(self, obj) -> str:
+        return str(obj)
+
+    def get_page(self) -> int:
+        try:
+            return max(int(self.request.GET.get('page', 1)), 1)
+        except ValueError:
+            return 1
+
+    def get_queryset(self):
+        query = self.request.GET.get('q', '').strip()
+        if not query:
+            return []
+        offset = (self.get_page() - 1) * self.page_size
+        return list(self.get_search_queryset(query)[offset:offset + self.page_size + 1])
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        objects = context['options']
+        next_url = None
+        if len(objects) > self.page_size:
+            params = self.request.GET.copy()
+            params['page'] = self.get_page() + 1
+            next_url = f'{self.request.path}?{params.urlencode()}'
+        context.update(
+            options=[(obj.pk, self.get_label(obj)) for obj in objects[:self.page_size]],
+            next_url=next_url,
+            query=self.request.GET.get('q', '').strip(),
+        )
+        return context
@@ -0,0 +1,61 @@
+import time
+from contextlib import nullcontext
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+from django.template import TemplateSyntaxError, engines
+from django.test import RequestFactory
+
+from common.templating import iter_template_names
+
+
+class Command(BaseCommand):
+    help = (
+        'Compile every project template to catch syntax errors at deploy time, and time compiling and rendering each '
+        'one with an empty context. Render errors are only reported, as most templates expect a context; any '
+        'database write made while rendering is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-render', action='store_true', help='Only compile the templates.')
+        parser.add_argument('--slowest', type=int, default=10, help='Number of slowest templates to list.')
+
+    def handle(self, *args, **options):
+        engine = engines['django'].engine
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        timings, errors = [], []
+        render = not options['no_render']
+        # Only rendering may touch the database; compiling alone must work without one, e.g. in a build step.
+        with transaction.atomic() if render else nullcontext():
+            for name, path in iter_template_names():
+                started = time.perf_counter()
+                try:
+                    # ``from_string`` always parses, whatever the loaders cache.
+                    with open(path, encoding='utf-8') as template_file:
+                        engine.from_string(template_file.read())
+                except TemplateSyntaxError as error:
+                    errors.append(name)
+                    self.stderr.write(f'{name}: {error}')
+                    continue
+                compiled = time.perf_counter() - started
+                rendered = None
+                if render:
+                    started = time.perf_counter()
+                    try:
+                        engines['django'].get_template(name).render({}, request)
+                        rendered = time.perf_counter() - started
+                    except Exception as error:  # noqa: B902
+                        self.stdout.write(self.style.WARNING(f'{name}: not rendered ({type(error).__name__}: {error})'))
+                timings.append((name, compiled, rendered))
+            if render:
+                transaction.set_rollback(True)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{len(timings)} templates compiled'))
+        slowest = sorted(timings, key=lambda timing: (timing[2] or 0) + timing[1], reverse=True)
+        for name, compiled, rendered in slowest[:options['slowest']]:
+            render_time = f'{rendered * 1000:.2f}ms' if rendered is not None else '-'
+            self.stdout.write(f'{name}: compile {compiled * 1000:.2f}ms, render {render_time}')
+        if errors:
+            raise CommandError(f'Invalid templates: {", ".join(errors)}')
@@ -0,0 +1,17 @@
+from django.db import models
+from django.utils import timezone
+
+from common.enums import TicketStatusChoices
+
+
+class AnonymousTicketQuerySet(models.QuerySet):
+    """Bulk moderation; each method is a single ``UPDATE`` however many tickets are selected."""
+
+    def answer(self, answer: str) -> int:
+        """Answer the open tickets among these; returns how many were answered."""
+        return self.filter(status=TicketStatusChoices.OPEN).update(
+            answer=answer, status=TicketStatusChoices.ANSWERED, answered_at=timezone.now()
+        )
+
+    def close(self) -> int:
+        return self.exclude(status=TicketStatusChoices.CLOSED).update(status=TicketStatusChoices.CLOSED)
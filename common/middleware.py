@@ -0,0 +1,206 @@
+import mimetypes
+import os
+import re
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, HttpResponse, HttpResponseNotAllowed
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Preferred first; the variants are written next to the files by ``common.storage.BuildStaticFilesStorage``.
+CONTENT_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+TEXT_CONTENT_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+
+
+@dataclass
+class StaticFile:
+    path: str
+    size: int
+    last_modified: int
+    content_type: str
+    immutable: bool
+    # Content encoding: (path, size) of the precompressed copy.
+    variants: dict = field(default_factory=dict)
+
+    @property
+    def etag(self) -> str:
+        return f'{self.last_modified:x}-{self.size:x}'
+
+
+class FileRange:
+    """
+    The ``[start, start + length)`` bytes of ``file``, read from its current position. ``fileno`` lets a WSGI file
+    wrapper send the range with ``sendfile`` (the server stops at the Content-Length of the response).
+    """
+
+    def __init__(self, file, start: int, length: int):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size: int = -1) -> bytes:
+        size = self.remaining if size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self) -> int:
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+class StaticFileResponse(FileResponse):
+    block_size = 64 * 1024
+
+
+def get_content_type(path: str) -> str:
+    content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    if content_type.startswith(TEXT_CONTENT_TYPES):
+        content_type += '; charset=utf-8'
+    return content_type
+
+
+def parse_accept_encoding(header: str) -> set:
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = params.strip()
+        if not quality.startswith('q=') or quality[2:].strip() not in ('0', '0.0', '0.00', '0.000'):
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def parse_range(header: str, size: int):
+    """
+    ``(start, end)`` of a single byte range (``end`` included), ``None`` when the header is to be ignored and
+    ``False`` when the range is not satisfiable.
+    """
+    match = RANGE_RE.match(header.strip())
+    if match is None or match.groups() == ('', ''):
+        # Malformed or multiple ranges: the whole file is sent.
+        return None
+    start, end = match.groups()
+    if not start:
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start, end = int(start), min(int(end), size - 1) if end else size - 1
+    if start > end or start >= size:
+        return False
+    return start, end
+
+
+class StaticFilesMiddleware(MiddlewareMixin):
+    """
+    Serve the files of ``STATIC_ROOT`` at ``STATIC_URL`` without a proxy in front of the application. The files are
+    indexed when the worker starts, i.e. after ``collectstatic``; requests then cost a dict lookup.
+
+    Hashed names of the static files manifest are cached for a year as immutable, other files for
+    ``STATIC_MAX_AGE`` seconds. The ``.br``/``.gz`` copies are sent to clients that accept them, single byte ranges
+    and conditional requests are answered, and under WSGI the server's file wrapper sends the file with ``sendfile``.
+    """
+
+    def __init__(self, get_response):
+        if not settings.STATIC_SERVE:
+            raise MiddlewareNotUsed()
+        super().__init__(get_response)
+        self.prefix = settings.STATIC_URL if settings.STATIC_URL.startswith('/') else f'/{settings.STATIC_URL}'
+        self.files = self.index_files(str(settings.STATIC_ROOT))
+
+    @staticmethod
+    def index_files(root: str) -> dict:
+        hashed_names = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+        files = {}
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, root).replace(os.sep, '/')
+                stat = os.stat(path)
+                files[name] = StaticFile(
+                    path, stat.st_size, int(stat.st_mtime), get_content_type(name), name in hashed_names
+                )
+        for name, static_file in files.items():
+            for encoding, suffix in CONTENT_ENCODINGS:
+                variant = files.get(f'{name}{suffix}')
+                if variant is not None:
+                    static_file.variants[encoding] = (variant.path, variant.size)
+        return files
+
+    def process_request(self, request):
+        if not request.path_info.startswith(self.prefix):
+            return None
+        static_file = self.files.get(request.path_info[len(self.prefix):])
+        if static_file is None:
+            return None
+        if request.method not in ('GET', 'HEAD'):
+            return HttpResponseNotAllowed(['GET', 'HEAD'])
+        return self.serve(request, static_file)
+
+    def serve(self, request, static_file: StaticFile):
+        path, size, encoding = static_file.path, static_file.size, None
+        byte_range = None
+        if 'HTTP_RANGE' in request.META and self.range_applies(request, static_file):
+            byte_range = parse_range(request.META['HTTP_RANGE'], size)
+        if byte_range is None:
+            accepted = parse_accept_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+            encoding = next((e for e, _ in CONTENT_ENCODINGS if e in accepted and e in static_file.variants), None)
+            if encoding is not None:
+                path, size = static_file.variants[encoding]
+
+        # Each encoding is a representation of its own and needs its own strong validator.
+        etag = quote_etag(f'{static_file.etag}-{encoding}' if encoding else static_file.etag)
+        response = get_conditional_response(request, etag=etag, last_modified=static_file.last_modified)
+        if response is None:
+            if byte_range is False:
+                response = HttpResponse(status=416)
+                response.headers['Content-Range'] = f'bytes */{size}'
+            else:
+                response = self.file_response(request, path, size, byte_range, static_file.content_type)
+                if encoding is not None:
+                    response.headers['Content-Encoding'] = encoding
+
+        response.headers['ETag'] = etag
+        response.headers['Last-Modified'] = http_date(static_file.last_modified)
+        response.headers['Accept-Ranges'] = 'bytes'
+        response.headers['Cache-Control'] = (
+            IMMUTABLE_CACHE_CONTROL if static_file.immutable else f'public, max-age={settings.STATIC_MAX_AGE}'
+        )
+        if static_file.variants:
+            patch_vary_headers(response, ('Accept-Encoding', ))
+        return response
+
+    @staticmethod
+    def range_applies(request, static_file: StaticFile) -> bool:
+        """The Range header is ignored when If-Range names another version of the file."""
+        if_range = request.META.get('HTTP_IF_RANGE')
+        if if_range is None:
+            return True
+        if if_range.startswith('"'):
+            return if_range == quote_etag(static_file.etag)
+        return parse_http_date_safe(if_range) == static_file.last_modified
+
+    @staticmethod
+    def file_response(request, path: str, size: int, byte_range, content_type: str):
+        start, end = byte_range or (0, size - 1)
+        length = end - start + 1
+        status = 206 if byte_range else 200
+        if request.method == 'HEAD':
+            response = HttpResponse(content_type=content_type, status=status)
+        else:
+            file = open(path, 'rb')
+            response = StaticFileResponse(
+                FileRange(file, start, length) if byte_range else file, content_type=content_type, status=status
+            )
+            # Set from the name of the file opened, which may be a compressed copy.
+            del response.headers['Content-Disposition']
+        if byte_range:
+            response.headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response.headers['Content-Length'] = length
+        return response
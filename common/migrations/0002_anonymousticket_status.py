@@ -0,0 +1,45 @@
+# Generated by Django 4.1.13 on 2026-10-18 07:02
+
+from django.db import migrations, models
+import django_jalali.db.models
+
+
+def fill_status(apps, schema_editor):
+    AnonymousTicket = apps.get_model('common', 'AnonymousTicket')
+    # TicketStatusChoices.ANSWERED; ``answered_at`` was set on creation for every ticket.
+    AnonymousTicket.objects.exclude(answer='').update(status=1)
+    AnonymousTicket.objects.filter(answer='').update(answered_at=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='anonymousticket',
+            name='status',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'در انتظار پاسخ'), (1, 'پاسخ داده شده'), (2, 'بسته شده')], default=0, verbose_name='وضعیت پاسخ'),
+        ),
+        migrations.AlterField(
+            model_name='anonymousticket',
+            name='answer',
+            field=models.TextField(blank=True, verbose_name='پاسخ تیکت'),
+        ),
+        migrations.AlterField(
+            model_name='anonymousticket',
+            name='answered_at',
+            field=django_jalali.db.models.jDateTimeField(blank=True, null=True, verbose_name='زمان پاسخ'),
+        ),
+        migrations.RunPython(fill_status, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='anonymousticket',
+            index=models.Index(fields=['created_at'], name='common_ticket_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='anonymousticket',
+            index=models.Index(fields=['status', 'created_at'], name='common_ticket_status_idx'),
+        ),
+    ]
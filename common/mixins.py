@@ -0,0 +1,178 @@
+import hashlib
+import math
+import os
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.http import Http404, HttpResponse
+from django.middleware.csrf import get_token
+from django.template.loader import select_template
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from django.utils.translation import gettext as _
+from django.views import View
+
+from common.helpers import get_cache_version, get_cache_version_modified
+from common.pagination import CURSOR_VAR, InvalidCursor, KeysetPaginator
+from common.ratelimit import acheck_rate_limits, check_rate_limits, get_client_ip
+
+
+class RateLimitMixin:
+    """
+    Reject requests over the limits of ``rate_limit_scope`` in ``dispatch``, i.e. before the view touches the
+    database. The default response, meant for form views, re-renders the page with an unbound form, an error message
+    and a 429 status.
+    """
+    rate_limit_scope: str = None
+    rate_limit_methods = ('POST', )
+
+    def get_rate_limit_scope(self) -> str:
+        if self.rate_limit_scope is None:
+            raise ImproperlyConfigured('RateLimitMixin requires a definition of rate_limit_scope.')
+        return self.rate_limit_scope
+
+    def get_rate_limit_identities(self) -> dict:
+        return {'ip': get_client_ip(self.request)}
+
+    def rate_limit_message(self, retry_after: int) -> str:
+        return _('تعداد درخواست‌ها بیش از حد مجاز است. لطفا %(minutes)s دقیقه دیگر دوباره تلاش کنید.') % {
+            'minutes': math.ceil(retry_after / 60)
+        }
+
+    def rate_limited_response(self, retry_after: int):
+        messages.error(self.request, self.rate_limit_message(retry_after), extra_tags='danger')
+        # An unbound form, so that rendering it does not run its validation.
+        form_kwargs = {key: value for key, value in self.get_form_kwargs().items() if key not in ('data', 'files')}
+        response = self.render_to_response(self.get_context_data(form=self.get_form_class()(**form_kwargs)))
+        # HTMX does not swap error responses, so the page is only marked as throttled for normal requests.
+        if not getattr(self.request, 'htmx', False):
+            response.status_code = 429
+        return response
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method in self.rate_limit_methods:
+            retry_after = check_rate_limits(self.get_rate_limit_scope(), **self.get_rate_limit_identities())
+            if retry_after is not None:
+                response = self.rate_limited_response(retry_after)
+                response['Retry-After'] = str(retry_after)
+                return response
+        return super().dispatch(request, *args, **kwargs)
+
+
+class AsyncRateLimitMixin(RateLimitMixin):
+    """
+    ``RateLimitMixin`` for views with async handlers. The identities are read in a thread, as they may load the
+    session, and the request is handed straight to ``View.dispatch``: the sync decorators some generic views put on
+    ``dispatch`` cannot wrap a coroutine.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method in self.rate_limit_methods:
+            identities = await sync_to_async(self.get_rate_limit_identities)()
+            retry_after = await acheck_rate_limits(self.get_rate_limit_scope(), **identities)
+            if retry_after is not None:
+                response = self.rate_limited_response(retry_after)
+                response['Retry-After'] = str(retry_after)
+                return response
+        return await View.dispatch(self, request, *args, **kwargs)
+
+
+CSRF_TOKEN_PLACEHOLDER = 'CSRF-TOKEN-PLACEHOLDER'
+
+
+class FragmentCacheMixin:
+    """
+    Serve the GET renders of an HTMX partial from the cache, and answer 304 when the client already has the current
+    one. Entries are keyed on the view, its URL arguments, the template (and its modification time), the
+    authentication state and the versions of ``fragment_cache_version_keys``, bumped with
+    ``common.helpers.bump_cache_version``. The query string is left out, so that clients cannot add entries at will.
+
+    Cached content holds a placeholder instead of the CSRF token, which is put back for each request, and the ETag
+    covers the CSRF cookie so that a client never reuses a page holding a rotated token. Requests with pending
+    messages are rendered as usual, since partials may show them. Only the sync ``get`` is wrapped; views whose
+    handlers are async render every request, and views marked ``never_cache`` gain nothing from it.
+    """
+    fragment_cache_version_keys = ()
+    fragment_cache_timeout = 60 * 60
+
+    def get_fragment_cache_user_key(self) -> str:
+        return 'authenticated' if self.request.user.is_authenticated else 'anonymous'
+
+    def get_fragment_cache_view_key(self) -> str:
+        arguments = [f'{name}={value}' for name, value in sorted(self.kwargs.items())]
+        return ':'.join([type(self).__module__, type(self).__qualname__, *map(str, self.args), *arguments])
+
+    def get_context_data(self, **kwargs):
+        if getattr(self, 'caching_fragment', False):
+            kwargs['csrf_token'] = CSRF_TOKEN_PLACEHOLDER
+        return super().get_context_data(**kwargs)
+
+    def get(self, request, *args, **kwargs):
+        if messages.get_messages(request):
+            return super().get(request, *args, **kwargs)
+
+        template = select_template(self.get_template_names())
+        template_modified = os.path.getmtime(template.origin.name)
+        versions = [str(get_cache_version(key)) for key in self.fragment_cache_version_keys]
+        # Hashed, as URL arguments could make the key longer than memcached allows.
+        view = hashlib.md5(self.get_fragment_cache_view_key().encode()).hexdigest()
+        key = ':'.join([
+            'fragment', view, template.origin.template_name, str(template_modified), self.get_fragment_cache_user_key(),
+            *versions
+        ])
+        etag = quote_etag(hashlib.md5(f'{key}:{request.META.get("CSRF_COOKIE", "")}'.encode()).hexdigest())
+        last_modified = max(
+            [template_modified, *(get_cache_version_modified(k) for k in self.fragment_cache_version_keys)]
+        )
+
+        response = get_conditional_response(request, etag=etag, last_modified=int(last_modified))
+        if response is None:
+            content = cache.get(key)
+            if content is None:
+                self.caching_fragment = True
+                content = super().get(request, *args, **kwargs).render().content
+                cache.set(key, content, self.fragment_cache_timeout)
+            response = HttpResponse(content.replace(CSRF_TOKEN_PLACEHOLDER.encode(), get_token(request).encode()))
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        # Private, as it holds the CSRF token, and revalidated on every use.
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Cookie', ))
+        return response
+
+
+class KeysetPaginationMixin:
+    """
+    Paginate a ``ListView`` with ``common.pagination.KeysetPaginator``. The context has ``next_page_url`` and
+    ``previous_page_url``; an HTMX partial can fetch ``next_page_url`` when its last row is revealed to load more.
+    """
+    paginate_by = 20
+
+    def get_paginator(self, queryset, per_page, orphans=0, allow_empty_first_page=True, **kwargs):
+        return KeysetPaginator(queryset, per_page, **kwargs)
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = self.get_paginator(queryset, page_size)
+        try:
+            page = paginator.page(self.request.GET.get(CURSOR_VAR))
+        except InvalidCursor:
+            raise Http404(_('صفحه نامعتبر است.'))
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def get_page_url(self, cursor: str):
+        if cursor is None:
+            return None
+        params = self.request.GET.copy()
+        params[CURSOR_VAR] = cursor
+        return f'{self.request.path}?{params.urlencode()}'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        page = context.get('page_obj')
+        context.update(
+            next_page_url=self.get_page_url(page.next_cursor) if page else None,
+            previous_page_url=self.get_page_url(page.previous_cursor) if page else None,
+        )
+        return context
@@ -1,7 +1,13 @@
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django_jalali.db import models as j_models
 
+from common.enums import TicketStatusChoices
+from common.managers import AnonymousTicketQuerySet
+
+TICKET_CATEGORIES_VERSION_CACHE_KEY = 'common:ticket-categories-version'
+
 
 class TicketCategory(models.Model):
     name = models.CharField(max_length=100, verbose_name=_('نام'))
@@ -20,20 +26,29 @@ class AnonymousTicket(models.Model):
     category = models.ForeignKey('common.TicketCategory', on_delete=models.PROTECT, verbose_name=_('دسته‌بندی'))
     description = models.TextField(verbose_name=_('شرح تیکت'))
     created_at = j_models.jDateTimeField(auto_now_add=True, verbose_name=_('زمان ایجاد'))
-    answer = models.TextField(verbose_name=_('پاسخ تیکت'))
-    answered_at = j_models.jDateTimeField(auto_now_add=True, verbose_name=_('زمان پاسخ'))
+    status = models.PositiveSmallIntegerField(
+        choices=TicketStatusChoices.choices, default=TicketStatusChoices.OPEN, verbose_name=_('وضعیت پاسخ')
+    )
+    answer = models.TextField(blank=True, verbose_name=_('پاسخ تیکت'))
+    answered_at = j_models.jDateTimeField(null=True, blank=True, verbose_name=_('زمان پاسخ'))
+
+    objects = AnonymousTicketQuerySet.as_manager()
 
     class Meta:
         verbose_name = _('تیکت')
         verbose_name_plural = _('تیکت‌ها')
         ordering = ('created_at',)
+        indexes = [
+            models.Index(fields=('created_at', ), name='common_ticket_created_idx'),
+            models.Index(fields=('status', 'created_at'), name='common_ticket_status_idx'),
+        ]
 
-    @property
-    def answered(self):
-        return self.answer is not None and len(self.answer) > 0
+    def save(self, *args, **kwargs):
+        if self.answer and self.status == TicketStatusChoices.OPEN:
+            self.status = TicketStatusChoices.ANSWERED
+            self.answered_at = timezone.now()
+        super().save(*args, **kwargs)
 
     @property
-    def status(self):
-        return _('پاسخ داده شده') if self.answered else _('در انتظار پاسخ')
-
-    status.fget.short_description = _('وضعیت پاسخ')
+    def answered(self):
+        return self.status == TicketStatusChoices.ANSWERED
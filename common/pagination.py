@@ -0,0 +1,257 @@
+"""
+Keyset (cursor) pagination: a page is the ``per_page`` rows that follow, in the ordering of the queryset, the last
+row of the previous page, so the database seeks through an index instead of counting off an ``OFFSET``, and deep
+pages cost the same as the first one. Pages are addressed by opaque cursors instead of numbers.
+
+Used by ``KeysetPaginationAdminMixin`` for admin changelists and by ``common.mixins.KeysetPaginationMixin`` for list
+views and HTMX "load more" partials. On PostgreSQL, counts above ``ESTIMATED_COUNT_THRESHOLD`` rows are the
+planner's estimate instead of a ``COUNT(*)`` over the whole table.
+"""
+import base64
+import datetime
+import json
+from collections.abc import Sequence
+from functools import cached_property
+
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ChangeList
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured, ValidationError
+from django.core.paginator import InvalidPage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, models
+from django.utils.dateparse import parse_date, parse_datetime
+
+CURSOR_VAR = 'cursor'
+NEXT, PREVIOUS = 'n', 'p'
+ESTIMATED_COUNT_THRESHOLD = 10000
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Keeps the microseconds of datetimes, which ``DjangoJSONEncoder`` rounds to milliseconds."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def estimate_count(queryset):
+    """
+    The planner's estimate of the rows of ``queryset`` on PostgreSQL: ``pg_class.reltuples`` for a whole table,
+    otherwise the row estimate of its ``EXPLAIN``. ``None`` on other databases or for tables never analyzed.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [connection.ops.quote_name(queryset.model._meta.db_table)]
+            )
+            estimate = cursor.fetchone()[0]
+        else:
+            sql, params = queryset.order_by().query.sql_with_params()
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+            estimate = (json.loads(plan) if isinstance(plan, str) else plan)[0]['Plan']['Plan Rows']
+    # reltuples is -1 (0 before PostgreSQL 14) until the table is first vacuumed or analyzed.
+    return int(estimate) if estimate > 0 else None
+
+
+class KeysetPage(Sequence):
+
+    def __init__(self, object_list: list, paginator, next_cursor: str = None, previous_cursor: str = None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<KeysetPage of {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Paginate ``queryset`` on its ordering (or ``ordering``), completed with the primary key so that it is total.
+    The ordering may only name non-null fields of the model itself; an index starting with them keeps every page
+    an index range scan.
+
+    ``count`` is exact up to ``estimate_count_above`` rows and estimated beyond, as told by ``count_is_estimated``.
+    """
+    estimate_count_above = ESTIMATED_COUNT_THRESHOLD
+    count_is_estimated = False
+
+    def __init__(self, queryset, per_page: int, ordering=None):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = self.get_ordering(ordering or queryset.query.order_by or queryset.model._meta.ordering)
+
+    def get_ordering(self, ordering) -> list:
+        """``(field, descending)`` pairs of ``ordering``."""
+        opts = self.queryset.model._meta
+        fields = []
+        for name in ordering:
+            if not isinstance(name, str) or name == '?':
+                raise ImproperlyConfigured(f'KeysetPaginator cannot paginate on {name!r}.')
+            descending = name.startswith('-')
+            name = name.lstrip('-')
+            try:
+                field = opts.pk if name == 'pk' else opts.get_field(name)
+            except FieldDoesNotExist:
+                raise ImproperlyConfigured(f'KeysetPaginator can only paginate on fields of {opts.label}: {name!r}.')
+            if field.null or not field.concrete:
+                raise ImproperlyConfigured(f'KeysetPaginator cannot paginate on the nullable field {name!r}.')
+            fields.append((field, descending))
+            if field.primary_key or field.unique:
+                return fields
+        return fields + [(opts.pk, fields[-1][1] if fields else False)]
+
+    def order_by(self, reverse: bool = False) -> list:
+        return [f'{"-" if descending != reverse else ""}{field.attname}' for field, descending in self.ordering]
+
+    def seek(self, values: list, reverse: bool = False) -> models.Q:
+        """Rows after ``values`` in the ordering, or before them with ``reverse``."""
+        condition = models.Q()
+        equal = {}
+        for (field, descending), value in zip(self.ordering, values):
+            lookup = 'lt' if descending != reverse else 'gt'
+            condition |= models.Q(**equal, **{f'{field.attname}__{lookup}': value})
+            equal[field.attname] = value
+        # The bound on the first field alone is what lets the database seek in its index.
+        first, descending = self.ordering[0]
+        return models.Q(**{f'{first.attname}__{"lte" if descending != reverse else "gte"}': values[0]}) & condition
+
+    def encode_cursor(self, direction: str, obj) -> str:
+        values = []
+        for field, _ in self.ordering:
+            value = field.value_from_object(obj)
+            # jdatetime values of django_jalali fields.
+            values.append(value.togregorian() if hasattr(value, 'togregorian') else value)
+        data = json.dumps([direction, values], cls=CursorEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor: str) -> tuple:
+        try:
+            direction, values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            if direction not in (NEXT, PREVIOUS) or len(values) != len(self.ordering):
+                raise ValueError(cursor)
+            return direction, [self.decode_value(field, value) for (field, _), value in zip(self.ordering, values)]
+        except (TypeError, ValueError, ValidationError):
+            raise InvalidCursor('That cursor is not valid')
+
+    @staticmethod
+    def decode_value(field, value):
+        if isinstance(field, models.DateTimeField):
+            value = parse_datetime(value)
+        elif isinstance(field, models.DateField):
+            value = parse_date(value)
+        else:
+            value = field.to_python(value)
+        if value is None:
+            raise ValueError(value)
+        return value
+
+    @cached_property
+    def count(self) -> int:
+        estimate = estimate_count(self.queryset)
+        if estimate is not None and estimate > self.estimate_count_above:
+            self.count_is_estimated = True
+            return estimate
+        return self.queryset.count()
+
+    def page(self, cursor: str = None) -> KeysetPage:
+        direction, values = self.decode_cursor(cursor) if cursor else (NEXT, None)
+        reverse = direction == PREVIOUS
+        queryset = self.queryset.order_by(*self.order_by(reverse))
+        if values is not None:
+            queryset = queryset.filter(self.seek(values, reverse))
+        object_list = list(queryset[:self.per_page + 1])
+        more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        if reverse:
+            object_list.reverse()
+        # Coming back from a later page, there is always a next one; going forward, a previous one.
+        has_next = True if reverse else more
+        has_previous = more if reverse else values is not None
+        return KeysetPage(
+            object_list,
+            self,
+            self.encode_cursor(NEXT, object_list[-1]) if has_next and object_list else None,
+            self.encode_cursor(PREVIOUS, object_list[0]) if has_previous and object_list else None,
+        )
+
+
+class KeysetChangeList(ChangeList):
+
+    def __init__(self, request, *args, **kwargs):
+        self.cursor = request.GET.get(CURSOR_VAR)
+        super().__init__(request, *args, **kwargs)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # Sorting, filtering and searching start again from the first page.
+        return super().get_query_string(new_params, [*(remove or []), CURSOR_VAR])
+
+    def get_results(self, request):
+        paginator = self.model_admin.get_keyset_paginator(request, self.queryset, self.list_per_page)
+        try:
+            self.page = paginator.page(self.cursor)
+        except InvalidCursor:
+            raise IncorrectLookupParameters()
+        self.result_count = paginator.count
+        self.full_result_count = None
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.result_list = self.page.object_list
+        self.can_show_all = False
+        self.multi_page = self.page.has_other_pages()
+        self.paginator = paginator
+
+    @property
+    def next_page_url(self) -> str:
+        return self.get_query_string({CURSOR_VAR: self.page.next_cursor})
+
+    @property
+    def previous_page_url(self) -> str:
+        return self.get_query_string({CURSOR_VAR: self.page.previous_cursor})
+
+    @property
+    def first_page_url(self) -> str:
+        return self.get_query_string()
+
+
+class KeysetPaginationAdminMixin:
+    """Changelist paginated with ``KeysetPaginator``; only the fields of ``sortable_by`` should be sortable."""
+    change_list_template = 'admin/keyset_change_list.html'
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    # ``get_paginator`` is left alone: the autocomplete view of the admin pages by number with it.
+    def get_keyset_paginator(self, request, queryset, per_page):
+        return KeysetPaginator(queryset, per_page)
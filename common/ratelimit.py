@@ -0,0 +1,92 @@
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class SlidingWindowRateLimiter:
+    """
+    Approximate sliding window: the count of the previous fixed window is weighted by how much of it still overlaps
+    the sliding window. Only two cache keys per identity are used, and rejected requests are taken off the count.
+    """
+
+    def __init__(self, limit: int, window: int):
+        self.limit = limit
+        self.window = window
+        self.cache = caches[settings.RATE_LIMIT_CACHE_ALIAS]
+
+    def hit(self, key: str):
+        """Count a request for ``key``; return the seconds to wait if it is over the limit, otherwise ``None``."""
+        now = time.time()
+        current_key, previous_key, elapsed = self.keys(key, now)
+        # Counted first with the atomic ``incr``, so that concurrent requests cannot all read the same count.
+        self.cache.add(current_key, 0, self.window * 2)
+        count = self.cache.incr(current_key)
+        retry_after = self.check(self.cache.get(previous_key, 0), count, elapsed)
+        if retry_after is not None:
+            self.cache.decr(current_key)
+        return retry_after
+
+    async def ahit(self, key: str):
+        """``hit`` through the async cache API."""
+        now = time.time()
+        current_key, previous_key, elapsed = self.keys(key, now)
+        await self.cache.aadd(current_key, 0, self.window * 2)
+        count = await self.cache.aincr(current_key)
+        retry_after = self.check(await self.cache.aget(previous_key, 0), count, elapsed)
+        if retry_after is not None:
+            await self.cache.adecr(current_key)
+        return retry_after
+
+    def keys(self, key: str, now: float) -> tuple:
+        """Keys of the current and previous windows, and the seconds elapsed in the current one."""
+        index = int(now // self.window)
+        return f'ratelimit:{key}:{index}', f'ratelimit:{key}:{index - 1}', now - index * self.window
+
+    def check(self, previous_count: int, count: int, elapsed: float):
+        """Seconds to wait when ``count``, this request included, puts the estimate over the limit."""
+        estimate = previous_count * (self.window - elapsed) / self.window + count
+        if estimate > self.limit:
+            return max(math.ceil(self.window - elapsed), 1)
+        return None
+
+
+def get_client_ip(request) -> str:
+    """
+    The address of the client. In a list header such as X-Forwarded-For the client can write any entries before the
+    ones appended by the ``RATE_LIMIT_TRUSTED_PROXIES`` proxies in front of the application, so the address is the
+    one that the outermost of them saw.
+    """
+    value = request.META.get(settings.RATE_LIMIT_CLIENT_IP_HEADER)
+    if not value:
+        return request.META.get('REMOTE_ADDR', '')
+    addresses = [address.strip() for address in value.split(',')]
+    return addresses[-min(max(settings.RATE_LIMIT_TRUSTED_PROXIES, 1), len(addresses))]
+
+
+def check_rate_limits(scope: str, **identities):
+    """
+    Count a request of ``scope`` against the limits in ``settings.RATE_LIMITS[scope]``, one per identity such as
+    ``ip`` or ``account``. Return the seconds to wait when any limit is reached, otherwise ``None``.
+    """
+    for name, (limit, window) in settings.RATE_LIMITS.get(scope, {}).items():
+        identity = identities.get(name)
+        if not identity:
+            continue
+        retry_after = SlidingWindowRateLimiter(limit, window).hit(f'{scope}:{name}:{identity}')
+        if retry_after is not None:
+            return retry_after
+    return None
+
+
+async def acheck_rate_limits(scope: str, **identities):
+    """``check_rate_limits`` through the async cache API."""
+    for name, (limit, window) in settings.RATE_LIMITS.get(scope, {}).items():
+        identity = identities.get(name)
+        if not identity:
+            continue
+        retry_after = await SlidingWindowRateLimiter(limit, window).ahit(f'{scope}:{name}:{identity}')
+        if retry_after is not None:
+            return retry_after
+    return None
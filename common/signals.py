@@ -0,0 +1,11 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from common.helpers import bump_cache_version
+from common.models import TICKET_CATEGORIES_VERSION_CACHE_KEY, TicketCategory
+
+
+@receiver([post_save, post_delete], sender=TicketCategory)
+def invalidate_ticket_categories(sender, **kwargs):
+    transaction.on_commit(lambda: bump_cache_version(TICKET_CATEGORIES_VERSION_CACHE_KEY))
@@ -0,0 +1,128 @@
+"""
+Build steps of ``common.storage.BuildStaticFilesStorage``: bundling, minification, icon pruning and font subsetting.
+``rjsmin``/``rcssmin``, ``fontTools`` and ``brotli`` are used when installed; without them bundles are only
+concatenated (the vendor sources are already minified builds), fonts are kept whole and no ``.br`` files are written.
+"""
+import io
+import posixpath
+import re
+
+from django.contrib.staticfiles import finders
+
+from common.templating import iter_template_names
+
+ICON_CLASS_RE = re.compile(r'\b(?:bi|bxs|bxl|bx)-[a-z0-9-]+')
+ICON_RULE_RE = re.compile(r'\.((?:bi|bxs|bxl|bx)-[\w-]+):{1,2}before\s*\{\s*content:\s*"\\([0-9a-fA-F]+)";?\s*\}\s*')
+CSS_URL_RE = re.compile(r'url\(\s*([\'"]?)(.*?)\1\s*\)')
+CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+SOURCE_MAP_RE = re.compile(r'^\s*(?://|/\*)# sourceMappingURL=.*$', re.M)
+CHARSET_RE = re.compile(r'@charset\s+"[^"]*";')
+
+# Latin, Arabic script with its presentation forms, and punctuation such as ZWNJ; names typed by users can hold
+# any of them, so text fonts keep these ranges and not only the characters of the templates.
+TEXT_FONT_RANGES = [
+    (0x0020, 0x007E), (0x00A0, 0x00FF), (0x0600, 0x06FF), (0x0750, 0x077F), (0x2000, 0x206F),
+    (0xFB50, 0xFDFF), (0xFE70, 0xFEFF),
+]
+
+
+def read_static(path: str) -> str:
+    with open(finders.find(path), encoding='utf-8') as static_file:
+        return static_file.read()
+
+
+def used_icon_classes() -> set:
+    """Icon classes written in the project templates and scripts."""
+    used = set()
+    for _, path in iter_template_names():
+        with open(path, encoding='utf-8') as template_file:
+            used.update(ICON_CLASS_RE.findall(template_file.read()))
+    for path in ('js/autocomplete.js', 'js/events.js', 'style/js/main.js'):
+        used.update(ICON_CLASS_RE.findall(read_static(path)))
+    return used
+
+
+def prune_icon_rules(css: str, used: set) -> str:
+    return ICON_RULE_RE.sub(lambda match: match.group(0) if match.group(1) in used else '', css)
+
+
+def icon_codepoints(css: str, used: set) -> set:
+    return {int(code, 16) for name, code in ICON_RULE_RE.findall(css) if name in used}
+
+
+def rewrite_css_urls(css: str, source: str, bundle: str) -> str:
+    """Make the relative ``url()`` of ``source`` relative to where it is bundled."""
+    def rewrite(match):
+        quote, url = match.groups()
+        if url.startswith(('data:', 'http:', 'https:', '//', '/', '#')):
+            return match.group(0)
+        path = posixpath.normpath(posixpath.join(posixpath.dirname(source), url))
+        return f'url({quote}{posixpath.relpath(path, posixpath.dirname(bundle))}{quote})'
+    return CSS_URL_RE.sub(rewrite, css)
+
+
+def minify_css(css: str) -> str:
+    try:
+        import rcssmin
+    except ImportError:
+        css = CSS_COMMENT_RE.sub('', css)
+        css = re.sub(r'\s+', ' ', css)
+        return re.sub(r'\s*([{};,])\s*', r'\1', css).strip()
+    return rcssmin.cssmin(css)
+
+
+def minify_js(js: str) -> str:
+    try:
+        import rjsmin
+    except ImportError:
+        return js
+    return rjsmin.jsmin(js)
+
+
+def build_css_bundle(name: str, sources: list, used_icons: set) -> str:
+    parts = []
+    for source in sources:
+        css = SOURCE_MAP_RE.sub('', CHARSET_RE.sub('', read_static(source)))
+        parts.append(prune_icon_rules(rewrite_css_urls(css, source, name), used_icons))
+    return minify_css('\n'.join(parts))
+
+
+def build_js_bundle(name: str, sources: list) -> str:
+    # Sources are separate scripts, so each one is closed off before the next.
+    return '\n;\n'.join(minify_js(SOURCE_MAP_RE.sub('', read_static(source))) for source in sources)
+
+
+def build_bundle(name: str, sources: list, used_icons: set) -> str:
+    if name.endswith('.css'):
+        return build_css_bundle(name, sources, used_icons)
+    return build_js_bundle(name, sources)
+
+
+def text_font_codepoints() -> set:
+    codepoints = {code for start, end in TEXT_FONT_RANGES for code in range(start, end + 1)}
+    for _, path in iter_template_names():
+        with open(path, encoding='utf-8') as template_file:
+            codepoints.update(ord(character) for character in template_file.read())
+    return codepoints
+
+
+def subset_font(content: bytes, codepoints: set, flavor: str = None):
+    """``content`` reduced to the glyphs of ``codepoints``; ``None`` without fontTools (or brotli for woff2)."""
+    try:
+        from fontTools import subset
+        from fontTools.ttLib import TTFont
+        if flavor == 'woff2':
+            import brotli  # noqa: F401
+    except ImportError:
+        return None
+    font = TTFont(io.BytesIO(content))
+    options = subset.Options()
+    options.layout_features = ['*']
+    options.name_IDs = ['*']
+    options.flavor = flavor
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+    output = io.BytesIO()
+    subset.save_font(font, output, options)
+    return output.getvalue()
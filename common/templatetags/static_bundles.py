@@ -0,0 +1,14 @@
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+
+register = template.Library()
+
+
+@register.simple_tag
+def static_bundle(name: str):
+    """The bundle ``name`` of ``settings.STATIC_BUNDLES`` once built, otherwise each of its sources."""
+    sources = [name] if settings.STATIC_BUILD else settings.STATIC_BUNDLES[name]
+    tag = '<link href="{}" rel="stylesheet">' if name.endswith('.css') else '<script src="{}" defer></script>'
+    return format_html_join('\n', tag, ((static(source), ) for source in sources))
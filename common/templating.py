@@ -0,0 +1,35 @@
+import os
+
+from django.conf import settings
+from django.template import engines
+from django.template.utils import get_app_template_dirs
+
+
+def get_template_dirs() -> list:
+    """``templates`` directories of the project and of its own apps, leaving out the installed packages."""
+    base_dir = str(settings.BASE_DIR)
+    app_dirs = [str(d) for d in get_app_template_dirs('templates') if str(d).startswith(base_dir)]
+    return [str(d) for d in engines['django'].engine.dirs] + app_dirs
+
+
+def iter_template_names():
+    """Yield ``(name, path)`` of every template of ``get_template_dirs``, by the name templates are loaded with."""
+    seen = set()
+    for template_dir in get_template_dirs():
+        for root, _, files in os.walk(template_dir):
+            for file_name in sorted(files):
+                if not file_name.endswith(('.html', '.txt')):
+                    continue
+                path = os.path.join(root, file_name)
+                name = os.path.relpath(path, template_dir).replace(os.sep, '/')
+                # Like the loaders, the first directory providing a name wins.
+                if name not in seen:
+                    seen.add(name)
+                    yield name, path
+
+
+def preload_templates():
+    """Fill the cached template loader of this process with every project template."""
+    engine = engines['django']
+    for name, _ in iter_template_names():
+        engine.get_template(name)
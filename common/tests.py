@@ -1,3 +1,568 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import gzip
+import os
+import re
+import shutil
+import tempfile
+import threading
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache, caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.http import HttpResponseNotFound
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from common.checks import check_shared_caches
+from common.enums import TicketStatusChoices
+from common.events import InProcessEventBroker, get_event_broker, publish_on_commit
+from common.helpers import normalize_persian
+from common.middleware import IMMUTABLE_CACHE_CONTROL, StaticFilesMiddleware
+from common.models import AnonymousTicket, TicketCategory
+from common.pagination import InvalidCursor, KeysetPaginator, estimate_count
+from common.ratelimit import SlidingWindowRateLimiter, check_rate_limits, get_client_ip
+from persons.models import TREE_EVENT_CHANNEL, Person
+from shajarehnaameh.sse import event_stream, get_subscriptions
+from users.htmx.views import ResetPasswordHTMXView
+from users.managers import NOTIFICATIONS_EVENT_CHANNEL
+from users.models import ShnUser
+
+RATE_LIMIT_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'ratelimit': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'ratelimit-tests'},
+}
+
+
+@override_settings(CACHES=RATE_LIMIT_CACHES, RATE_LIMIT_CACHE_ALIAS='ratelimit')
+class SlidingWindowRateLimiterTests(SimpleTestCase):
+
+    def setUp(self):
+        caches['ratelimit'].clear()
+
+    def hit_at(self, limiter: SlidingWindowRateLimiter, now: float, key: str = 'key'):
+        with mock.patch('common.ratelimit.time.time', return_value=now):
+            return limiter.hit(key)
+
+    def test_limit_within_a_window(self):
+        limiter = SlidingWindowRateLimiter(3, 60)
+        self.assertEqual([self.hit_at(limiter, 6000 + second) for second in range(4)], [None, None, None, 57])
+        self.assertEqual([self.hit_at(limiter, 6005) for _ in range(3)], [55, 55, 55])
+        # Rejected requests are taken off the count again. The cache expires entries on the mocked clock too.
+        with mock.patch('common.ratelimit.time.time', return_value=6005):
+            self.assertEqual(caches['ratelimit'].get('ratelimit:key:100'), 3)
+
+    def test_previous_window_is_weighted(self):
+        limiter = SlidingWindowRateLimiter(4, 60)
+        for _ in range(4):
+            self.assertIsNone(self.hit_at(limiter, 6000))
+        # Half-way through the next window, half of the previous count still overlaps: 2 + 2 requests.
+        self.assertEqual([self.hit_at(limiter, 6090) for _ in range(3)], [None, None, 30])
+        # A window later the old requests are forgotten.
+        self.assertIsNone(self.hit_at(limiter, 6180))
+
+    def test_keys_are_counted_apart(self):
+        limiter = SlidingWindowRateLimiter(1, 60)
+        self.assertIsNone(self.hit_at(limiter, 6000, 'first'))
+        self.assertIsNotNone(self.hit_at(limiter, 6000, 'first'))
+        self.assertIsNone(self.hit_at(limiter, 6000, 'second'))
+
+    def test_concurrent_burst(self):
+        limiter = SlidingWindowRateLimiter(5, 60)
+        barrier = threading.Barrier(20)
+        results = []
+
+        def hit():
+            barrier.wait()
+            results.append(limiter.hit('burst'))
+
+        threads = [threading.Thread(target=hit) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results.count(None), 5)
+
+    async def test_ahit(self):
+        limiter = SlidingWindowRateLimiter(2, 60)
+        with mock.patch('common.ratelimit.time.time', return_value=6000):
+            self.assertEqual([await limiter.ahit('async') for _ in range(3)], [None, None, 60])
+
+    @override_settings(RATE_LIMITS={'scope': {'ip': (1, 60), 'account': (2, 60)}})
+    def test_check_rate_limits(self):
+        self.assertIsNone(check_rate_limits('scope', ip='1.1.1.1', account='user'))
+        self.assertIsNotNone(check_rate_limits('scope', ip='1.1.1.1', account='user'))
+        # Only the identities given are limited, and unknown scopes are not limited.
+        self.assertIsNone(check_rate_limits('scope', ip='2.2.2.2'))
+        self.assertIsNone(check_rate_limits('other', ip='1.1.1.1'))
+
+
+class GetClientIPTests(SimpleTestCase):
+
+    def get_client_ip(self, **headers) -> str:
+        return get_client_ip(RequestFactory().get('/', REMOTE_ADDR='10.0.0.1', **headers))
+
+    def test_remote_addr(self):
+        self.assertEqual(self.get_client_ip(HTTP_X_FORWARDED_FOR='6.6.6.6'), '10.0.0.1')
+
+    @override_settings(RATE_LIMIT_CLIENT_IP_HEADER='HTTP_X_FORWARDED_FOR', RATE_LIMIT_TRUSTED_PROXIES=1)
+    def test_forwarded_for_ignores_entries_written_by_the_client(self):
+        self.assertEqual(self.get_client_ip(HTTP_X_FORWARDED_FOR='6.6.6.6, 1.2.3.4'), '1.2.3.4')
+        self.assertEqual(self.get_client_ip(HTTP_X_FORWARDED_FOR='1.2.3.4'), '1.2.3.4')
+        self.assertEqual(self.get_client_ip(), '10.0.0.1')
+
+    @override_settings(RATE_LIMIT_CLIENT_IP_HEADER='HTTP_X_FORWARDED_FOR', RATE_LIMIT_TRUSTED_PROXIES=2)
+    def test_forwarded_for_behind_two_proxies(self):
+        self.assertEqual(self.get_client_ip(HTTP_X_FORWARDED_FOR='6.6.6.6, 1.2.3.4, 10.0.0.2'), '1.2.3.4')
+
+
+class KeysetPaginatorTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = TicketCategory.objects.create(name='category')
+        AnonymousTicket.objects.bulk_create([
+            AnonymousTicket(email='user@example.com', name=f'ticket {index}', category=category, description='-')
+            for index in range(23)
+        ])
+        # Ties on created_at, and times apart by a microsecond only.
+        start = timezone.make_aware(datetime.datetime(2024, 1, 1, 12, 0, 0, 1))
+        tickets = list(AnonymousTicket.objects.order_by('pk'))
+        for index, ticket in enumerate(tickets):
+            ticket.created_at = start + datetime.timedelta(microseconds=index // 3)
+            ticket.status = index % 2
+        AnonymousTicket.objects.bulk_update(tickets, ['created_at', 'status'])
+
+    def walk(self, paginator: KeysetPaginator) -> list:
+        """Pages from the first to the last, then back to the first through the previous cursors."""
+        pages = [paginator.page()]
+        while pages[-1].has_next():
+            pages.append(paginator.page(pages[-1].next_cursor))
+        backwards = [pages[-1]]
+        while backwards[-1].has_previous():
+            backwards.append(paginator.page(backwards[-1].previous_cursor))
+        self.assertEqual(
+            [[ticket.pk for ticket in page] for page in backwards[::-1]],
+            [[ticket.pk for ticket in page] for page in pages],
+        )
+        return pages
+
+    def test_pages_follow_the_ordering(self):
+        # The primary key completes the ordering, in the direction of its last field.
+        for ordering, total_ordering in (
+            (('created_at', ), ('created_at', 'pk')),
+            (('-created_at', ), ('-created_at', '-pk')),
+            (('-pk', ), ('-pk', )),
+            (('status', '-created_at'), ('status', '-created_at', '-pk')),
+        ):
+            pages = self.walk(KeysetPaginator(AnonymousTicket.objects.order_by(*ordering), 5))
+            self.assertEqual([len(page) for page in pages], [5, 5, 5, 5, 3])
+            self.assertEqual(
+                [ticket.pk for page in pages for ticket in page],
+                list(AnonymousTicket.objects.order_by(*total_ordering).values_list('pk', flat=True)),
+                msg=ordering,
+            )
+
+    def test_first_and_last_pages(self):
+        pages = self.walk(KeysetPaginator(AnonymousTicket.objects.all(), 5))
+        self.assertFalse(pages[0].has_previous())
+        self.assertFalse(pages[-1].has_next())
+        self.assertTrue(all(page.has_other_pages() for page in pages))
+        single = KeysetPaginator(AnonymousTicket.objects.all(), 50).page()
+        self.assertFalse(single.has_other_pages())
+
+    def test_invalid_cursors(self):
+        paginator = KeysetPaginator(AnonymousTicket.objects.order_by('created_at'), 5)
+        other = KeysetPaginator(AnonymousTicket.objects.order_by('status', 'created_at'), 5)
+        # Not base64, a JSON object, and a cursor of another ordering.
+        for cursor in ('not a cursor', 'e30', other.page().next_cursor):
+            with self.assertRaises(InvalidCursor, msg=cursor):
+                paginator.page(cursor)
+
+    def test_nullable_ordering_is_refused(self):
+        with self.assertRaises(ImproperlyConfigured):
+            KeysetPaginator(AnonymousTicket.objects.order_by('answered_at'), 5)
+
+    def test_count(self):
+        queryset = AnonymousTicket.objects.filter(status=TicketStatusChoices.OPEN)
+        paginator = KeysetPaginator(queryset, 5)
+        self.assertEqual(paginator.count, 12)
+        if estimate_count(queryset) is None:
+            self.assertFalse(paginator.count_is_estimated)
+
+
+@override_settings(CACHES=RATE_LIMIT_CACHES, RATE_LIMIT_CACHE_ALIAS='ratelimit')
+class SharedCachesCheckTests(SimpleTestCase):
+
+    def warned(self) -> list:
+        return [warning.msg.split()[0] for warning in check_shared_caches(None)]
+
+    @override_settings(OTP_BACKEND='users.otp.DatabaseOTPBackend')
+    def test_locmem_caches_are_warned_about(self):
+        self.assertEqual(self.warned(), ['RATE_LIMIT_CACHE_ALIAS', 'common.helpers.bump_cache_version'])
+
+    @override_settings(OTP_BACKEND='users.otp.CacheOTPBackend', OTP_CACHE_ALIAS='ratelimit')
+    def test_cache_otp_backend_needs_a_shared_cache(self):
+        self.assertIn('OTP_CACHE_ALIAS', self.warned())
+
+
+class FragmentCacheTests(TestCase):
+    url = reverse('common:common-hx:anonymous-ticket')
+
+    @classmethod
+    def setUpTestData(cls):
+        TicketCategory.objects.create(name='first category')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_csrf_token_is_put_back_for_each_request(self):
+        self.client.get(self.url)
+        # The second client is served from the cache, with a token of its own that its POST is accepted with.
+        client = Client(enforce_csrf_checks=True)
+        content = client.get(self.url).content.decode()
+        self.assertNotIn('CSRF-TOKEN-PLACEHOLDER', content)
+        token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', content)[1]
+        self.assertEqual(client.post(self.url, {'csrfmiddlewaretoken': token}).status_code, 200)
+        self.assertEqual(client.post(self.url).status_code, 403)
+
+    def test_not_modified(self):
+        # The ETag covers the CSRF cookie, which the first response sets.
+        self.client.get(self.url)
+        response = self.client.get(self.url)
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        # The query string is not part of the key.
+        self.assertEqual(self.client.get(self.url, {'junk': 1}, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_category_change_invalidates_the_fragment(self):
+        self.client.get(self.url)
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            TicketCategory.objects.create(name='second category')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(response, 'second category')
+
+    def test_pending_messages_are_rendered(self):
+        url = reverse('users:users-hx:reset-password-htmx')
+        self.client.get(url)
+        request = RequestFactory().get(url)
+        request.user, request._messages = AnonymousUser(), CookieStorage(RequestFactory().get('/'))
+        messages.info(request, 'pending message')
+        response = ResetPasswordHTMXView.as_view()(request)
+        self.assertNotIn('ETag', response)
+        self.assertContains(response.render(), 'pending message')
+
+
+class TicketModerationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category, cls.other_category = TicketCategory.objects.bulk_create([
+            TicketCategory(name='category'), TicketCategory(name='other category')
+        ])
+        cls.tickets = {}
+        for category in (cls.category, cls.other_category):
+            for status in TicketStatusChoices:
+                cls.tickets[category.pk, status] = AnonymousTicket.objects.create(
+                    email='user@example.com', name=status.name, category=category, description='-', status=status
+                )
+
+    def statuses(self) -> dict:
+        return dict(AnonymousTicket.objects.values_list('pk', 'status'))
+
+    def test_answer_only_open_tickets(self):
+        closed = self.tickets[self.category.pk, TicketStatusChoices.CLOSED]
+        self.assertEqual(AnonymousTicket.objects.filter(category=self.category).answer('answer'), 1)
+        self.assertEqual(
+            list(AnonymousTicket.objects.filter(answer='answer').values_list('pk', flat=True)),
+            [self.tickets[self.category.pk, TicketStatusChoices.OPEN].pk],
+        )
+        closed.refresh_from_db()
+        self.assertEqual((closed.status, closed.answer, closed.answered_at), (TicketStatusChoices.CLOSED, '', None))
+        self.assertEqual(AnonymousTicket.objects.filter(status=TicketStatusChoices.OPEN).count(), 1)
+
+    def test_close(self):
+        self.assertEqual(AnonymousTicket.objects.filter(category=self.category).close(), 2)
+        self.assertEqual(
+            set(AnonymousTicket.objects.filter(category=self.category).values_list('status', flat=True)),
+            {TicketStatusChoices.CLOSED},
+        )
+        self.assertEqual(AnonymousTicket.objects.filter(status=TicketStatusChoices.CLOSED).count(), 4)
+
+    def test_answer_action_across_the_filtered_tickets(self):
+        admin_user = ShnUser.objects.create_superuser(username='admin', mobile='09120000009', password='password')
+        self.client.force_login(admin_user)
+        url = f'{reverse("admin:common_anonymousticket_changelist")}?category__id__exact={self.category.pk}'
+        data = {
+            'action': 'answer_tickets',
+            'select_across': '1',
+            '_selected_action': [self.tickets[self.category.pk, TicketStatusChoices.ANSWERED].pk],
+        }
+        # The confirmation page carries the selection over to the form posting the answer.
+        response = self.client.post(url, {**data, 'index': '0'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['open_count'], 1)
+        self.assertContains(response, 'name="select_across" value="1"')
+        self.assertEqual(AnonymousTicket.objects.exclude(answer='').count(), 0)
+
+        response = self.client.post(url, {**data, 'apply': '1', 'answer': 'answer'})
+        self.assertRedirects(response, url, fetch_redirect_response=False)
+        self.assertEqual(
+            list(AnonymousTicket.objects.filter(answer='answer').values_list('pk', flat=True)),
+            [self.tickets[self.category.pk, TicketStatusChoices.OPEN].pk],
+        )
+        self.assertTrue(AnonymousTicket.objects.filter(category=self.other_category, status=0).exists())
+
+
+class FillTicketStatusMigrationTests(TransactionTestCase):
+    migrate_from = [('common', '0001_initial')]
+    migrate_to = [('common', '0002_anonymousticket_status')]
+
+    def migrate(self, targets: list):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def test_status_is_filled_from_answers(self):
+        self.addCleanup(self.migrate, MigrationExecutor(connection).loader.graph.leaf_nodes())
+        old_apps = self.migrate(self.migrate_from)
+        category = old_apps.get_model('common', 'TicketCategory').objects.create(name='category')
+        for answer in ('', 'answer'):
+            old_apps.get_model('common', 'AnonymousTicket').objects.create(
+                email='user@example.com', name=answer, category=category, description='-', answer=answer
+            )
+
+        new_apps = self.migrate(self.migrate_to)
+        tickets = new_apps.get_model('common', 'AnonymousTicket').objects.order_by('name')
+        self.assertEqual(
+            [(ticket.name, ticket.status, ticket.answered_at is None) for ticket in tickets],
+            [('', TicketStatusChoices.OPEN, True), ('answer', TicketStatusChoices.ANSWERED, False)],
+        )
+
+
+@override_settings(EVENT_BROKER='common.events.InProcessEventBroker')
+class EventStreamTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = ShnUser.objects.create_user(username='user', mobile='09120000001', password='password')
+        cls.father = Person.objects.create(first_name='father', last_name='test', gender=1)
+        cls.child = Person.objects.create(first_name='child', last_name='test', gender=1, father=cls.father)
+        cls.stranger = Person.objects.create(first_name='stranger', last_name='test', gender=1)
+
+    def setUp(self):
+        get_event_broker.cache_clear()
+        self.addCleanup(get_event_broker.cache_clear)
+
+    def scope(self, query: str = '', user: ShnUser = None) -> dict:
+        headers = []
+        if user is not None:
+            self.client.force_login(user)
+            cookie = f'{settings.SESSION_COOKIE_NAME}={self.client.cookies[settings.SESSION_COOKIE_NAME].value}'
+            headers.append((b'cookie', cookie.encode()))
+        return {'type': 'http', 'path': '/events/', 'query_string': query.encode(), 'headers': headers}
+
+    async def test_broker_delivers_subscribed_channels_only(self):
+        broker = InProcessEventBroker()
+        async with broker.subscribe({'first', 'second'}) as queue:
+            # Published from another thread, as sync code changing the data would.
+            await sync_to_async(broker.publish, thread_sensitive=False)('third', 0)
+            await sync_to_async(broker.publish, thread_sensitive=False)('second', [1])
+            self.assertEqual(await asyncio.wait_for(queue.get(), 1), ('second', [1]))
+            self.assertTrue(queue.empty())
+        self.assertFalse(broker._subscriptions)
+
+    def test_publish_on_commit(self):
+        broker = get_event_broker()
+        with mock.patch.object(broker, 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                publish_on_commit('channel', 'data')
+                publish.assert_not_called()
+        publish.assert_called_once_with('channel', 'data')
+
+    async def test_users_only_get_their_own_notifications(self):
+        self.assertEqual(await get_subscriptions(self.scope()), {})
+        scope = await sync_to_async(self.scope)(user=self.user)
+        self.assertEqual(
+            list(await get_subscriptions(scope)), [NOTIFICATIONS_EVENT_CHANNEL.format(user_id=self.user.pk)]
+        )
+
+    async def test_tree_events_are_filtered_by_person(self):
+        subscriptions = await get_subscriptions(self.scope(f'tree={self.father.pk}&generations=1'))
+        accepts = subscriptions[TREE_EVENT_CHANNEL]
+        self.assertTrue(accepts([self.child.pk]))
+        self.assertTrue(accepts(None))
+        self.assertFalse(accepts([self.stranger.pk]))
+        self.assertEqual(await get_subscriptions(self.scope('tree=invalid')), {})
+
+    async def test_stream(self):
+        broker, sent, disconnect = get_event_broker(), [], asyncio.Event()
+
+        async def receive():
+            await disconnect.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+            if b'event:' in message.get('body', b''):
+                disconnect.set()
+
+        stream = asyncio.ensure_future(event_stream(self.scope(f'tree={self.father.pk}'), receive, send))
+        while not broker._subscriptions:
+            await asyncio.sleep(0.01)
+        broker.publish(TREE_EVENT_CHANNEL, [self.stranger.pk])
+        broker.publish(TREE_EVENT_CHANNEL, [self.child.pk])
+        await asyncio.wait_for(stream, 5)
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertEqual(
+            [message['body'] for message in sent[1:]],
+            [b'retry: 5000\n\n', f'event: tree\ndata: [{self.child.pk}]\n\n'.encode()],
+        )
+        self.assertFalse(broker._subscriptions)
+
+    async def test_stream_without_subscriptions(self):
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        await event_stream(self.scope(), None, send)
+        self.assertEqual(sent[0]['status'], 204)
+
+
+STATIC_CONTENT = b'body { color: black; }\n' * 10
+
+
+class StaticFilesMiddlewareTests(SimpleTestCase):
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        os.mkdir(os.path.join(root, 'css'))
+        for name, content in (
+            ('css/site.css', STATIC_CONTENT),
+            ('css/site.css.gz', gzip.compress(STATIC_CONTENT)),
+            ('css/site.0123456789ab.css', STATIC_CONTENT),
+        ):
+            with open(os.path.join(root, name), 'wb') as static_file:
+                static_file.write(content)
+        manifest = mock.Mock(hashed_files={'css/site.css': 'css/site.0123456789ab.css'})
+        with override_settings(STATIC_SERVE=True, STATIC_ROOT=root, STATIC_URL='static/', STATIC_MAX_AGE=60):
+            with mock.patch('common.middleware.staticfiles_storage', manifest):
+                self.middleware = StaticFilesMiddleware(lambda request: HttpResponseNotFound())
+        self.last_modified = http_date(os.stat(os.path.join(root, 'css/site.css')).st_mtime)
+
+    def get(self, path: str = '/static/css/site.css', method: str = 'get', **headers):
+        response = self.middleware(getattr(RequestFactory(), method)(path, **headers))
+        self.addCleanup(response.close)
+        return response
+
+    def content(self, response) -> bytes:
+        return b''.join(response.streaming_content) if response.streaming else response.content
+
+    def test_full_file(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.content(response), STATIC_CONTENT)
+        self.assertEqual(response['Content-Length'], str(len(STATIC_CONTENT)))
+        self.assertEqual(response['Content-Type'], 'text/css; charset=utf-8')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['Last-Modified'], self.last_modified)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertFalse(response.has_header('Content-Disposition'))
+
+    def test_manifest_names_are_immutable(self):
+        response = self.get('/static/css/site.0123456789ab.css')
+        self.assertEqual(response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+        self.assertFalse(response.has_header('Vary'))
+
+    def test_gzip_negotiation(self):
+        response = self.get(HTTP_ACCEPT_ENCODING='br, gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(self.content(response)), STATIC_CONTENT)
+        self.assertNotEqual(response['ETag'], self.get()['ETag'])
+        self.assertFalse(self.get(HTTP_ACCEPT_ENCODING='gzip;q=0').has_header('Content-Encoding'))
+
+    def test_not_modified(self):
+        etag = self.get()['ETag']
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+        # The gzip copy has an ETag of its own.
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag, HTTP_ACCEPT_ENCODING='gzip').status_code, 200)
+        self.assertEqual(self.get(HTTP_IF_MODIFIED_SINCE=self.last_modified).status_code, 304)
+
+    def test_ranges(self):
+        response = self.get(HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(STATIC_CONTENT)}')
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual(self.content(response), STATIC_CONTENT[10:20])
+        # Ranges are of the identity encoding.
+        response = self.get(HTTP_RANGE='bytes=-5', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual((response.status_code, self.content(response)), (206, STATIC_CONTENT[-5:]))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_unsatisfiable_range(self):
+        response = self.get(HTTP_RANGE=f'bytes={len(STATIC_CONTENT)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(STATIC_CONTENT)}')
+
+    def test_if_range(self):
+        etag = self.get()['ETag']
+        self.assertEqual(self.get(HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE=etag).status_code, 206)
+        self.assertEqual(self.get(HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE=self.last_modified).status_code, 206)
+        # A stale validator: the whole current file is sent.
+        response = self.get(HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE='"stale"')
+        self.assertEqual((response.status_code, self.content(response)), (200, STATIC_CONTENT))
+
+    def test_head(self):
+        response = self.get(method='head')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Length'], str(len(STATIC_CONTENT)))
+        self.assertEqual(response.content, b'')
+        self.assertEqual(self.get(method='head', HTTP_RANGE='bytes=0-1')['Content-Length'], '2')
+
+    def test_other_requests(self):
+        self.assertEqual(self.get(method='post').status_code, 405)
+        self.assertEqual(self.get('/static/css/missing.css').status_code, 404)
+        self.assertEqual(self.get('/css/site.css').status_code, 404)
+
+
+class NormalizePersianTests(SimpleTestCase):
+
+    def test_letter_variants(self):
+        self.assertEqual(normalize_persian('علي'), 'علی')
+        self.assertEqual(normalize_persian('كاظم'), 'کاظم')
+        self.assertEqual(normalize_persian('فاطمة أحمدي'), 'فاطمه احمدی')
+        self.assertEqual(normalize_persian('مؤمن'), 'مومن')
+
+    def test_joiners_and_tatweel(self):
+        self.assertEqual(normalize_persian('عبدال\u200cله'), 'عبدالله')
+        self.assertEqual(normalize_persian('محـــمد'), 'محمد')
+
+    def test_diacritics(self):
+        self.assertEqual(normalize_persian('مُحَمَّد'), 'محمد')
+        self.assertEqual(normalize_persian('رحمٰن'), 'رحمن')
+
+    def test_digits(self):
+        self.assertEqual(normalize_persian('۱۳۴۰'), '1340')
+        self.assertEqual(normalize_persian('١٣٤٠'), '1340')
+
+    def test_spacing_and_case(self):
+        self.assertEqual(normalize_persian('  Ali \t  Ahmadi '), 'ali ahmadi')
+        self.assertEqual(normalize_persian(''), '')
+        self.assertEqual(normalize_persian(None), '')
@@ -0,0 +1,60 @@
+from django import forms
+from django.urls import reverse
+from django.utils.http import urlencode
+
+
+class AutocompleteSelect(forms.Widget):
+    """
+    Pick model instances through an HTMX search endpoint instead of rendering every row as an ``<option>``.
+    Only the selected instances are loaded to render their labels; ``url`` is the name of an endpoint built on
+    ``common.htmx.views.AutocompleteHTMXView``.
+    """
+    template_name = 'widgets/autocomplete.html'
+    allow_multiple_selected = False
+
+    class Media:
+        js = ('js/autocomplete.js', )
+
+    def __init__(self, url: str, url_params: dict = None, attrs: dict = None):
+        super().__init__(attrs)
+        self.url = url
+        self.url_params = url_params or {}
+        self.choices = ()
+
+    def format_value(self, value) -> list:
+        if value is None or value == '':
+            return []
+        if not isinstance(value, (list, tuple)):
+            value = [value]
+        return [str(v) for v in value if v is not None and v != '']
+
+    def get_selected(self, values: list) -> list:
+        queryset = getattr(self.choices, 'queryset', None)
+        if queryset is None or not values:
+            return []
+        try:
+            return [(str(obj.pk), str(obj)) for obj in queryset.filter(pk__in=values)]
+        except (ValueError, TypeError):
+            return []
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        url = reverse(self.url)
+        context['widget'].update(
+            url=f'{url}?{urlencode(self.url_params)}' if self.url_params else url,
+            multiple=self.allow_multiple_selected,
+            selected=self.get_selected(context['widget']['value']),
+        )
+        return context
+
+    def value_from_datadict(self, data, files, name):
+        if self.allow_multiple_selected:
+            return data.getlist(name) if hasattr(data, 'getlist') else data.get(name)
+        return data.get(name)
+
+    def value_omitted_from_data(self, data, files, name):
+        return not self.allow_multiple_selected and name not in data
+
+
+class AutocompleteSelectMultiple(AutocompleteSelect):
+    allow_multiple_selected = True
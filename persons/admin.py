@@ -1,11 +1,26 @@
 from django.contrib import admin
 
+from common.pagination import KeysetPaginationAdminMixin
 from persons.models import Person
 
 
-class PersonAdmin(admin.ModelAdmin):
-    search_fields = ('father', 'mother', 'spouse', )
+class PersonAdmin(KeysetPaginationAdminMixin, admin.ModelAdmin):
+    list_display = ('display_name', 'gender', 'birth_year', 'birth_place', 'death_year', )
+    list_select_related = ('birth_place', )
+    search_fields = ('search_name', )
     autocomplete_fields = ('father', 'mother', 'spouse', )
+    ordering = ('-pk', )
+    # The listed years may be null, which keyset pagination cannot order on.
+    sortable_by = ()
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        # The changelist orders the results by ``ordering`` again, so it only filters; the autocomplete of the
+        # parent and spouse fields keeps the ranking of ``search``.
+        if request.resolver_match and request.resolver_match.url_name == 'autocomplete':
+            return queryset.search(search_term), False
+        return queryset.match(search_term), False
 
 
 admin.site.register(Person, PersonAdmin)
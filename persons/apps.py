@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PersonsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'persons'
+
+    def ready(self):
+        from persons import signals  # noqa: F401
@@ -1,7 +1,22 @@
-from django.db.models import IntegerChoices
+from django.db.models import IntegerChoices, TextChoices
 from django.utils.translation import gettext_lazy as _
 
 
 class GenderChoices(IntegerChoices):
     MALE = 1, _('مرد')
     FEMALE = 2, _('زن')
+
+
+class LineChoices(IntegerChoices):
+    PATERNAL = 1, _('پدری')
+    MATERNAL = 2, _('مادری')
+
+
+class ExportFormatChoices(TextChoices):
+    GEDCOM = 'ged', _('GEDCOM')
+    NDJSON = 'ndjson', _('JSON خط به خط')
+
+
+class ExportDirectionChoices(TextChoices):
+    ANCESTORS = 'ancestors', _('نیاکان')
+    DESCENDANTS = 'descendants', _('نوادگان')
@@ -0,0 +1,163 @@
+import json
+
+from django.db.models import Exists, OuterRef, Prefetch, Q
+
+from persons.enums import ExportDirectionChoices, ExportFormatChoices, GenderChoices
+from persons.gedcom import GEDCOM_SEXES, format_date
+from persons.models import Person
+from places.geography import get_geography
+from places.models import ResidencePlace
+
+EXPORT_CHUNK_SIZE = 2000
+GEDCOM_SEX_TAGS = {gender: tag for tag, gender in GEDCOM_SEXES.items()}
+
+
+def get_export_queryset(person: Person = None, direction: ExportDirectionChoices = None):
+    """Persons to export: the whole tree, or ``person`` together with its ancestors or descendants."""
+    if person is None:
+        return Person.objects.all()
+    if direction == ExportDirectionChoices.ANCESTORS:
+        related = Person.objects.ancestors_of(person)
+    else:
+        related = Person.objects.descendants_of(person)
+    return Person.objects.filter(Q(pk__in=related.values('pk')) | Q(pk=person.pk))
+
+
+def _with_residences(queryset):
+    # Place labels come from the process-local geography, so places are never joined.
+    return queryset.prefetch_related(
+        Prefetch('residence_place', queryset=ResidencePlace.objects.only('place_id', 'from_year', 'to_year')),
+    ).order_by('pk')
+
+
+def _family_xref(father_id, mother_id) -> str:
+    return f'@F{father_id or 0}_{mother_id or 0}@'
+
+
+def iter_ndjson(queryset, chunk_size: int = EXPORT_CHUNK_SIZE):
+    """
+    One JSON object per line. Rows come from a server-side cursor in chunks of ``chunk_size``, and residences are
+    prefetched per chunk, so memory does not grow with the size of the export.
+    """
+    geography = get_geography()
+    queryset = _with_residences(queryset).prefetch_related(Prefetch('spouse', queryset=Person.objects.only('id')))
+    for person in queryset.iterator(chunk_size=chunk_size):
+        yield json.dumps(
+            {
+                'id': person.pk,
+                'first_name': person.first_name,
+                'last_name': person.last_name,
+                'gender': person.gender,
+                'father_id': person.father_id,
+                'mother_id': person.mother_id,
+                'spouse_ids': [spouse.pk for spouse in person.spouse.all()],
+                'birth_year': person.birth_year,
+                'birth_date': person.birth_date and person.birth_date.isoformat(),
+                'birth_place': geography.label(person.birth_place_id),
+                'death_year': person.death_year,
+                'death_date': person.death_date and person.death_date.isoformat(),
+                'residences': [
+                    {
+                        'place': geography.label(residence.place_id),
+                        'from_year': residence.from_year,
+                        'to_year': residence.to_year,
+                    }
+                    for residence in person.residence_place.all()
+                ],
+            },
+            ensure_ascii=False,
+        ) + '\n'
+
+
+def _gedcom_person(person, geography) -> list:
+    lines = [
+        f'0 @I{person.pk}@ INDI',
+        f'1 NAME {person.first_name} /{person.last_name}/',
+        f'2 GIVN {person.first_name}',
+        f'2 SURN {person.last_name}',
+        f'1 SEX {GEDCOM_SEX_TAGS.get(person.gender, "U")}',
+    ]
+    for event, year, date, place in (
+        ('BIRT', person.birth_year, person.birth_date, geography.label(person.birth_place_id)),
+        ('DEAT', person.death_year, person.death_date, None),
+    ):
+        value = format_date(year, date)
+        if value is None and place is None:
+            continue
+        lines.append(f'1 {event}')
+        if value is not None:
+            lines.append(f'2 DATE {value}')
+        if place is not None:
+            lines.append(f'2 PLAC {place}')
+    for residence in person.residence_place.all():
+        lines += [
+            '1 RESI',
+            f'2 DATE FROM {format_date(residence.from_year)} TO {format_date(residence.to_year)}',
+            f'2 PLAC {geography.label(residence.place_id)}',
+        ]
+    if person.father_id is not None or person.mother_id is not None:
+        lines.append(f'1 FAMC {_family_xref(person.father_id, person.mother_id)}')
+    return lines
+
+
+def _gedcom_families(queryset, chunk_size: int):
+    """
+    Family records are rebuilt from the children's parent pairs; ordering the children by pair lets each family be
+    written as soon as its last child is read. Couples without children come from the spouse relation.
+    """
+    exported = queryset.values('pk')
+    children = (
+        queryset.filter(Q(father__isnull=False) | Q(mother__isnull=False))
+        .annotate(
+            father_exported=Exists(exported.filter(pk=OuterRef('father_id'))),
+            mother_exported=Exists(exported.filter(pk=OuterRef('mother_id'))),
+        )
+        .order_by('father_id', 'mother_id', 'pk')
+        .values_list('pk', 'father_id', 'mother_id', 'father_exported', 'mother_exported')
+    )
+    family = None
+    lines = []
+    for child_id, father_id, mother_id, father_exported, mother_exported in children.iterator(chunk_size=chunk_size):
+        if family != (father_id, mother_id):
+            if lines:
+                yield lines
+            family = (father_id, mother_id)
+            lines = [f'0 {_family_xref(father_id, mother_id)} FAM']
+            if father_exported:
+                lines.append(f'1 HUSB @I{father_id}@')
+            if mother_exported:
+                lines.append(f'1 WIFE @I{mother_id}@')
+        lines.append(f'1 CHIL @I{child_id}@')
+    if lines:
+        yield lines
+
+    through = Person.spouse.through
+    couples = (
+        through.objects.filter(
+            from_person__in=exported, to_person__in=exported, from_person__gender=GenderChoices.MALE
+        )
+        .exclude(
+            Exists(Person.objects.filter(father_id=OuterRef('from_person_id'), mother_id=OuterRef('to_person_id')))
+        )
+        .order_by('pk')
+        .values_list('from_person_id', 'to_person_id')
+    )
+    for husband_id, wife_id in couples.iterator(chunk_size=chunk_size):
+        yield [f'0 @S{husband_id}_{wife_id}@ FAM', f'1 HUSB @I{husband_id}@', f'1 WIFE @I{wife_id}@']
+
+
+def iter_gedcom(queryset, chunk_size: int = EXPORT_CHUNK_SIZE):
+    """GEDCOM 5.5.1 stream, written record by record from server-side cursors."""
+    yield '0 HEAD\n1 SOUR SHAJAREHNAAMEH\n1 GEDC\n2 VERS 5.5.1\n2 FORM LINEAGE-LINKED\n1 CHAR UTF-8\n'
+    geography = get_geography()
+    for person in _with_residences(queryset).iterator(chunk_size=chunk_size):
+        yield '\n'.join(_gedcom_person(person, geography)) + '\n'
+    for lines in _gedcom_families(queryset, chunk_size):
+        yield '\n'.join(lines) + '\n'
+    yield '0 TRLR\n'
+
+
+EXPORTERS = {
+    ExportFormatChoices.GEDCOM: (iter_gedcom, 'text/vnd.familysearch.gedcom; charset=utf-8'),
+    ExportFormatChoices.NDJSON: (iter_ndjson, 'application/x-ndjson; charset=utf-8'),
+}
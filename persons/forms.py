@@ -1,13 +1,67 @@
 from django import forms
+from django.utils.translation import gettext_lazy as _
 
+from common.htmx.forms import PlaceholderFormMixin
+from common.widgets import AutocompleteSelect, AutocompleteSelectMultiple
+from persons.enums import ExportDirectionChoices, ExportFormatChoices, GenderChoices
+from persons.exports import get_export_queryset
+from persons.kinship import KINSHIP_PERSON_FIELDS, get_kinship
 from persons.models import Person
+from places.models import ResidencePlace
+
+PERSON_AUTOCOMPLETE_URL = 'persons:persons-hx:person-autocomplete-htmx'
 
 
 class AddPersonForm(forms.ModelForm):
+    father = forms.ModelChoiceField(
+        queryset=Person.objects.filter(gender=GenderChoices.MALE).only('id', 'first_name', 'display_name'),
+        widget=AutocompleteSelect(PERSON_AUTOCOMPLETE_URL, {'gender': GenderChoices.MALE}),
+        required=False, label=_('پدر')
+    )
+    mother = forms.ModelChoiceField(
+        queryset=Person.objects.filter(gender=GenderChoices.FEMALE).only('id', 'display_name'),
+        widget=AutocompleteSelect(PERSON_AUTOCOMPLETE_URL, {'gender': GenderChoices.FEMALE}),
+        required=False, label=_('مادر')
+    )
+
     class Meta:
         model = Person
         fields = [
-            'first_name', 'last_name', 'gender', 'birth_year',
+            'first_name', 'last_name', 'gender', 'father', 'mother', 'birth_year',
             'birth_date', 'birth_place', 'residence_place',
             'death_year', 'death_date'
         ]
+        widgets = {
+            'birth_place': AutocompleteSelect('places:places-hx:place-autocomplete-htmx'),
+            'residence_place': AutocompleteSelectMultiple('places:places-hx:residence-place-autocomplete-htmx'),
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['residence_place'].queryset = ResidencePlace.objects.select_related('place')
+
+
+class KinshipForm(PlaceholderFormMixin, forms.Form):
+    person = forms.ModelChoiceField(
+        queryset=Person.objects.only(*KINSHIP_PERSON_FIELDS), widget=forms.NumberInput, label=_('شناسه شخص')
+    )
+    relative = forms.ModelChoiceField(
+        queryset=Person.objects.only(*KINSHIP_PERSON_FIELDS), widget=forms.NumberInput, label=_('شناسه خویشاوند')
+    )
+
+    def get_kinship(self):
+        return get_kinship(self.cleaned_data['person'], self.cleaned_data['relative'])
+
+
+class ExportPersonsForm(forms.Form):
+    format = forms.ChoiceField(choices=ExportFormatChoices.choices, label=_('قالب'))
+    person = forms.ModelChoiceField(
+        queryset=Person.objects.all(), widget=forms.NumberInput, required=False, label=_('شناسه شخص')
+    )
+    direction = forms.ChoiceField(
+        choices=ExportDirectionChoices.choices, initial=ExportDirectionChoices.DESCENDANTS, required=False,
+        label=_('جهت')
+    )
+
+    def get_queryset(self):
+        return get_export_queryset(self.cleaned_data['person'], self.cleaned_data['direction'])
@@ -0,0 +1,143 @@
+import re
+
+import jdatetime
+
+from persons.enums import GenderChoices
+
+GEDCOM_MONTHS = ('JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC')
+GEDCOM_LINE_RE = re.compile(r'^\s*(\d+)\s+(?:(@[^@]+@)\s+)?(\S+)(?:\s(.*))?$')
+GEDCOM_FULL_DATE_RE = re.compile(r'(\d{1,2})\s+(' + '|'.join(GEDCOM_MONTHS) + r')\s+(\d{3,4})', re.IGNORECASE)
+GEDCOM_YEAR_RE = re.compile(r'\b(\d{3,4})\b')
+GEDCOM_SEXES = {'M': GenderChoices.MALE, 'F': GenderChoices.FEMALE}
+
+# Jalali years start in March, so most of a Gregorian year falls in the Jalali year 621 years before it.
+JALALI_YEAR_OFFSET = 621
+
+
+class GedcomRecord:
+    __slots__ = ('level', 'xref', 'tag', 'value', 'children')
+
+    def __init__(self, level: int, xref: str, tag: str, value: str):
+        self.level = level
+        self.xref = xref
+        self.tag = tag
+        self.value = value
+        self.children = []
+
+    def __repr__(self):
+        return f'<GedcomRecord {self.level} {self.xref or ""} {self.tag}>'
+
+    def first(self, tag: str):
+        for child in self.children:
+            if child.tag == tag:
+                return child
+        return None
+
+    def all(self, tag: str) -> list:
+        return [child for child in self.children if child.tag == tag]
+
+    def value_of(self, path: str, default: str = None):
+        """Return the value of a nested tag such as ``BIRT.DATE``."""
+        record = self
+        for tag in path.split('.'):
+            record = record.first(tag)
+            if record is None:
+                return default
+        return record.value or default
+
+
+def read_records(lines):
+    """
+    Yield the level-0 records of a GEDCOM stream one by one, so that only a single record is kept in memory.
+    ``CONC``/``CONT`` lines are folded into the value of the line they continue.
+    """
+    stack = []
+    for raw_line in lines:
+        match = GEDCOM_LINE_RE.match(raw_line.rstrip('\r\n'))
+        if match is None:
+            continue
+        level, xref, tag, value = int(match.group(1)), match.group(2), match.group(3).upper(), match.group(4) or ''
+        if tag in ('CONC', 'CONT'):
+            while stack and stack[-1].level >= level:
+                stack.pop()
+            if stack:
+                separator = '\n' if tag == 'CONT' else ''
+                stack[-1].value = f'{stack[-1].value}{separator}{value}'
+            continue
+        record = GedcomRecord(level, xref, tag, value)
+        if level == 0:
+            if stack:
+                yield stack[0]
+            stack = [record]
+            continue
+        while stack and stack[-1].level >= level:
+            stack.pop()
+        if stack:
+            stack[-1].children.append(record)
+            stack.append(record)
+    if stack:
+        yield stack[0]
+
+
+def parse_name(record: GedcomRecord) -> tuple:
+    name = record.first('NAME')
+    if name is None:
+        return '', ''
+    given = name.value_of('GIVN')
+    surname = name.value_of('SURN')
+    if given is None or surname is None:
+        parts = (name.value or '').split('/')
+        given = given or parts[0].strip()
+        surname = surname or (parts[1].strip() if len(parts) > 1 else '')
+    return given, surname
+
+
+def parse_date(value: str) -> tuple:
+    """Return the Jalali year and, when the day is known, the Jalali date of a GEDCOM date value."""
+    if not value:
+        return None, None
+    match = GEDCOM_FULL_DATE_RE.search(value)
+    if match is not None:
+        day, month, year = int(match.group(1)), GEDCOM_MONTHS.index(match.group(2).upper()) + 1, int(match.group(3))
+        try:
+            date = jdatetime.date.fromgregorian(day=day, month=month, year=year)
+        except ValueError:
+            return year - JALALI_YEAR_OFFSET, None
+        return date.year, date
+    match = GEDCOM_YEAR_RE.search(value)
+    if match is not None:
+        return int(match.group(1)) - JALALI_YEAR_OFFSET, None
+    return None, None
+
+
+def parse_year_range(value: str) -> tuple:
+    """Return the first and last Jalali year of a GEDCOM date or period such as ``FROM 1950 TO 1970``."""
+    years = [int(year) - JALALI_YEAR_OFFSET for year in GEDCOM_YEAR_RE.findall(value or '')]
+    if not years:
+        return None, None
+    return years[0], years[-1]
+
+
+def parse_place(value: str) -> tuple:
+    """
+    Split a GEDCOM jurisdiction list (``place, city, province, country``) into its four levels. Missing levels reuse
+    the name of the nearest lower level.
+    """
+    parts = [part.strip() for part in (value or '').split(',') if part.strip()]
+    if not parts:
+        return None
+    country = parts[-1]
+    province = parts[-2] if len(parts) > 1 else country
+    city = parts[-3] if len(parts) > 2 else province
+    place = ', '.join(parts[:-3]) if len(parts) > 3 else city
+    return place, city, province, country
+
+
+def format_date(year: int, date: jdatetime.date = None):
+    """Inverse of ``parse_date``: a GEDCOM (Gregorian) date value for a Jalali year or date."""
+    if date is not None:
+        gregorian = date.togregorian()
+        return f'{gregorian.day} {GEDCOM_MONTHS[gregorian.month - 1]} {gregorian.year}'
+    if year is not None:
+        return str(year + JALALI_YEAR_OFFSET)
+    return None
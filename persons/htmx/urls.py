@@ -0,0 +1,15 @@
+from django.urls import path
+
+from persons.htmx.views import (
+    KinshipHTMXView, PersonAutocompleteHTMXView, PersonSearchHTMXView, TreeChildrenHTMXView, TreeParentsHTMXView
+)
+
+app_name = 'persons-hx'
+
+urlpatterns = [
+    path('kinship-htmx/', KinshipHTMXView.as_view(), name='kinship-htmx'),
+    path('person-search-htmx/', PersonSearchHTMXView.as_view(), name='person-search-htmx'),
+    path('person-autocomplete-htmx/', PersonAutocompleteHTMXView.as_view(), name='person-autocomplete-htmx'),
+    path('tree-parents-htmx/<int:pk>/', TreeParentsHTMXView.as_view(), name='tree-parents-htmx'),
+    path('tree-children-htmx/<int:pk>/', TreeChildrenHTMXView.as_view(), name='tree-children-htmx'),
+]
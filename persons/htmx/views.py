@@ -0,0 +1,60 @@
+from django.views.generic import FormView, ListView, TemplateView
+
+from common.htmx.views import AutocompleteHTMXView
+from common.mixins import FragmentCacheMixin
+from persons.enums import GenderChoices
+from persons.forms import KinshipForm
+from persons.models import TREE_VERSION_CACHE_KEY, Person
+from persons.tree import TREE_CACHE_TIMEOUT, get_children, get_parents
+
+PERSON_SEARCH_LIMIT = 10
+
+
+class KinshipHTMXView(FormView):
+    template_name = 'htmx/kinship_htmx.html'
+    form_class = KinshipForm
+
+    def form_valid(self, form):
+        return self.render_to_response(self.get_context_data(form=form, kinship=form.get_kinship()))
+
+
+class PersonSearchHTMXView(ListView):
+    template_name = 'htmx/person_search_htmx.html'
+    context_object_name = 'persons'
+
+    def get_queryset(self):
+        query = self.request.GET.get('q', '')
+        return Person.objects.search(query).only('id', 'first_name', 'last_name')[:PERSON_SEARCH_LIMIT]
+
+
+class PersonAutocompleteHTMXView(AutocompleteHTMXView):
+
+    def get_search_queryset(self, query: str):
+        queryset = Person.objects.search(query).only('id', 'display_name')
+        gender = self.request.GET.get('gender')
+        if gender in {str(value) for value in GenderChoices.values}:
+            queryset = queryset.filter(gender=gender)
+        return queryset
+
+
+class TreeFragmentCacheMixin(FragmentCacheMixin):
+    """
+    Cache the rendered fragment of a person under the current tree version, so that any change to a person
+    invalidates every fragment at once.
+    """
+    fragment_cache_version_keys = (TREE_VERSION_CACHE_KEY, )
+    fragment_cache_timeout = TREE_CACHE_TIMEOUT
+
+
+class TreeParentsHTMXView(TreeFragmentCacheMixin, TemplateView):
+    template_name = 'htmx/tree_nodes_htmx.html'
+
+    def get_context_data(self, **kwargs):
+        return super().get_context_data(nodes=get_parents(self.kwargs['pk']), direction='parents', **kwargs)
+
+
+class TreeChildrenHTMXView(TreeFragmentCacheMixin, TemplateView):
+    template_name = 'htmx/tree_nodes_htmx.html'
+
+    def get_context_data(self, **kwargs):
+        return super().get_context_data(nodes=get_children(self.kwargs['pk']), direction='children', **kwargs)
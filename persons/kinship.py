@@ -0,0 +1,174 @@
+from collections import deque
+from dataclasses import dataclass, field
+
+from django.db.models import Q
+from django.utils.translation import gettext as _
+
+from persons.enums import GenderChoices
+from persons.lineage import get_lineage_backend
+from persons.models import Person
+
+KINSHIP_PERSON_FIELDS = ('id', 'first_name', 'last_name', 'gender', 'father_id', 'mother_id')
+
+
+@dataclass
+class Kinship:
+    person: Person
+    relative: Person
+    label: str
+    up: int = None
+    down: int = None
+    common_ancestors: list = field(default_factory=list)
+    path: list = field(default_factory=list)
+
+    @property
+    def related(self) -> bool:
+        return self.up is not None
+
+    @property
+    def cousin_degree(self) -> int:
+        return min(self.up, self.down) - 1
+
+    @property
+    def removed(self) -> int:
+        return abs(self.up - self.down)
+
+
+def _is_male(person: Person) -> bool:
+    return person.gender == GenderChoices.MALE
+
+
+def _of(word: str, owner: str) -> str:
+    """Join ``word`` to ``owner`` with the Persian ezafe, e.g. ``عمو`` + ``پدر`` -> ``عموی پدر``."""
+    if word.endswith(('و', 'ا')):
+        return f'{word}ی {owner}'
+    if word.endswith('ه'):
+        return f'{word}‌ی {owner}'
+    return f'{word} {owner}'
+
+
+def _ancestor_label(depth: int, ancestor: Person) -> str:
+    if depth == 1:
+        return _('پدر') if _is_male(ancestor) else _('مادر')
+    if depth == 2:
+        return _('پدربزرگ') if _is_male(ancestor) else _('مادربزرگ')
+    return _('نیای نسل %(depth)s') % {'depth': depth}
+
+
+def _descendant_label(depth: int, descendant: Person) -> str:
+    if depth == 1:
+        return _('پسر') if _is_male(descendant) else _('دختر')
+    labels = {2: _('نوه'), 3: _('نتیجه'), 4: _('نبیره')}
+    return labels.get(depth) or _('نواده‌ی نسل %(depth)s') % {'depth': depth}
+
+
+def _sibling_label(sibling: Person, half: bool) -> str:
+    label = _('برادر') if _is_male(sibling) else _('خواهر')
+    return _('%(label)s ناتنی') % {'label': label} if half else label
+
+
+def _uncle_label(parent: Person, sibling: Person) -> str:
+    if _is_male(parent):
+        return _('عمو') if _is_male(sibling) else _('عمه')
+    return _('دایی') if _is_male(sibling) else _('خاله')
+
+
+def _label(up_path: list, down_path: list, half: bool) -> str:
+    """
+    Persian label of the last person of ``down_path`` relative to the first person of ``up_path``. Both paths start
+    at their person and end at the common ancestor.
+    """
+    up, down = len(up_path) - 1, len(down_path) - 1
+    relative = down_path[0]
+    if up == 0:
+        return _('خود شخص') if down == 0 else _descendant_label(down, relative)
+    if down == 0:
+        return _ancestor_label(up, relative)
+    if up == 1:
+        sibling = down_path[-2]
+        if down == 1:
+            return _sibling_label(sibling, half)
+        if down == 2:
+            return _('برادرزاده') if _is_male(sibling) else _('خواهرزاده')
+        return _of(_descendant_label(down - 1, relative), _sibling_label(sibling, half))
+    if up > 2:
+        # Describe the relative from the point of view of the ancestor two generations below the common one.
+        owner = up_path[up - 2]
+        return _of(_label(up_path[up - 2:], down_path, half), _ancestor_label(up - 2, owner))
+    parent = up_path[1]
+    if down == 1:
+        return _uncle_label(parent, relative)
+    if down == 2:
+        child = _('پسر') if _is_male(relative) else _('دختر')
+        return f'{child}{_uncle_label(parent, down_path[1])}'
+    return _of(_('پسر') if _is_male(relative) else _('دختر'), _label(up_path, down_path[1:], half))
+
+
+def _is_half(up_path: list, down_path: list) -> bool:
+    """
+    Whether the two children of the common ancestor on the paths share only one parent. An unrecorded parent proves
+    nothing, so both children need both parents recorded.
+    """
+    if len(up_path) < 2 or len(down_path) < 2:
+        return False
+    first, second = up_path[-2], down_path[-2]
+    parents = ((first.father_id, first.mother_id), (second.father_id, second.mother_id))
+    return None not in parents[0] + parents[1] and parents[0] != parents[1]
+
+
+def _shortest_path_up(start: Person, target_id: int, persons: dict) -> list:
+    previous = {start.pk: None}
+    queue = deque([start.pk])
+    while queue:
+        current_id = queue.popleft()
+        if current_id == target_id:
+            break
+        current = persons[current_id]
+        for parent_id in (current.father_id, current.mother_id):
+            if parent_id in persons and parent_id not in previous:
+                previous[parent_id] = current_id
+                queue.append(parent_id)
+    path = []
+    current_id = target_id
+    while current_id is not None:
+        path.append(persons[current_id])
+        current_id = previous[current_id]
+    return path[::-1]
+
+
+def get_kinship(person: Person, relative: Person) -> Kinship:
+    """
+    Find how ``relative`` is related to ``person`` through their nearest common ancestors.
+    The nearest common ancestors come from the lineage backend in one query, and the persons on the connecting path
+    are loaded with one more query, whatever the size of the tree.
+    """
+    backend = get_lineage_backend()
+    queryset = Person.objects.only(*KINSHIP_PERSON_FIELDS)
+    common = backend.common_ancestors(queryset, person, relative)
+    if not common:
+        return Kinship(person=person, relative=relative, label=_('نسبتی یافت نشد'))
+
+    ancestor_id, up, down = common[0]
+    nearest_ids = [row[0] for row in common if row[1:] == (up, down)]
+    ancestor = Person(pk=ancestor_id)
+    on_path = (
+        Q(pk__in=backend.ancestors_of(queryset, person, up).values('pk'))
+        | Q(pk__in=backend.ancestors_of(queryset, relative, down).values('pk'))
+    )
+    persons = queryset.filter(
+        Q(pk__in=backend.descendants_of(queryset, ancestor, max(up, down)).values('pk')) & on_path
+        | Q(pk__in={person.pk, relative.pk, *nearest_ids})
+    )
+    persons = {p.pk: p for p in persons}
+
+    up_path = _shortest_path_up(persons[person.pk], ancestor_id, persons)
+    down_path = _shortest_path_up(persons[relative.pk], ancestor_id, persons)
+    return Kinship(
+        person=persons[person.pk],
+        relative=persons[relative.pk],
+        label=_label(up_path, down_path, half=_is_half(up_path, down_path)),
+        up=up,
+        down=down,
+        common_ancestors=[persons[pk] for pk in nearest_ids],
+        path=up_path + down_path[-2::-1],
+    )
@@ -0,0 +1,194 @@
+from functools import lru_cache
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from persons.enums import LineChoices
+
+LINEAGE_MAX_DEPTH = 256
+
+
+class BaseLineageBackend:
+    """
+    Strategy used by ``Person.objects.ancestors_of``/``descendants_of``.
+    ``line`` is the side of the family as seen from the descendant, i.e. the parent through which the ancestor is
+    reached.
+    """
+
+    def ancestors_of(self, queryset, person, max_depth: int = None, line: LineChoices = None):
+        raise NotImplementedError('subclasses of BaseLineageBackend must provide an ancestors_of() method')
+
+    def descendants_of(self, queryset, person, max_depth: int = None, line: LineChoices = None):
+        raise NotImplementedError('subclasses of BaseLineageBackend must provide a descendants_of() method')
+
+    def ancestor_depths_sql(self, queryset, person) -> tuple:
+        """Return SQL and params selecting ``id`` and ``depth`` of every ancestor of ``person`` at its nearest depth."""
+        raise NotImplementedError('subclasses of BaseLineageBackend must provide an ancestor_depths_sql() method')
+
+    def descendant_depths_sql(self, queryset, person) -> tuple:
+        """Return SQL and params selecting ``id`` and ``depth`` of every descendant of ``person`` at its nearest one."""
+        raise NotImplementedError('subclasses of BaseLineageBackend must provide a descendant_depths_sql() method')
+
+    def common_ancestors(self, queryset, person, relative, limit: int = 16) -> list:
+        """
+        Return ``(ancestor_id, person_depth, relative_depth)`` of the nearest common ancestors of two persons, where
+        each person counts as its own ancestor at depth zero.
+        """
+        person_sql, person_params = self.ancestor_depths_sql(queryset, person)
+        relative_sql, relative_params = self.ancestor_depths_sql(queryset, relative)
+        sql = (
+            f'SELECT person_line.id, person_line.depth, relative_line.depth '
+            f'FROM ({person_sql} UNION ALL SELECT %s, 0) person_line '
+            f'JOIN ({relative_sql} UNION ALL SELECT %s, 0) relative_line '
+            f'ON person_line.id = relative_line.id '
+            f'ORDER BY person_line.depth + relative_line.depth, person_line.depth, person_line.id '
+            f'LIMIT %s'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [*person_params, person.pk, *relative_params, relative.pk, limit])
+            return cursor.fetchall()
+
+    def parents_changed(self, person, adding: bool):
+        pass
+
+    def rebuild(self):
+        """Called after persons are written in bulk, bypassing ``Person.save``."""
+        pass
+
+
+class ClosureTableBackend(BaseLineageBackend):
+    """Reads from the ``PersonLineage`` closure table, which is maintained on every (re-)parenting."""
+
+    def _lineage(self, max_depth: int = None, line: LineChoices = None):
+        lineage = apps.get_model('persons', 'PersonLineage').objects.all()
+        if max_depth is not None:
+            lineage = lineage.filter(depth__lte=max_depth)
+        if line is not None:
+            lineage = lineage.filter(line=line)
+        return lineage
+
+    def ancestors_of(self, queryset, person, max_depth: int = None, line: LineChoices = None):
+        lineage = self._lineage(max_depth, line).filter(descendant=person)
+        return queryset.filter(pk__in=lineage.values('ancestor_id'))
+
+    def descendants_of(self, queryset, person, max_depth: int = None, line: LineChoices = None):
+        lineage = self._lineage(max_depth, line).filter(ancestor=person)
+        return queryset.filter(pk__in=lineage.values('descendant_id'))
+
+    def ancestor_depths_sql(self, queryset, person) -> tuple:
+        table = connection.ops.quote_name(apps.get_model('persons', 'PersonLineage')._meta.db_table)
+        sql = (
+            f'SELECT ancestor_id AS id, MIN(depth) AS depth FROM {table} '
+            f'WHERE descendant_id = %s GROUP BY ancestor_id'
+        )
+        return sql, [person.pk]
+
+    def descendant_depths_sql(self, queryset, person) -> tuple:
+        table = connection.ops.quote_name(apps.get_model('persons', 'PersonLineage')._meta.db_table)
+        sql = (
+            f'SELECT descendant_id AS id, MIN(depth) AS depth FROM {table} '
+            f'WHERE ancestor_id = %s GROUP BY descendant_id'
+        )
+        return sql, [person.pk]
+
+    def parents_changed(self, person, adding: bool):
+        lineage_manager = apps.get_model('persons', 'PersonLineage').objects
+        if adding:
+            lineage_manager.rebuild_for(person)
+        else:
+            lineage_manager.rebuild_subtree(person)
+
+    def rebuild(self):
+        apps.get_model('persons', 'PersonLineage').objects.rebuild_all()
+
+
+class RecursiveCTEBackend(BaseLineageBackend):
+    """
+    Walks ``father_id``/``mother_id`` with a single ``WITH RECURSIVE`` query, so nothing has to be maintained on
+    writes. Rows are deduplicated per (person, depth, line) and the walk never goes deeper than ``max_depth`` (or
+    ``LINEAGE_MAX_DEPTH``), which also stops it on cyclic data.
+    """
+
+    def _table(self, queryset):
+        return connection.ops.quote_name(queryset.model._meta.db_table)
+
+    def _depth_limit(self, max_depth: int = None) -> int:
+        return LINEAGE_MAX_DEPTH if max_depth is None else max_depth
+
+    def _ancestors_cte(self, queryset, person, max_depth: int = None, line: LineChoices = None) -> tuple:
+        table = self._table(queryset)
+        seeds = []
+        params = []
+        for parent_column, parent_line in (('father_id', LineChoices.PATERNAL), ('mother_id', LineChoices.MATERNAL)):
+            if line is None or line == parent_line:
+                seeds.append(
+                    f'SELECT {parent_column}, 1, {parent_line.value} FROM {table} '
+                    f'WHERE id = %s AND {parent_column} IS NOT NULL AND {parent_column} <> id'
+                )
+                params.append(person.pk)
+        sql = (
+            f'WITH RECURSIVE lineage (id, depth, line) AS ('
+            f'{" UNION ".join(seeds)} '
+            f'UNION '
+            f'SELECT parent.id, lineage.depth + 1, lineage.line FROM lineage '
+            f'JOIN {table} child ON child.id = lineage.id '
+            f'JOIN {table} parent ON parent.id IN (child.father_id, child.mother_id) AND parent.id <> child.id '
+            f'WHERE lineage.depth < %s'
+            f')'
+        )
+        params.append(self._depth_limit(max_depth))
+        return sql, params
+
+    def ancestors_of(self, queryset, person, max_depth: int = None, line: LineChoices = None):
+        if max_depth is not None and max_depth < 1:
+            # The walk starts from the parents, at depth 1.
+            return queryset.none()
+        cte, params = self._ancestors_cte(queryset, person, max_depth, line)
+        sql = f'{cte} SELECT id FROM lineage WHERE id <> %s'
+        return queryset.filter(pk__in=RawSQL(sql, [*params, person.pk]))
+
+    def ancestor_depths_sql(self, queryset, person) -> tuple:
+        cte, params = self._ancestors_cte(queryset, person)
+        return f'{cte} SELECT id, MIN(depth) AS depth FROM lineage WHERE id <> %s GROUP BY id', [*params, person.pk]
+
+    def _descendants_cte(self, queryset, person, max_depth: int = None) -> tuple:
+        table = self._table(queryset)
+        child_line = (
+            f'CASE WHEN child.father_id = {{parent}} THEN {LineChoices.PATERNAL.value} '
+            f'ELSE {LineChoices.MATERNAL.value} END'
+        )
+        sql = (
+            f'WITH RECURSIVE lineage (id, depth, line) AS ('
+            f'SELECT child.id, 1, {child_line.format(parent="%s")} FROM {table} child '
+            f'WHERE (child.father_id = %s OR child.mother_id = %s) AND child.id <> %s '
+            f'UNION '
+            f'SELECT child.id, lineage.depth + 1, {child_line.format(parent="lineage.id")} FROM lineage '
+            f'JOIN {table} child ON (child.father_id = lineage.id OR child.mother_id = lineage.id) '
+            f'AND child.id <> lineage.id '
+            f'WHERE lineage.depth < %s'
+            f')'
+        )
+        return sql, [person.pk, person.pk, person.pk, person.pk, self._depth_limit(max_depth)]
+
+    def descendants_of(self, queryset, person, max_depth: int = None, line: LineChoices = None):
+        if max_depth is not None and max_depth < 1:
+            return queryset.none()
+        cte, params = self._descendants_cte(queryset, person, max_depth)
+        sql = f'{cte} SELECT id FROM lineage WHERE id <> %s'
+        params = [*params, person.pk]
+        if line is not None:
+            sql += ' AND line = %s'
+            params.append(int(line))
+        return queryset.filter(pk__in=RawSQL(sql, params))
+
+    def descendant_depths_sql(self, queryset, person) -> tuple:
+        cte, params = self._descendants_cte(queryset, person)
+        return f'{cte} SELECT id, MIN(depth) AS depth FROM lineage WHERE id <> %s GROUP BY id', [*params, person.pk]
+
+
+@lru_cache(maxsize=None)
+def get_lineage_backend() -> BaseLineageBackend:
+    return import_string(settings.PERSONS_LINEAGE_BACKEND)()
@@ -0,0 +1,92 @@
+import random
+import statistics
+import time
+
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from persons.enums import GenderChoices
+from persons.lineage import ClosureTableBackend, RecursiveCTEBackend
+from persons.models import Person, PersonLineage
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the closure table and recursive CTE lineage backends on synthetic trees. '
+        'Everything is written inside a transaction that is rolled back at the end.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[10_000, 100_000, 1_000_000])
+        parser.add_argument('--generations', type=int, default=6)
+        parser.add_argument('--samples', type=int, default=50)
+        parser.add_argument('--max-depth', type=int, default=None)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        for size in options['sizes']:
+            with transaction.atomic():
+                self.benchmark(size, options)
+                transaction.set_rollback(True)
+
+    def benchmark(self, size, options):
+        rng = random.Random(options['seed'])
+        generations = self.create_tree(size, options['generations'], options['batch_size'], rng)
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{size} persons in {len(generations)} generations'))
+
+        started = time.perf_counter()
+        PersonLineage.objects.rebuild_all()
+        self.stdout.write(
+            f'  closure table build: {time.perf_counter() - started:.2f}s, '
+            f'{PersonLineage.objects.count()} rows'
+        )
+
+        samples = options['samples']
+        leaves = rng.sample(generations[-1], min(samples, len(generations[-1])))
+        roots = rng.sample(generations[0], min(samples, len(generations[0])))
+        queryset = Person.objects.all()
+        for backend in (ClosureTableBackend(), RecursiveCTEBackend()):
+            for method, persons in (('ancestors_of', leaves), ('descendants_of', roots)):
+                timings = []
+                found = 0
+                for person_id in persons:
+                    person = Person(pk=person_id)
+                    started = time.perf_counter()
+                    found += len(
+                        getattr(backend, method)(queryset, person, options['max_depth']).values_list('pk', flat=True)
+                    )
+                    timings.append((time.perf_counter() - started) * 1000)
+                self.stdout.write(
+                    f'  {backend.__class__.__name__}.{method}: '
+                    f'mean {statistics.mean(timings):.2f}ms, '
+                    f'p95 {statistics.quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0]:.2f}ms, '
+                    f'{found / len(persons):.0f} persons per query'
+                )
+
+    def create_tree(self, size, generation_count, batch_size, rng):
+        """Every person after the founders gets a random father and mother from the previous generation."""
+        next_id = (Person.objects.aggregate(Max('id'))['id__max'] or 0) + 1
+        width = max(size // generation_count, 2)
+        generations = []
+        for generation in range(generation_count):
+            previous = generations[-1] if generations else None
+            persons = []
+            for index in range(width):
+                gender = GenderChoices.MALE if index % 2 == 0 else GenderChoices.FEMALE
+                if previous is None:
+                    father_id = mother_id = None
+                else:
+                    father_id = previous[rng.randrange(0, len(previous), 2)]
+                    mother_id = previous[rng.randrange(1, len(previous), 2)]
+                persons.append(
+                    Person(
+                        id=next_id, first_name=f'p{next_id}', last_name=f'g{generation}', gender=gender,
+                        father_id=father_id, mother_id=mother_id, birth_year=1200 + generation * 25
+                    )
+                )
+                next_id += 1
+            Person.objects.bulk_create(persons, batch_size=batch_size)
+            generations.append([person.id for person in persons])
+        return generations
@@ -0,0 +1,38 @@
+import sys
+
+from django.core.management import BaseCommand, CommandError
+
+from persons.enums import ExportDirectionChoices, ExportFormatChoices
+from persons.exports import EXPORT_CHUNK_SIZE, EXPORTERS, get_export_queryset
+from persons.models import Person
+
+
+class Command(BaseCommand):
+    help = 'Export the whole tree, or the ancestors/descendants of a person, as GEDCOM or newline-delimited JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=ExportFormatChoices.values, default=ExportFormatChoices.GEDCOM)
+        parser.add_argument('--person', type=int)
+        parser.add_argument(
+            '--direction', choices=ExportDirectionChoices.values, default=ExportDirectionChoices.DESCENDANTS
+        )
+        parser.add_argument('--output', help='Output file; defaults to stdout.')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        person = None
+        if options['person'] is not None:
+            try:
+                person = Person.objects.get(pk=options['person'])
+            except Person.DoesNotExist:
+                raise CommandError(f'Person {options["person"]} does not exist.')
+
+        exporter, _ = EXPORTERS[options['format']]
+        queryset = get_export_queryset(person, options['direction'])
+        output = open(options['output'], 'w', encoding='utf-8') if options['output'] else sys.stdout
+        try:
+            for chunk in exporter(queryset, options['chunk_size']):
+                output.write(chunk)
+        finally:
+            if output is not sys.stdout:
+                output.close()
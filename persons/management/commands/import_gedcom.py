@@ -0,0 +1,178 @@
+import time
+
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from common.events import get_event_broker
+from common.helpers import bump_cache_version
+
+from persons.enums import GenderChoices
+from persons.gedcom import GEDCOM_SEXES, parse_date, parse_name, parse_place, parse_year_range, read_records
+from persons.lineage import get_lineage_backend
+from persons.models import TREE_EVENT_CHANNEL, TREE_VERSION_CACHE_KEY, Person, TreeSummary
+from places.enums import PlaceTypeChoices
+from places.models import City, Country, Place, Province, ResidencePlace
+
+
+class PlaceResolver:
+    """Map GEDCOM place values to ``Place`` ids, creating the missing ``Country → Province → City → Place`` rows."""
+
+    def __init__(self):
+        self.place_ids = {}
+
+    def resolve(self, value: str):
+        levels = parse_place(value)
+        if levels is None:
+            return None
+        if levels not in self.place_ids:
+            place, city, province, country = (name[:100] for name in levels)
+            country, _ = Country.objects.get_or_create(name=country)
+            province, _ = Province.objects.get_or_create(country=country, name=province)
+            city, _ = City.objects.get_or_create(province=province, name=city)
+            place, _ = Place.objects.get_or_create(city=city, name=place, defaults={'type': PlaceTypeChoices.TOWN})
+            self.place_ids[levels] = place.pk
+        return self.place_ids[levels]
+
+
+class Command(BaseCommand):
+    help = (
+        'Import persons, places and residences from a GEDCOM file. The file is read as a stream; persons are inserted '
+        'in batches first, then parents and spouses are linked through the GEDCOM id to database id map.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--encoding', default='utf-8-sig')
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        self.places = PlaceResolver()
+        self.person_ids = {}
+        self.child_families = {}
+        self.families = {}
+        self.unknown_sex = set()
+        self.pending = []
+        self.started = time.perf_counter()
+
+        with open(options['path'], encoding=options['encoding']) as stream:
+            for record in read_records(stream):
+                if record.tag == 'INDI':
+                    self.add_person(record)
+                elif record.tag == 'FAM':
+                    self.add_family(record)
+        self.flush()
+
+        self.link_parents()
+        self.link_spouses()
+        self.stdout.write('Rebuilding lineage...')
+        get_lineage_backend().rebuild()
+        TreeSummary.objects.mark_all_stale()
+        bump_cache_version(TREE_VERSION_CACHE_KEY)
+        get_event_broker().publish(TREE_EVENT_CHANNEL, None)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{len(self.person_ids)} persons and {len(self.families)} families imported '
+                f'in {time.perf_counter() - self.started:.1f}s.'
+            )
+        )
+
+    def add_person(self, record):
+        first_name, last_name = parse_name(record)
+        sex = (record.value_of('SEX') or '').upper()[:1]
+        if sex not in GEDCOM_SEXES:
+            self.unknown_sex.add(record.xref)
+        birth_year, birth_date = parse_date(record.value_of('BIRT.DATE'))
+        death_year, death_date = parse_date(record.value_of('DEAT.DATE'))
+        birth_place = record.first('BIRT')
+        person = Person(
+            first_name=first_name[:150],
+            last_name=last_name[:150],
+            gender=GEDCOM_SEXES.get(sex, GenderChoices.MALE),
+            birth_year=birth_year,
+            birth_date=birth_date,
+            birth_place_id=self.places.resolve(birth_place.value_of('PLAC')) if birth_place else None,
+            death_year=death_year,
+            death_date=death_date,
+        )
+        person.refresh_search_name()
+        person.refresh_display_name()
+        residences = []
+        for residence in record.all('RESI'):
+            place_id = self.places.resolve(residence.value_of('PLAC'))
+            from_year, to_year = parse_year_range(residence.value_of('DATE'))
+            if place_id is not None and from_year is not None:
+                residences.append(ResidencePlace(place_id=place_id, from_year=from_year, to_year=to_year))
+        family = record.value_of('FAMC')
+        if family is not None:
+            self.child_families[record.xref] = family
+
+        self.pending.append((record.xref, person, residences))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def add_family(self, record):
+        self.families[record.xref] = (record.value_of('HUSB'), record.value_of('WIFE'))
+        for child in record.all('CHIL'):
+            self.child_families.setdefault(child.value, record.xref)
+
+    def flush(self):
+        if not self.pending:
+            return
+        with transaction.atomic():
+            Person.objects.bulk_create([person for _, person, _ in self.pending], batch_size=self.batch_size)
+            residences = []
+            for xref, person, person_residences in self.pending:
+                self.person_ids[xref] = person.pk
+                residences += [(person.pk, residence) for residence in person_residences]
+            ResidencePlace.objects.bulk_create([residence for _, residence in residences], batch_size=self.batch_size)
+            Person.residence_place.through.objects.bulk_create(
+                [
+                    Person.residence_place.through(person_id=person_id, residenceplace_id=residence.pk)
+                    for person_id, residence in residences
+                ],
+                batch_size=self.batch_size
+            )
+        self.pending = []
+        self.report('persons imported', len(self.person_ids))
+
+    def link_parents(self):
+        wives = {wife for _, wife in self.families.values() if wife is not None}
+        persons = []
+        for xref, person_id in self.person_ids.items():
+            father, mother = self.families.get(self.child_families.get(xref), (None, None))
+            if father in self.person_ids or mother in self.person_ids:
+                persons.append(
+                    Person(id=person_id, father_id=self.person_ids.get(father), mother_id=self.person_ids.get(mother))
+                )
+        self.bulk_update(persons, ['father', 'mother'], 'parents linked')
+        children_ids = [person.pk for person in persons if person.father_id is not None]
+        for start in range(0, len(children_ids), self.batch_size):
+            Person.objects.filter(pk__in=children_ids[start:start + self.batch_size]).refresh_display_names()
+        self.report('display names refreshed', len(children_ids))
+
+        women = [Person(id=self.person_ids[xref], gender=GenderChoices.FEMALE) for xref in self.unknown_sex & wives]
+        self.bulk_update(women, ['gender'], 'genders inferred')
+
+    def link_spouses(self):
+        through = Person.spouse.through
+        rows = []
+        for husband, wife in self.families.values():
+            husband_id, wife_id = self.person_ids.get(husband), self.person_ids.get(wife)
+            if husband_id is not None and wife_id is not None:
+                rows.append(through(from_person_id=husband_id, to_person_id=wife_id))
+                rows.append(through(from_person_id=wife_id, to_person_id=husband_id))
+        for start in range(0, len(rows), self.batch_size):
+            with transaction.atomic():
+                through.objects.bulk_create(rows[start:start + self.batch_size], ignore_conflicts=True)
+        self.report('spouse links created', len(rows))
+
+    def bulk_update(self, persons, fields, label):
+        for start in range(0, len(persons), self.batch_size):
+            with transaction.atomic():
+                Person.objects.bulk_update(persons[start:start + self.batch_size], fields)
+            self.report(label, min(start + self.batch_size, len(persons)))
+
+    def report(self, label, count):
+        elapsed = time.perf_counter() - self.started
+        self.stdout.write(f'{count} {label} ({elapsed:.1f}s, {count / max(elapsed, 0.001):.0f}/s)')
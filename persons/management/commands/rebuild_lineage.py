@@ -0,0 +1,13 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from persons.models import PersonLineage
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the ancestor/descendant closure table of all persons.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            PersonLineage.objects.rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f'{PersonLineage.objects.count()} lineage rows rebuilt.'))
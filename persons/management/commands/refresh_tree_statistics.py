@@ -0,0 +1,28 @@
+import time
+
+from django.core.management import BaseCommand
+
+from persons.models import TreeSummary
+from persons.statistics import refresh_stale_tree_summaries
+
+
+class Command(BaseCommand):
+    help = 'Refresh the stale family tree summaries in batches. Keeps polling unless --once.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--poll', type=float, default=5, help='Seconds to wait when no summary is stale.')
+        parser.add_argument('--once', action='store_true', help='Refresh the stale summaries and exit.')
+        parser.add_argument('--all', action='store_true', help='Mark every summary stale first.')
+
+    def handle(self, *args, **options):
+        if options['all']:
+            TreeSummary.objects.mark_all_stale()
+        while True:
+            refreshed = refresh_stale_tree_summaries(options['batch_size'])
+            if refreshed:
+                self.stdout.write(f'{refreshed} tree summaries refreshed')
+                continue
+            if options['once']:
+                return
+            time.sleep(options['poll'])
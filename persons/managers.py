@@ -0,0 +1,170 @@
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connection, models
+from django.db.models import Case, Exists, F, Max, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Concat
+
+from common.helpers import normalize_persian
+from persons.enums import LineChoices
+from persons.lineage import LINEAGE_MAX_DEPTH, get_lineage_backend
+
+PERSON_SEARCH_TRIGRAM_MIN_LENGTH = 3
+# Above this many changed persons, every tree summary is marked stale rather than looking up their ancestors.
+TREE_SUMMARY_MARK_MAX_PERSONS = 50
+
+
+class PersonQuerySet(models.QuerySet):
+
+    def ancestors_of(self, person, max_depth: int = None, line: LineChoices = None):
+        return get_lineage_backend().ancestors_of(self, person, max_depth, line)
+
+    def descendants_of(self, person, max_depth: int = None, line: LineChoices = None):
+        return get_lineage_backend().descendants_of(self, person, max_depth, line)
+
+    def for_tree(self):
+        """Only what a family tree node shows, with a flag telling whether the node can be expanded downwards."""
+        children = self.model.objects.filter(Q(father_id=OuterRef('pk')) | Q(mother_id=OuterRef('pk')))
+        return (
+            self.only('id', 'first_name', 'last_name', 'gender', 'father_id', 'mother_id', 'birth_year', 'death_year')
+            .annotate(has_children=Exists(children))
+            .order_by('birth_year', 'pk')
+        )
+
+    def refresh_display_names(self) -> int:
+        """Set-based counterpart of ``Person.refresh_display_name``, e.g. for the children of a renamed father."""
+        full_name = Concat('first_name', Value(' '), 'last_name')
+        father_name = self.model.objects.filter(pk=OuterRef('father_id')).values('first_name')[:1]
+        return self.update(
+            display_name=Case(
+                When(father_id__isnull=True, then=full_name),
+                default=Concat(full_name, Value(' - '), Subquery(father_name)),
+            )
+        )
+
+    def match(self, query: str):
+        """Persons matched by ``search``, left unranked for callers that order them on their own."""
+        query = normalize_persian(query)
+        if not query:
+            return self.none()
+        if len(query) < PERSON_SEARCH_TRIGRAM_MIN_LENGTH:
+            return self.filter(search_name__startswith=query)
+        return self.filter(search_name__trigram_word_similar=query)
+
+    def search(self, query: str):
+        """
+        Match persons by first and last name, ranked by trigram word similarity. Queries too short for trigrams fall
+        back to a prefix match. Both are served by indexes on the normalized ``search_name``.
+        """
+        matched = self.match(query)
+        query = normalize_persian(query)
+        if len(query) < PERSON_SEARCH_TRIGRAM_MIN_LENGTH:
+            return matched.order_by('search_name', 'pk')
+        return (
+            matched.annotate(similarity=TrigramWordSimilarity(query, 'search_name'))
+            .order_by('-similarity', 'search_name', 'pk')
+        )
+
+
+class PersonManager(models.Manager.from_queryset(PersonQuerySet)):
+    pass
+
+
+class PersonLineageManager(models.Manager):
+
+    def rebuild_for(self, person):
+        """
+        Recompute the ancestor rows of ``person`` from the rows of its parents.
+        The parents' own rows must already be up to date.
+        """
+        self.filter(descendant=person).delete()
+        parent_lines = {
+            parent_id: line
+            for parent_id, line in ((person.father_id, LineChoices.PATERNAL), (person.mother_id, LineChoices.MATERNAL))
+            if parent_id is not None and parent_id != person.pk
+        }
+        rows = [
+            self.model(ancestor_id=parent_id, descendant=person, depth=1, line=line)
+            for parent_id, line in parent_lines.items()
+        ]
+        parent_rows = (
+            self.filter(descendant_id__in=parent_lines)
+            .exclude(ancestor_id=person.pk)
+            .values_list('ancestor_id', 'descendant_id', 'depth')
+            .distinct()
+        )
+        for ancestor_id, parent_id, depth in parent_rows:
+            rows.append(
+                self.model(ancestor_id=ancestor_id, descendant=person, depth=depth + 1, line=parent_lines[parent_id])
+            )
+        self.bulk_create(rows, ignore_conflicts=True)
+
+    def rebuild_subtree(self, person):
+        """
+        Recompute the rows of ``person`` and of all of its descendants, e.g. after ``person`` is re-parented.
+        Descendants are visited by their longest distance from ``person`` so that both parents of a descendant are
+        always rebuilt before it.
+        """
+        descendant_ids = list(
+            self.filter(ancestor=person)
+            .values('descendant_id')
+            .annotate(distance=Max('depth'))
+            .order_by('distance')
+            .values_list('descendant_id', flat=True)
+        )
+        self.rebuild_for(person)
+        person_model = self.model._meta.get_field('descendant').related_model
+        descendants = person_model.objects.only('father_id', 'mother_id').in_bulk(descendant_ids)
+        for descendant_id in descendant_ids:
+            self.rebuild_for(descendants[descendant_id])
+
+    def rebuild_all(self):
+        """Rebuild the whole closure table generation by generation with set-based queries."""
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        person_table = connection.ops.quote_name(self.model._meta.get_field('descendant').related_model._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {table}')
+            for parent_column, line in (('father_id', LineChoices.PATERNAL), ('mother_id', LineChoices.MATERNAL)):
+                cursor.execute(
+                    f'INSERT INTO {table} (ancestor_id, descendant_id, depth, line) '
+                    f'SELECT {parent_column}, id, 1, %s FROM {person_table} '
+                    f'WHERE {parent_column} IS NOT NULL AND {parent_column} <> id',
+                    [line.value]
+                )
+            depth = 1
+            while depth < LINEAGE_MAX_DEPTH:
+                cursor.execute(
+                    f'INSERT INTO {table} (ancestor_id, descendant_id, depth, line) '
+                    f'SELECT DISTINCT ancestor.ancestor_id, parent.descendant_id, %s, parent.line '
+                    f'FROM {table} parent JOIN {table} ancestor ON ancestor.descendant_id = parent.ancestor_id '
+                    f'WHERE parent.depth = 1 AND ancestor.depth = %s '
+                    f'AND ancestor.ancestor_id <> parent.descendant_id '
+                    f'ON CONFLICT DO NOTHING',
+                    [depth + 1, depth]
+                )
+                if cursor.rowcount == 0:
+                    break
+                depth += 1
+
+
+class TreeSummaryQuerySet(models.QuerySet):
+
+    def stale(self):
+        return self.filter(refreshed_version__lt=F('version'))
+
+
+class TreeSummaryManager(models.Manager.from_queryset(TreeSummaryQuerySet)):
+
+    def mark_stale(self, person_ids) -> int:
+        """Mark the summaries of the trees holding any of ``person_ids``: rooted at them or at their ancestors."""
+        person_ids = set(person_ids) - {None}
+        if not person_ids:
+            return 0
+        if len(person_ids) > TREE_SUMMARY_MARK_MAX_PERSONS:
+            return self.mark_all_stale()
+        person_model = self.model._meta.get_field('root').related_model
+        roots = Q(root_id__in=person_ids)
+        for person_id in person_ids:
+            roots |= Q(root_id__in=person_model.objects.ancestors_of(person_model(pk=person_id)).values('pk'))
+        return self.filter(roots).update(version=F('version') + 1)
+
+    def mark_all_stale(self) -> int:
+        return self.update(version=F('version') + 1)
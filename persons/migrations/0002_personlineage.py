@@ -0,0 +1,36 @@
+# Generated by Django 4.1.13 on 2026-10-18 06:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('persons', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PersonLineage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveSmallIntegerField(verbose_name='فاصله نسلی')),
+                ('line', models.SmallIntegerField(choices=[(1, 'پدری'), (2, 'مادری')], verbose_name='تبار')),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='persons.person', verbose_name='نیا')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='persons.person', verbose_name='نواده')),
+            ],
+            options={
+                'verbose_name': 'نسب',
+                'verbose_name_plural': 'نسب\u200cها',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='personlineage',
+            index=models.Index(fields=['ancestor', 'depth', 'line'], name='persons_lineage_ancestor_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='personlineage',
+            constraint=models.UniqueConstraint(fields=('descendant', 'depth', 'line', 'ancestor'), name='persons_lineage_unique_path'),
+        ),
+    ]
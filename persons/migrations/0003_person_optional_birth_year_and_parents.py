@@ -0,0 +1,29 @@
+# Generated by Django 4.1.13 on 2026-10-18 06:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('persons', '0002_personlineage'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='person',
+            name='birth_year',
+            field=models.SmallIntegerField(null=True, verbose_name='سال تولد'),
+        ),
+        migrations.AlterField(
+            model_name='person',
+            name='father',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='father_children', to='persons.person', verbose_name='پدر'),
+        ),
+        migrations.AlterField(
+            model_name='person',
+            name='mother',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='mother_children', to='persons.person', verbose_name='مادر'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.1.13 on 2026-10-18 06:33
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+from common.helpers import normalize_persian
+
+
+def fill_search_names(apps, schema_editor):
+    Person = apps.get_model('persons', 'Person')
+    persons = []
+    for person in Person.objects.only('first_name', 'last_name').iterator(chunk_size=2000):
+        person.search_name = normalize_persian(f'{person.first_name} {person.last_name}')
+        persons.append(person)
+        if len(persons) >= 2000:
+            Person.objects.bulk_update(persons, ['search_name'])
+            persons = []
+    Person.objects.bulk_update(persons, ['search_name'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('persons', '0003_person_optional_birth_year_and_parents'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='person',
+            name='search_name',
+            field=models.CharField(default='', editable=False, max_length=301, verbose_name='نام برای جستجو'),
+        ),
+        migrations.RunPython(fill_search_names, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='person',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_name'], name='persons_search_name_trgm', opclasses=('gin_trgm_ops',)),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=models.Index(fields=['search_name'], name='persons_search_name_prefix', opclasses=('varchar_pattern_ops',)),
+        ),
+    ]
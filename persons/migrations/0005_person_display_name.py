@@ -0,0 +1,33 @@
+# Generated by Django 4.1.13 on 2026-10-18 06:36
+
+from django.db import migrations, models
+from django.db.models import Case, OuterRef, Subquery, Value, When
+from django.db.models.functions import Concat
+
+
+def fill_display_names(apps, schema_editor):
+    Person = apps.get_model('persons', 'Person')
+    full_name = Concat('first_name', Value(' '), 'last_name')
+    father_name = Person.objects.filter(pk=OuterRef('father_id')).values('first_name')[:1]
+    Person.objects.update(
+        display_name=Case(
+            When(father_id__isnull=True, then=full_name),
+            default=Concat(full_name, Value(' - '), Subquery(father_name)),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('persons', '0004_person_search_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='person',
+            name='display_name',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=455, verbose_name='نام نمایشی'),
+        ),
+        migrations.RunPython(fill_display_names, migrations.RunPython.noop),
+    ]
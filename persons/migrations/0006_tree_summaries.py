@@ -0,0 +1,91 @@
+# Generated by Django 4.1.13 on 2026-10-18 07:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django_jalali.db.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0003_place_path'),
+        ('persons', '0005_person_display_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TreeSummary',
+            fields=[
+                ('root', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='tree_summary', serialize=False, to='persons.person', verbose_name='ریشه')),
+                ('persons', models.PositiveIntegerField(default=0, verbose_name='تعداد اشخاص')),
+                ('males', models.PositiveIntegerField(default=0, verbose_name='تعداد مردان')),
+                ('females', models.PositiveIntegerField(default=0, verbose_name='تعداد زنان')),
+                ('generations', models.PositiveSmallIntegerField(default=0, verbose_name='تعداد نسل\u200cها')),
+                ('version', models.PositiveIntegerField(default=1, verbose_name='نسخه')),
+                ('refreshed_version', models.PositiveIntegerField(default=0, verbose_name='نسخه به\u200cروز شده')),
+                ('refreshed_at', django_jalali.db.models.jDateTimeField(blank=True, null=True, verbose_name='زمان به\u200cروزرسانی')),
+            ],
+            options={
+                'verbose_name': 'خلاصه شجره\u200cنامه',
+                'verbose_name_plural': 'خلاصه\u200cهای شجره\u200cنامه',
+            },
+        ),
+        migrations.CreateModel(
+            name='TreeMigrationSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('persons', models.PositiveIntegerField(verbose_name='تعداد اشخاص')),
+                ('birth_place', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='places.place', verbose_name='محل تولد')),
+                ('residence_place', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='places.place', verbose_name='محل سکونت')),
+                ('tree', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='migration_rows', to='persons.treesummary', verbose_name='شجره\u200cنامه')),
+            ],
+            options={
+                'verbose_name': 'آمار مهاجرت',
+                'verbose_name_plural': 'آمار مهاجرت\u200cها',
+            },
+        ),
+        migrations.CreateModel(
+            name='TreeGenerationSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('generation', models.PositiveSmallIntegerField(verbose_name='نسل')),
+                ('persons', models.PositiveIntegerField(verbose_name='تعداد اشخاص')),
+                ('males', models.PositiveIntegerField(verbose_name='تعداد مردان')),
+                ('females', models.PositiveIntegerField(verbose_name='تعداد زنان')),
+                ('tree', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='generation_rows', to='persons.treesummary', verbose_name='شجره\u200cنامه')),
+            ],
+            options={
+                'verbose_name': 'آمار نسل',
+                'verbose_name_plural': 'آمار نسل\u200cها',
+                'ordering': ('generation',),
+            },
+        ),
+        migrations.CreateModel(
+            name='TreeBirthDecadeSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('decade', models.SmallIntegerField(verbose_name='دهه تولد')),
+                ('persons', models.PositiveIntegerField(verbose_name='تعداد اشخاص')),
+                ('lifespans', models.PositiveIntegerField(verbose_name='تعداد طول عمرهای معلوم')),
+                ('lifespan_total', models.PositiveIntegerField(verbose_name='مجموع طول عمرها')),
+                ('tree', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='birth_decade_rows', to='persons.treesummary', verbose_name='شجره\u200cنامه')),
+            ],
+            options={
+                'verbose_name': 'آمار دهه تولد',
+                'verbose_name_plural': 'آمار دهه\u200cهای تولد',
+                'ordering': ('decade',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='treemigrationsummary',
+            constraint=models.UniqueConstraint(fields=('tree', 'birth_place', 'residence_place'), name='persons_tree_migration_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='treegenerationsummary',
+            constraint=models.UniqueConstraint(fields=('tree', 'generation'), name='persons_tree_generation_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='treebirthdecadesummary',
+            constraint=models.UniqueConstraint(fields=('tree', 'decade'), name='persons_tree_birth_decade_unique'),
+        ),
+    ]
@@ -1,9 +1,20 @@
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 
-from .enums import GenderChoices
+from common.events import publish_on_commit
+from common.helpers import bump_cache_version, normalize_persian
+from .enums import GenderChoices, LineChoices
+from .lineage import get_lineage_backend
+from .managers import PersonManager, PersonLineageManager, TreeSummaryManager
 from django_jalali.db import models as j_models
 
+TREE_VERSION_CACHE_KEY = 'persons:tree-version'
+# Events carry the ids of the persons changed, or ``None`` when any tree may have changed.
+TREE_EVENT_CHANNEL = 'tree'
+
 
 class Person(models.Model):
     first_name = models.CharField(max_length=150, verbose_name=_('اسم'))
@@ -12,18 +23,18 @@ class Person(models.Model):
     father = models.ForeignKey(
         'self', on_delete=models.PROTECT,
         related_name='father_children',
-        verbose_name=_('پدر')
+        verbose_name=_('پدر'), null=True, blank=True
     )
     mother = models.ForeignKey(
         'self', on_delete=models.PROTECT,
         related_name='mother_children',
-        verbose_name=_('مادر')
+        verbose_name=_('مادر'), null=True, blank=True
     )
     spouse = models.ManyToManyField(
         'self',
         verbose_name=_('همسر'), blank=True
     )
-    birth_year = models.SmallIntegerField(verbose_name=_('سال تولد'))
+    birth_year = models.SmallIntegerField(verbose_name=_('سال تولد'), null=True)
     birth_date = j_models.jDateField(verbose_name=_('تاریخ تولد'), null=True, blank=True)
     birth_place = models.ForeignKey(
         'places.Place', on_delete=models.PROTECT, verbose_name=_('محل تولد'), null=True, blank=True
@@ -33,10 +44,227 @@ class Person(models.Model):
     )
     death_year = models.SmallIntegerField(verbose_name=_('سال وفات'), null=True, blank=True)
     death_date = j_models.jDateField(verbose_name=_('تاریخ وفات'), null=True, blank=True)
+    search_name = models.CharField(max_length=301, verbose_name=_('نام برای جستجو'), editable=False, default='')
+    display_name = models.CharField(
+        max_length=455, verbose_name=_('نام نمایشی'), editable=False, default='', db_index=True
+    )
+
+    objects = PersonManager()
 
     class Meta:
         verbose_name = _('شخص')
         verbose_name_plural = _('اشخاص')
+        indexes = [
+            GinIndex(fields=('search_name',), opclasses=('gin_trgm_ops',), name='persons_search_name_trgm'),
+            models.Index(fields=('search_name',), opclasses=('varchar_pattern_ops',), name='persons_search_name_prefix'),
+        ]
+
+    def __str__(self):
+        return self.display_name or f'{self.first_name} {self.last_name}'
+
+    def get_absolute_url(self):
+        return reverse('persons:family-tree', args=(self.pk,))
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_parent_ids = instance.parent_ids
+        if 'first_name' in instance.__dict__:
+            instance._loaded_first_name = instance.first_name
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using, fields)
+        # Also reached when a deferred first name is read.
+        if fields is None or 'first_name' in fields:
+            self._loaded_first_name = self.first_name
+
+    @property
+    def parent_ids(self) -> tuple:
+        return self.__dict__.get('father_id'), self.__dict__.get('mother_id')
+
+    def clean(self):
+        super().clean()
+        if self.pk is None:
+            return
+        parent_ids = [parent_id for parent_id in self.parent_ids if parent_id is not None]
+        if self.pk in parent_ids or Person.objects.descendants_of(self).filter(pk__in=parent_ids).exists():
+            raise ValidationError(_('نمی‌توان این شخص یا یکی از نوادگان او را به عنوان پدر یا مادرش انتخاب کرد.'))
+
+    def refresh_search_name(self):
+        self.search_name = normalize_persian(f'{self.first_name} {self.last_name}')
+
+    def refresh_display_name(self):
+        """The name with the father's first name, as shown in selects and listings without joining the father."""
+        name = f'{self.first_name} {self.last_name}'
+        if self.father_id is not None:
+            name = f'{name} - {self.father.first_name}'
+        self.display_name = name
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        # A first name deferred when loaded and not set since is unchanged; one set on a deferred field may not be.
+        renamed = not adding and 'first_name' in self.__dict__ and (
+            getattr(self, '_loaded_first_name', None) != self.first_name
+        )
+        self.refresh_search_name()
+        self.refresh_display_name()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'first_name', 'last_name', 'father'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'search_name', 'display_name'}
+        parents_changed = adding or getattr(self, '_loaded_parent_ids', None) != self.parent_ids
+        # The old parents lose a child, so trees showing them change too.
+        changed_ids = {*self.parent_ids, *getattr(self, '_loaded_parent_ids', ())} - {None}
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if parents_changed:
+                get_lineage_backend().parents_changed(self, adding)
+            if renamed:
+                Person.objects.filter(father=self).refresh_display_names()
+            TreeSummary.objects.mark_stale({self.pk} | changed_ids)
+            transaction.on_commit(lambda: bump_cache_version(TREE_VERSION_CACHE_KEY))
+            publish_on_commit(TREE_EVENT_CHANNEL, sorted({self.pk} | changed_ids))
+        self._loaded_parent_ids = self.parent_ids
+        self._loaded_first_name = self.first_name
+
+    def delete(self, *args, **kwargs):
+        changed_ids = sorted({self.pk, *self.parent_ids} - {None})
+        with transaction.atomic():
+            # Before the delete, while the lineage still leads to the trees holding this person.
+            TreeSummary.objects.mark_stale(changed_ids)
+            result = super().delete(*args, **kwargs)
+        transaction.on_commit(lambda: bump_cache_version(TREE_VERSION_CACHE_KEY))
+        publish_on_commit(TREE_EVENT_CHANNEL, changed_ids)
+        return result
+
+
+class PersonLineage(models.Model):
+    ancestor = models.ForeignKey(
+        'persons.Person', on_delete=models.CASCADE,
+        related_name='descendant_links',
+        verbose_name=_('نیا')
+    )
+    descendant = models.ForeignKey(
+        'persons.Person', on_delete=models.CASCADE,
+        related_name='ancestor_links',
+        verbose_name=_('نواده')
+    )
+    depth = models.PositiveSmallIntegerField(verbose_name=_('فاصله نسلی'))
+    line = models.SmallIntegerField(verbose_name=_('تبار'), choices=LineChoices.choices)
+
+    objects = PersonLineageManager()
+
+    class Meta:
+        verbose_name = _('نسب')
+        verbose_name_plural = _('نسب‌ها')
+        constraints = [
+            models.UniqueConstraint(
+                fields=('descendant', 'depth', 'line', 'ancestor'), name='persons_lineage_unique_path'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=('ancestor', 'depth', 'line'), name='persons_lineage_ancestor_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.ancestor_id} -> {self.descendant_id} ({self.depth})'
+
+
+class TreeSummary(models.Model):
+    """
+    Precomputed statistics of the family tree of ``root``, i.e. ``root`` and its descendants, read by the tree
+    statistics dashboard. Changes to persons of the tree bump ``version``; the summary is stale until it is refreshed
+    (see ``persons.statistics``) at that version.
+    """
+    root = models.OneToOneField(
+        'persons.Person', on_delete=models.CASCADE, primary_key=True, related_name='tree_summary',
+        verbose_name=_('ریشه')
+    )
+    persons = models.PositiveIntegerField(default=0, verbose_name=_('تعداد اشخاص'))
+    males = models.PositiveIntegerField(default=0, verbose_name=_('تعداد مردان'))
+    females = models.PositiveIntegerField(default=0, verbose_name=_('تعداد زنان'))
+    generations = models.PositiveSmallIntegerField(default=0, verbose_name=_('تعداد نسل‌ها'))
+    version = models.PositiveIntegerField(default=1, verbose_name=_('نسخه'))
+    refreshed_version = models.PositiveIntegerField(default=0, verbose_name=_('نسخه به‌روز شده'))
+    refreshed_at = j_models.jDateTimeField(null=True, blank=True, verbose_name=_('زمان به‌روزرسانی'))
+
+    objects = TreeSummaryManager()
+
+    class Meta:
+        verbose_name = _('خلاصه شجره‌نامه')
+        verbose_name_plural = _('خلاصه‌های شجره‌نامه')
 
     def __str__(self):
-        return f'{self.first_name} {self.last_name} - {self.father.first_name}'
+        return str(self.root_id)
+
+    @property
+    def stale(self) -> bool:
+        return self.refreshed_version < self.version
+
+
+class TreeGenerationSummary(models.Model):
+    tree = models.ForeignKey(
+        'persons.TreeSummary', on_delete=models.CASCADE, related_name='generation_rows', verbose_name=_('شجره‌نامه')
+    )
+    generation = models.PositiveSmallIntegerField(verbose_name=_('نسل'))
+    persons = models.PositiveIntegerField(verbose_name=_('تعداد اشخاص'))
+    males = models.PositiveIntegerField(verbose_name=_('تعداد مردان'))
+    females = models.PositiveIntegerField(verbose_name=_('تعداد زنان'))
+
+    class Meta:
+        verbose_name = _('آمار نسل')
+        verbose_name_plural = _('آمار نسل‌ها')
+        ordering = ('generation', )
+        constraints = [
+            models.UniqueConstraint(fields=('tree', 'generation'), name='persons_tree_generation_unique'),
+        ]
+
+    @property
+    def male_percent(self):
+        return round(100 * self.males / self.persons) if self.persons else None
+
+
+class TreeBirthDecadeSummary(models.Model):
+    tree = models.ForeignKey(
+        'persons.TreeSummary', on_delete=models.CASCADE, related_name='birth_decade_rows', verbose_name=_('شجره‌نامه')
+    )
+    decade = models.SmallIntegerField(verbose_name=_('دهه تولد'))
+    persons = models.PositiveIntegerField(verbose_name=_('تعداد اشخاص'))
+    # Persons with both a birth and a death year, and the sum of their lifespans.
+    lifespans = models.PositiveIntegerField(verbose_name=_('تعداد طول عمرهای معلوم'))
+    lifespan_total = models.PositiveIntegerField(verbose_name=_('مجموع طول عمرها'))
+
+    class Meta:
+        verbose_name = _('آمار دهه تولد')
+        verbose_name_plural = _('آمار دهه‌های تولد')
+        ordering = ('decade', )
+        constraints = [
+            models.UniqueConstraint(fields=('tree', 'decade'), name='persons_tree_birth_decade_unique'),
+        ]
+
+    @property
+    def average_lifespan(self):
+        return round(self.lifespan_total / self.lifespans, 1) if self.lifespans else None
+
+
+class TreeMigrationSummary(models.Model):
+    """Persons of the tree born in ``birth_place`` who lived in ``residence_place``."""
+    tree = models.ForeignKey(
+        'persons.TreeSummary', on_delete=models.CASCADE, related_name='migration_rows', verbose_name=_('شجره‌نامه')
+    )
+    birth_place = models.ForeignKey(
+        'places.Place', on_delete=models.CASCADE, related_name='+', verbose_name=_('محل تولد')
+    )
+    residence_place = models.ForeignKey(
+        'places.Place', on_delete=models.CASCADE, related_name='+', verbose_name=_('محل سکونت')
+    )
+    persons = models.PositiveIntegerField(verbose_name=_('تعداد اشخاص'))
+
+    class Meta:
+        verbose_name = _('آمار مهاجرت')
+        verbose_name_plural = _('آمار مهاجرت‌ها')
+        constraints = [
+            models.UniqueConstraint(
+                fields=('tree', 'birth_place', 'residence_place'), name='persons_tree_migration_unique'
+            ),
+        ]
@@ -0,0 +1,19 @@
+from django.db.models.signals import m2m_changed, post_save
+from django.dispatch import receiver
+
+from persons.models import Person, TreeSummary
+from places.models import ResidencePlace
+
+
+@receiver(m2m_changed, sender=Person.residence_place.through)
+def mark_residence_trees_stale(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        TreeSummary.objects.mark_stale(instance.person_set.values_list('pk', flat=True))
+    elif action == 'pre_clear' or action in ('post_add', 'post_remove'):
+        TreeSummary.objects.mark_stale(pk_set if reverse else {instance.pk})
+
+
+@receiver(post_save, sender=ResidencePlace)
+def mark_residence_place_trees_stale(sender, instance, created, **kwargs):
+    if not created:
+        TreeSummary.objects.mark_stale(instance.person_set.values_list('pk', flat=True))
@@ -0,0 +1,145 @@
+"""
+Statistics of family trees, precomputed into the ``TreeSummary`` tables so that the dashboard reads a few summary
+rows instead of scanning the persons of the tree on every page view.
+
+A tree is a root person with its descendants, each at the generation of its nearest path from the root. Each part
+of a summary is one set-based query over the members of the tree, joined to ``Person`` once. Changes to persons
+only mark the summaries of the trees holding them as stale (``TreeSummary.objects.mark_stale``); a stale summary is
+recomputed when the dashboard next reads it, or beforehand by the ``refresh_tree_statistics`` command.
+"""
+from django.db import connection, transaction
+from django.utils import timezone
+
+from persons.enums import GenderChoices
+from persons.lineage import get_lineage_backend
+from persons.models import (
+    Person, TreeBirthDecadeSummary, TreeGenerationSummary, TreeMigrationSummary, TreeSummary
+)
+
+TREE_MIGRATION_LIMIT = 20
+
+
+def _quote_table(model) -> str:
+    return connection.ops.quote_name(model._meta.db_table)
+
+
+def members_sql(root: Person) -> tuple:
+    """SQL and params selecting ``id`` and ``depth`` (the generation) of every member of the tree of ``root``."""
+    sql, params = get_lineage_backend().descendant_depths_sql(Person.objects.all(), root)
+    return f'{sql} UNION ALL SELECT %s, 0', [*params, root.pk]
+
+
+def _fetch(sql: str, params: list) -> list:
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def compute_generations(root: Person) -> list:
+    """``(generation, persons, males, females)`` rows."""
+    members, params = members_sql(root)
+    return _fetch(
+        f'SELECT members.depth, COUNT(*), '
+        f'SUM(CASE WHEN person.gender = %s THEN 1 ELSE 0 END), '
+        f'SUM(CASE WHEN person.gender = %s THEN 1 ELSE 0 END) '
+        f'FROM ({members}) members JOIN {_quote_table(Person)} person ON person.id = members.id '
+        f'GROUP BY members.depth',
+        [GenderChoices.MALE.value, GenderChoices.FEMALE.value, *params]
+    )
+
+
+def compute_birth_decades(root: Person) -> list:
+    """``(decade, persons, lifespans, lifespan_total)`` rows of the members with a birth year."""
+    members, params = members_sql(root)
+    known_lifespan = 'person.death_year >= person.birth_year'
+    return _fetch(
+        f'SELECT person.birth_year / 10 * 10 AS decade, COUNT(*), '
+        f'SUM(CASE WHEN {known_lifespan} THEN 1 ELSE 0 END), '
+        f'SUM(CASE WHEN {known_lifespan} THEN person.death_year - person.birth_year ELSE 0 END) '
+        f'FROM ({members}) members JOIN {_quote_table(Person)} person ON person.id = members.id '
+        f'WHERE person.birth_year IS NOT NULL '
+        f'GROUP BY person.birth_year / 10 * 10',
+        params
+    )
+
+
+def compute_migrations(root: Person) -> list:
+    """``(birth_place_id, residence_place_id, persons)`` rows of members who lived away from where they were born."""
+    members, params = members_sql(root)
+    residence_field = Person._meta.get_field('residence_place')
+    residence_model = residence_field.remote_field.model
+    return _fetch(
+        f'SELECT person.birth_place_id, residence.place_id, COUNT(DISTINCT person.id) '
+        f'FROM ({members}) members JOIN {_quote_table(Person)} person ON person.id = members.id '
+        f'JOIN {connection.ops.quote_name(residence_field.m2m_db_table())} link '
+        f'ON link.{residence_field.m2m_column_name()} = person.id '
+        f'JOIN {_quote_table(residence_model)} residence ON residence.id = link.{residence_field.m2m_reverse_name()} '
+        f'WHERE person.birth_place_id IS NOT NULL AND residence.place_id <> person.birth_place_id '
+        f'GROUP BY person.birth_place_id, residence.place_id',
+        params
+    )
+
+
+def refresh_tree_summary(root: Person) -> TreeSummary:
+    """
+    Recompute the summary of the tree of ``root``. The queries run outside of any lock; only the rows are replaced
+    under the summary's row lock, and only by a computation at least as recent as the one stored.
+    """
+    summary, _ = TreeSummary.objects.get_or_create(root_id=root.pk)
+    version = summary.version
+    generations = compute_generations(root)
+    birth_decades = compute_birth_decades(root)
+    migrations = compute_migrations(root)
+
+    with transaction.atomic():
+        summary = TreeSummary.objects.select_for_update().get(pk=summary.pk)
+        if summary.refreshed_version >= version:
+            return summary
+        summary.generation_rows.all().delete()
+        summary.birth_decade_rows.all().delete()
+        summary.migration_rows.all().delete()
+        TreeGenerationSummary.objects.bulk_create([
+            TreeGenerationSummary(tree=summary, generation=generation, persons=persons, males=males, females=females)
+            for generation, persons, males, females in generations
+        ])
+        TreeBirthDecadeSummary.objects.bulk_create([
+            TreeBirthDecadeSummary(
+                tree=summary, decade=decade, persons=persons, lifespans=lifespans, lifespan_total=lifespan_total
+            )
+            for decade, persons, lifespans, lifespan_total in birth_decades
+        ])
+        TreeMigrationSummary.objects.bulk_create([
+            TreeMigrationSummary(
+                tree=summary, birth_place_id=birth_place_id, residence_place_id=residence_place_id, persons=persons
+            )
+            for birth_place_id, residence_place_id, persons in migrations
+        ])
+        summary.persons = sum(row[1] for row in generations)
+        summary.males = sum(row[2] for row in generations)
+        summary.females = sum(row[3] for row in generations)
+        summary.generations = len(generations)
+        summary.refreshed_version = version
+        summary.refreshed_at = timezone.now()
+        summary.save(update_fields=[
+            'persons', 'males', 'females', 'generations', 'refreshed_version', 'refreshed_at'
+        ])
+    return summary
+
+
+def get_tree_summary(root: Person) -> TreeSummary:
+    """The summary of the tree of ``root``, computed first if it is missing or stale."""
+    summary = TreeSummary.objects.filter(root=root).first()
+    if summary is None or summary.stale:
+        summary = refresh_tree_summary(root)
+    return summary
+
+
+def refresh_stale_tree_summaries(limit: int = None) -> int:
+    """Refresh up to ``limit`` stale summaries; returns how many were refreshed."""
+    root_ids = TreeSummary.objects.stale().order_by('pk').values_list('root_id', flat=True)
+    if limit is not None:
+        root_ids = root_ids[:limit]
+    roots = Person.objects.only('id').in_bulk(list(root_ids))
+    for root in roots.values():
+        refresh_tree_summary(root)
+    return len(roots)
@@ -1,3 +1,589 @@
+import io
+import itertools
+import json
+import os
+import tempfile
+from unittest import mock, skipUnless
+
+import jdatetime
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from persons.enums import GenderChoices, LineChoices
+from persons.exports import iter_gedcom, iter_ndjson
+from persons.forms import AddPersonForm
+from persons.gedcom import format_date, parse_date, parse_name, parse_place, parse_year_range, read_records
+from persons.kinship import get_kinship
+from persons.lineage import ClosureTableBackend, RecursiveCTEBackend
+from persons.managers import TREE_SUMMARY_MARK_MAX_PERSONS, PersonQuerySet
+from persons.models import Person, PersonLineage, TreeSummary
+from persons.statistics import get_tree_summary, refresh_tree_summary
+from places.models import City, Country, Place, Province, ResidencePlace
+
+MALE, FEMALE = GenderChoices.MALE, GenderChoices.FEMALE
+PATERNAL, MATERNAL = LineChoices.PATERNAL, LineChoices.MATERNAL
+
+
+def make_person(name: str, gender: int = MALE, father: Person = None, mother: Person = None, **kwargs) -> Person:
+    return Person.objects.create(
+        first_name=name, last_name='test', gender=gender, father=father, mother=mother, **kwargs
+    )
+
+
+class ClosureTableTests(TestCase):
+    """The ``PersonLineage`` rows kept by ``Person.save``, checked against the recursive CTE backend."""
+
+    def setUp(self):
+        self.grandfather = make_person('grandfather')
+        self.grandmother = make_person('grandmother', FEMALE)
+        self.father = make_person('father', father=self.grandfather, mother=self.grandmother)
+        self.mother = make_person('mother', FEMALE)
+        self.child = make_person('child', father=self.father, mother=self.mother)
+
+    def lineage(self, person: Person) -> set:
+        return set(PersonLineage.objects.filter(descendant=person).values_list('ancestor_id', 'depth', 'line'))
+
+    def assertBackendsAgree(self):
+        queryset = Person.objects.all()
+        for person in Person.objects.all():
+            for line, max_depth in itertools.product((None, PATERNAL, MATERNAL), (None, 0, 1, 2)):
+                for method in ('ancestors_of', 'descendants_of'):
+                    closure = getattr(ClosureTableBackend(), method)(queryset, person, max_depth, line)
+                    recursive = getattr(RecursiveCTEBackend(), method)(queryset, person, max_depth, line)
+                    self.assertQuerysetEqual(
+                        closure, recursive, ordered=False, msg=f'{method} of {person}, {line=}, {max_depth=}'
+                    )
+
+    def test_rows_of_new_person(self):
+        self.assertEqual(self.lineage(self.child), {
+            (self.father.pk, 1, PATERNAL),
+            (self.mother.pk, 1, MATERNAL),
+            (self.grandfather.pk, 2, PATERNAL),
+            (self.grandmother.pk, 2, PATERNAL),
+        })
+        self.assertBackendsAgree()
+
+    def test_reparenting_rebuilds_descendants(self):
+        other = make_person('other')
+        self.father.father = other
+        self.father.save()
+        self.assertEqual(self.lineage(self.child), {
+            (self.father.pk, 1, PATERNAL),
+            (self.mother.pk, 1, MATERNAL),
+            (other.pk, 2, PATERNAL),
+            (self.grandmother.pk, 2, PATERNAL),
+        })
+        self.assertBackendsAgree()
+
+    def test_removing_parent(self):
+        self.child.mother = None
+        self.child.save()
+        self.assertNotIn(self.mother.pk, {ancestor_id for ancestor_id, _, _ in self.lineage(self.child)})
+        self.assertBackendsAgree()
+
+    def test_ancestor_reached_on_both_lines(self):
+        # Cousins marrying: the great-grandfather is an ancestor of the child through both parents.
+        great_grandfather = make_person('great-grandfather')
+        uncle = make_person('uncle', father=great_grandfather)
+        aunt = make_person('aunt', FEMALE, father=great_grandfather)
+        husband = make_person('husband', father=uncle)
+        wife = make_person('wife', FEMALE, father=aunt)
+        child = make_person('child', father=husband, mother=wife)
+        self.assertEqual(
+            {row for row in self.lineage(child) if row[0] == great_grandfather.pk},
+            {(great_grandfather.pk, 3, PATERNAL), (great_grandfather.pk, 3, MATERNAL)},
+        )
+        self.assertBackendsAgree()
+
+    def test_rebuild_all_matches_incremental_rows(self):
+        incremental = set(PersonLineage.objects.values_list('ancestor_id', 'descendant_id', 'depth', 'line'))
+        PersonLineage.objects.rebuild_all()
+        self.assertEqual(
+            set(PersonLineage.objects.values_list('ancestor_id', 'descendant_id', 'depth', 'line')), incremental
+        )
+
+
+class KinshipTests(TestCase):
+
+    def setUp(self):
+        self.grandfather = make_person('grandfather')
+        self.grandmother = make_person('grandmother', FEMALE)
+        self.father = make_person('father', father=self.grandfather, mother=self.grandmother)
+        self.aunt = make_person('aunt', FEMALE, father=self.grandfather, mother=self.grandmother)
+        self.mother = make_person('mother', FEMALE)
+        self.person = make_person('person', father=self.father, mother=self.mother)
+        self.sister = make_person('sister', FEMALE, father=self.father, mother=self.mother)
+        self.cousin = make_person('cousin', father=make_person('husband'), mother=self.aunt)
+
+    def assertLabel(self, person: Person, relative: Person, label: str):
+        self.assertEqual(get_kinship(person, relative).label, label)
+
+    def test_direct_line(self):
+        self.assertLabel(self.person, self.person, 'خود شخص')
+        self.assertLabel(self.person, self.father, 'پدر')
+        self.assertLabel(self.person, self.grandmother, 'مادربزرگ')
+        self.assertLabel(self.grandfather, self.person, 'نوه')
+
+    def test_collateral_line(self):
+        self.assertLabel(self.person, self.sister, 'خواهر')
+        self.assertLabel(self.person, self.aunt, 'عمه')
+        self.assertLabel(self.cousin, self.father, 'دایی')
+        self.assertLabel(self.aunt, self.person, 'برادرزاده')
+        self.assertLabel(self.person, self.cousin, 'پسرعمه')
+
+    def test_kinship_path(self):
+        kinship = get_kinship(self.person, self.cousin)
+        self.assertEqual((kinship.up, kinship.down, kinship.cousin_degree, kinship.removed), (2, 2, 1, 0))
+        self.assertEqual(
+            [person.pk for person in kinship.path],
+            [self.person.pk, self.father.pk, kinship.path[2].pk, self.aunt.pk, self.cousin.pk],
+        )
+        self.assertIn(kinship.path[2].pk, {self.grandfather.pk, self.grandmother.pk})
+        self.assertEqual({person.pk for person in kinship.common_ancestors}, {self.grandfather.pk, self.grandmother.pk})
+
+    def test_half_siblings(self):
+        brother = make_person('brother', father=self.father, mother=make_person('second wife', FEMALE))
+        self.assertLabel(self.person, brother, 'برادر ناتنی')
+        nephew = make_person('nephew', father=brother)
+        self.assertLabel(self.person, make_person('grandnephew', father=nephew), 'نوه‌ی برادر ناتنی')
+
+    def test_unrecorded_parent_is_not_half(self):
+        brother = make_person('brother', father=self.father)
+        self.assertLabel(self.person, brother, 'برادر')
+        self.assertLabel(brother, self.sister, 'خواهر')
+        nephew = make_person('nephew', father=brother)
+        self.assertLabel(self.person, make_person('grandnephew', father=nephew), 'نوه‌ی برادر')
+
+    def test_unrelated(self):
+        kinship = get_kinship(self.person, make_person('stranger'))
+        self.assertFalse(kinship.related)
+        self.assertEqual(kinship.label, 'نسبتی یافت نشد')
+
+
+SAMPLE_GEDCOM = """0 HEAD
+1 CHAR UTF-8
+0 @I1@ INDI
+1 NAME Hasan /Ahmadi/
+1 SEX M
+1 BIRT
+2 DATE 12 MAR 1900
+2 PLAC Tajrish, Tehran, Tehran, Iran
+1 DEAT
+2 DATE 1970
+1 FAMS @F1@
+0 @I2@ INDI
+1 NAME Maryam /Karimi/
+1 SEX U
+1 BIRT
+2 DATE ABT 1905
+1 RESI
+2 DATE FROM 1930 TO 1950
+2 PLAC Isfahan, Iran
+1 NOTE first line
+2 CONT second
+2 CONC  line
+0 @I3@ INDI
+1 NAME Ali /Ahmadi/
+1 SEX M
+1 FAMC @F1@
+0 @I4@ INDI
+1 NAME
+2 GIVN Zahra
+2 SURN Ahmadi
+1 SEX F
+0 @F1@ FAM
+1 HUSB @I1@
+1 WIFE @I2@
+1 CHIL @I3@
+1 CHIL @I4@
+0 TRLR
+"""
+
+
+class GedcomParserTests(TestCase):
+
+    def records(self) -> dict:
+        return {record.xref or record.tag: record for record in read_records(io.StringIO(SAMPLE_GEDCOM))}
+
+    def test_read_records(self):
+        records = self.records()
+        self.assertEqual(list(records), ['HEAD', '@I1@', '@I2@', '@I3@', '@I4@', '@F1@', 'TRLR'])
+        self.assertEqual(records['@I1@'].value_of('BIRT.PLAC'), 'Tajrish, Tehran, Tehran, Iran')
+        self.assertEqual(records['@I2@'].value_of('NOTE'), 'first line\nsecond line')
+        self.assertEqual([child.value for child in records['@F1@'].all('CHIL')], ['@I3@', '@I4@'])
+        self.assertIsNone(records['@I3@'].value_of('BIRT.DATE'))
+
+    def test_parse_name(self):
+        records = self.records()
+        self.assertEqual(parse_name(records['@I1@']), ('Hasan', 'Ahmadi'))
+        self.assertEqual(parse_name(records['@I4@']), ('Zahra', 'Ahmadi'))
+        self.assertEqual(parse_name(records['TRLR']), ('', ''))
+
+    def test_parse_date(self):
+        self.assertEqual(parse_date('12 MAR 1900'), (1278, jdatetime.date(1278, 12, 21)))
+        self.assertEqual(parse_date('ABT 1905'), (1284, None))
+        self.assertEqual(parse_date('unknown'), (None, None))
+        self.assertEqual(parse_date(''), (None, None))
+        self.assertEqual(parse_year_range('FROM 1930 TO 1950'), (1309, 1329))
+        self.assertEqual(parse_year_range('1930'), (1309, 1309))
+
+    def test_format_date_inverts_parse_date(self):
+        year, date = parse_date('12 MAR 1900')
+        self.assertEqual(format_date(year, date), '12 MAR 1900')
+        self.assertEqual(format_date(1284), '1905')
+        self.assertIsNone(format_date(None))
+
+    def test_parse_place(self):
+        self.assertEqual(parse_place('Tajrish, Tehran, Tehran, Iran'), ('Tajrish', 'Tehran', 'Tehran', 'Iran'))
+        self.assertEqual(parse_place('Isfahan, Iran'), ('Isfahan', 'Isfahan', 'Isfahan', 'Iran'))
+        self.assertIsNone(parse_place(' , '))
+
+
+class ImportGedcomTests(TestCase):
+
+    def test_import(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.ged', encoding='utf-8', delete=False) as gedcom_file:
+            gedcom_file.write(SAMPLE_GEDCOM)
+        self.addCleanup(os.remove, gedcom_file.name)
+        call_command('import_gedcom', gedcom_file.name, batch_size=2, stdout=io.StringIO())
+
+        persons = {person.first_name: person for person in Person.objects.all()}
+        self.assertEqual(set(persons), {'Hasan', 'Maryam', 'Ali', 'Zahra'})
+        hasan, maryam = persons['Hasan'], persons['Maryam']
+        self.assertEqual((hasan.birth_year, hasan.death_year, hasan.birth_place.name), (1278, 1349, 'Tajrish'))
+        # The sex of a wife recorded as unknown is inferred.
+        self.assertEqual(maryam.gender, FEMALE)
+        self.assertEqual(
+            list(maryam.residence_place.values_list('place__name', 'from_year', 'to_year')), [('Isfahan', 1309, 1329)]
+        )
+        for child in (persons['Ali'], persons['Zahra']):
+            self.assertEqual((child.father_id, child.mother_id), (hasan.pk, maryam.pk))
+        self.assertEqual(persons['Zahra'].display_name, 'Zahra Ahmadi - Hasan')
+        self.assertQuerysetEqual(hasan.spouse.all(), [maryam])
+        self.assertQuerysetEqual(Person.objects.ancestors_of(persons['Ali']), [hasan, maryam], ordered=False)
+
+
+class TreeSummaryTests(TestCase):
+
+    def setUp(self):
+        province = Province.objects.create(country=Country.objects.create(name='country'), name='province')
+        city = City.objects.create(province=province, name='city')
+        self.home, self.away = (Place.objects.create(city=city, name=name, type=1) for name in ('home', 'away'))
+        self.root = make_person('root', birth_year=1300, death_year=1370, birth_place=self.home)
+        self.wife = make_person('wife', FEMALE, birth_year=1305)
+        self.son = make_person('son', father=self.root, mother=self.wife, birth_year=1330, death_year=1400)
+        self.daughter = make_person('daughter', FEMALE, father=self.root, mother=self.wife, birth_year=1335)
+        self.grandson = make_person('grandson', father=self.son, birth_year=1360, birth_place=self.home)
+        self.stranger = make_person('stranger')
+
+    def summaries(self, *persons: Person) -> list:
+        return [get_tree_summary(person) for person in persons]
+
+    def stale_roots(self) -> set:
+        return set(TreeSummary.objects.stale().values_list('root_id', flat=True))
+
+    def test_summary_rows(self):
+        summary = get_tree_summary(self.root)
+        self.assertEqual((summary.persons, summary.males, summary.females, summary.generations), (4, 3, 1, 3))
+        self.assertEqual(
+            [(row.generation, row.persons, row.males, row.females) for row in summary.generation_rows.all()],
+            [(0, 1, 1, 0), (1, 2, 1, 1), (2, 1, 1, 0)],
+        )
+        self.assertEqual(
+            [(row.decade, row.persons, row.average_lifespan) for row in summary.birth_decade_rows.all()],
+            [(1300, 1, 70), (1330, 2, 70), (1360, 1, None)],
+        )
+        self.assertFalse(summary.migration_rows.exists())
+
+    def test_new_descendant_marks_the_trees_holding_it(self):
+        self.summaries(self.root, self.son, self.daughter, self.stranger)
+        self.assertEqual(self.stale_roots(), set())
+        make_person('great-grandson', father=self.grandson)
+        self.assertEqual(self.stale_roots(), {self.root.pk, self.son.pk})
+        self.assertEqual(get_tree_summary(self.root).persons, 5)
+        self.assertEqual(self.stale_roots(), {self.son.pk})
+
+    def test_reparenting_marks_old_and_new_trees(self):
+        self.summaries(self.son, self.daughter)
+        self.grandson.father = None
+        self.grandson.mother = self.daughter
+        self.grandson.save()
+        self.assertEqual(self.stale_roots(), {self.son.pk, self.daughter.pk})
+        self.assertEqual([summary.persons for summary in self.summaries(self.son, self.daughter)], [1, 2])
+
+    def test_delete_marks_the_trees_holding_it(self):
+        self.summaries(self.root, self.son, self.stranger)
+        self.grandson.delete()
+        self.assertEqual(self.stale_roots(), {self.root.pk, self.son.pk})
+        self.assertEqual(get_tree_summary(self.root).persons, 3)
+
+    def test_residence_changes_mark_the_trees(self):
+        self.summaries(self.root, self.stranger)
+        residence = ResidencePlace.objects.create(place=self.away, from_year=1380, to_year=1390)
+        self.grandson.residence_place.add(residence)
+        self.assertEqual(self.stale_roots(), {self.root.pk})
+        summary = get_tree_summary(self.root)
+        self.assertEqual(
+            list(summary.migration_rows.values_list('birth_place_id', 'residence_place_id', 'persons')),
+            [(self.home.pk, self.away.pk, 1)],
+        )
+        residence.place = self.home
+        residence.save()
+        self.assertEqual(self.stale_roots(), {self.root.pk})
+        self.assertFalse(get_tree_summary(self.root).migration_rows.exists())
+        residence.person_set.clear()
+        self.assertEqual(self.stale_roots(), {self.root.pk})
+
+    def test_refresh_keeps_a_more_recent_summary(self):
+        summary = get_tree_summary(self.root)
+        refreshed_at = summary.refreshed_at
+        # A refresh computed at a version already stored does not write again.
+        self.assertEqual(refresh_tree_summary(self.root).refreshed_at, refreshed_at)
+
+    def test_many_changes_mark_every_summary(self):
+        self.summaries(self.root, self.stranger)
+        TreeSummary.objects.mark_stale(range(1, TREE_SUMMARY_MARK_MAX_PERSONS + 2))
+        self.assertEqual(self.stale_roots(), {self.root.pk, self.stranger.pk})
+
+    def test_refresh_command(self):
+        self.summaries(self.root, self.son)
+        call_command('refresh_tree_statistics', '--once', '--all', stdout=io.StringIO())
+        self.assertEqual(self.stale_roots(), set())
+        self.assertEqual(TreeSummary.objects.get(root=self.root).persons, 4)
+
+
+class TreeFragmentTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.father = make_person('father')
+        self.child = make_person('child', father=self.father)
+        self.url = reverse('persons:persons-hx:tree-children-htmx', args=[self.father.pk])
+        # The ETag covers the CSRF cookie, which the first response sets.
+        self.client.get(self.url)
+
+    def test_fragments_are_cached_per_person(self):
+        etag = self.client.get(self.url)['ETag']
+        # The query string is not part of the key, but the view and the person are.
+        self.assertEqual(self.client.get(self.url, {'junk': 1}, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        other = self.client.get(reverse('persons:persons-hx:tree-parents-htmx', args=[self.child.pk]))
+        self.assertNotEqual(other['ETag'], etag)
+
+    def test_person_change_invalidates_the_fragments(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            make_person('second child', father=self.father)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'second child')
+
+
+class DisplayNameTests(TestCase):
+
+    def setUp(self):
+        self.father = make_person('father')
+        self.children = [make_person(f'child {index}', father=self.father) for index in range(2)]
+
+    def display_names(self) -> list:
+        return [Person.objects.get(pk=child.pk).display_name for child in self.children]
+
+    def test_display_name(self):
+        self.assertEqual(self.father.display_name, 'father test')
+        self.assertEqual(self.display_names(), ['child 0 test - father', 'child 1 test - father'])
+
+    def test_renaming_the_father_refreshes_his_children(self):
+        self.father.first_name = 'renamed'
+        self.father.save()
+        self.assertEqual(self.display_names(), ['child 0 test - renamed', 'child 1 test - renamed'])
+        # Also when the first name was deferred and set afterwards.
+        father = Person.objects.only('id').get(pk=self.father.pk)
+        father.first_name = 'deferred'
+        father.save()
+        self.assertEqual(self.display_names(), ['child 0 test - deferred', 'child 1 test - deferred'])
+
+    def test_other_saves_leave_the_children_alone(self):
+        with mock.patch.object(PersonQuerySet, 'refresh_display_names') as refresh_display_names:
+            self.father.last_name = 'other'
+            self.father.save()
+            for fields in (('id', 'last_name'), ('id', 'first_name', 'last_name')):
+                father = Person.objects.only(*fields).get(pk=self.father.pk)
+                father.birth_year = 1300
+                father.save()
+        refresh_display_names.assert_not_called()
+
+    def test_add_person_form_does_not_load_the_persons(self):
+        for index in range(10):
+            make_person(f'person {index}', FEMALE if index % 2 else MALE)
+        with self.assertNumQueries(0):
+            str(AddPersonForm())
+
+
+class PersonAutocompleteTests(TestCase):
+    url = reverse('persons:persons-hx:person-autocomplete-htmx')
+
+    @classmethod
+    def setUpTestData(cls):
+        for index in range(12):
+            make_person(f'ab{index:02}')
+        for index in range(3):
+            make_person(f'ab{index:02} sister', FEMALE)
+        make_person('other')
+
+    def options(self, response) -> list:
+        return [label for _, label in response.context['options']]
+
+    def test_pages_of_one_query_each(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {'q': 'ab', 'gender': MALE})
+        self.assertEqual(self.options(response), [f'ab{index:02} test' for index in range(10)])
+        # One row over the page only tells that there is a next page, which keeps the other parameters.
+        next_url = response.context['next_url']
+        self.assertIn('page=2', next_url)
+        self.assertContains(response, 'hx-get="{}"'.format(next_url.replace('&', '&amp;')))
+        response = self.client.get(next_url)
+        self.assertEqual(self.options(response), ['ab10 test', 'ab11 test'])
+        self.assertIsNone(response.context['next_url'])
+
+    def test_gender_filter(self):
+        response = self.client.get(self.url, {'q': 'ab', 'gender': FEMALE})
+        self.assertEqual(self.options(response), [f'ab{index:02} sister test' for index in range(3)])
+        # An unknown gender is ignored rather than matching nobody.
+        response = self.client.get(self.url, {'q': 'ab', 'gender': 'x', 'page': 2})
+        self.assertEqual(len(self.options(response)), 5)
+
+    def test_empty_query(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, {'q': ' '})
+        self.assertEqual(response.context['options'], [])
+        self.assertIsNone(response.context['next_url'])
+
+
+class PersonSearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ali = Person.objects.create(first_name='علي', last_name='كاظمي', gender=MALE)
+        cls.alireza = Person.objects.create(first_name='علیرضا', last_name='احمدی', gender=MALE)
+        cls.other = Person.objects.create(first_name='محمد', last_name='علوی', gender=MALE)
+
+    def test_search_name_is_normalized(self):
+        self.assertEqual(self.ali.search_name, 'علی کاظمی')
+
+    def test_short_queries_match_prefixes(self):
+        self.assertQuerysetEqual(Person.objects.search('عل'), [self.ali, self.alireza])
+        self.assertQuerysetEqual(Person.objects.match('عل'), [self.ali, self.alireza], ordered=False)
+        # Either spelling of a letter matches.
+        kazem = Person.objects.create(first_name='کاظم', last_name='رضایی', gender=MALE)
+        for query in ('کا', 'كا'):
+            self.assertQuerysetEqual(Person.objects.search(query), [kazem])
+        self.assertQuerysetEqual(Person.objects.search(' '), [])
+
+    def test_long_queries_are_ranked_by_trigrams(self):
+        search = Person.objects.search('علي كاظمي')
+        self.assertEqual(search.query.where.children[0].lookup_name, 'trigram_word_similar')
+        self.assertEqual(search.query.order_by, ('-similarity', 'search_name', 'pk'))
+        # Only filtered, for callers ordering on their own.
+        match = Person.objects.match('علي كاظمي')
+        self.assertEqual(match.query.where.children[0].rhs, 'علی کاظمی')
+        self.assertNotIn('similarity', match.query.annotations)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Trigram similarity needs pg_trgm on PostgreSQL.')
+    def test_trigram_ranking(self):
+        self.assertEqual(list(Person.objects.search('علی کاظم'))[0], self.ali)
+        self.assertEqual(list(Person.objects.search('علیرضا'))[0], self.alireza)
+
+
+class ExportTests(TestCase):
+
+    def setUp(self):
+        province = Province.objects.create(country=Country.objects.create(name='country'), name='province')
+        self.city = City.objects.create(province=province, name='city')
+        self.home, self.away = (Place.objects.create(city=self.city, name=name, type=1) for name in ('home', 'away'))
+        self.root = make_person('root', birth_year=1300, death_year=1370, birth_place=self.home)
+        self.root.residence_place.add(ResidencePlace.objects.create(place=self.away, from_year=1320, to_year=1330))
+        self.wife = make_person('wife', FEMALE)
+        self.root.spouse.add(self.wife)
+        self.son = make_person('son', father=self.root, mother=self.wife)
+        self.bride = make_person('bride', FEMALE)
+        self.son.spouse.add(self.bride)
+
+    def test_ndjson(self):
+        rows = [json.loads(line) for line in iter_ndjson(Person.objects.all())]
+        self.assertEqual([row['id'] for row in rows], sorted(person.pk for person in (
+            self.root, self.wife, self.son, self.bride
+        )))
+        root = next(row for row in rows if row['id'] == self.root.pk)
+        self.assertEqual(root, {
+            'id': self.root.pk,
+            'first_name': 'root',
+            'last_name': 'test',
+            'gender': MALE,
+            'father_id': None,
+            'mother_id': None,
+            'spouse_ids': [self.wife.pk],
+            'birth_year': 1300,
+            'birth_date': None,
+            'birth_place': 'home, city, province, country',
+            'death_year': 1370,
+            'death_date': None,
+            'residences': [{'place': 'away, city, province, country', 'from_year': 1320, 'to_year': 1330}],
+        })
+        son = next(row for row in rows if row['id'] == self.son.pk)
+        self.assertEqual((son['father_id'], son['mother_id'], son['spouse_ids']), (
+            self.root.pk, self.wife.pk, [self.bride.pk]
+        ))
+
+    def test_gedcom(self):
+        gedcom = ''.join(iter_gedcom(Person.objects.all()))
+        root, son = self.root.pk, self.son.pk
+        self.assertIn('\n'.join([
+            f'0 @I{root}@ INDI',
+            '1 NAME root /test/',
+            '2 GIVN root',
+            '2 SURN test',
+            '1 SEX M',
+            '1 BIRT',
+            f'2 DATE {format_date(1300)}',
+            '2 PLAC home, city, province, country',
+            '1 DEAT',
+            f'2 DATE {format_date(1370)}',
+            '1 RESI',
+            f'2 DATE FROM {format_date(1320)} TO {format_date(1330)}',
+            '2 PLAC away, city, province, country',
+        ]) + '\n', gedcom)
+        family = f'@F{root}_{self.wife.pk}@'
+        self.assertIn(f'1 FAMC {family}\n', gedcom)
+        self.assertIn(f'0 {family} FAM\n1 HUSB @I{root}@\n1 WIFE @I{self.wife.pk}@\n1 CHIL @I{son}@\n', gedcom)
+        # The parents of the son already form a family through him; only the childless couple gets its own record.
+        self.assertIn(f'0 @S{son}_{self.bride.pk}@ FAM\n1 HUSB @I{son}@\n1 WIFE @I{self.bride.pk}@\n', gedcom)
+        self.assertNotIn(f'@S{root}_', gedcom)
+        self.assertTrue(gedcom.startswith('0 HEAD\n') and gedcom.endswith('0 TRLR\n'))
+
+    def test_descendants_export_leaves_missing_parents_out(self):
+        gedcom = ''.join(iter_gedcom(Person.objects.filter(pk=self.son.pk)))
+        self.assertIn(f'0 @F{self.root.pk}_{self.wife.pk}@ FAM\n1 CHIL @I{self.son.pk}@\n', gedcom)
+        self.assertNotIn('HUSB', gedcom)
+
+    def export_queries(self, exporter) -> int:
+        with CaptureQueriesContext(connection) as queries:
+            for _ in exporter(Person.objects.all()):
+                pass
+        return len(queries)
 
-# Create your tests here.
+    def test_queries_do_not_grow_with_the_persons(self):
+        for exporter in (iter_ndjson, iter_gedcom):
+            with self.subTest(exporter=exporter.__name__):
+                # Loads the geography, which is not part of the export itself.
+                self.export_queries(exporter)
+                queries = self.export_queries(exporter)
+                for index in range(20):
+                    person = make_person(f'child {index}', father=self.son, mother=self.bride, birth_place=self.away)
+                    person.residence_place.add(
+                        ResidencePlace.objects.create(place=self.home, from_year=1380, to_year=1390)
+                    )
+                    person.spouse.add(self.wife)
+                self.assertEqual(self.export_queries(exporter), queries)
@@ -0,0 +1,82 @@
+from dataclasses import dataclass
+
+from django.db.models import Q
+
+from persons.models import Person
+
+TREE_GENERATIONS = 2
+TREE_MAX_GENERATIONS = 5
+TREE_CACHE_TIMEOUT = 60 * 60
+
+
+@dataclass
+class TreeNode:
+    person: Person
+    parents: list = None
+    children: list = None
+
+    @property
+    def has_parents(self) -> bool:
+        return self.person.father_id is not None or self.person.mother_id is not None
+
+    @property
+    def has_children(self) -> bool:
+        return self.person.has_children
+
+
+def _children_map(persons) -> dict:
+    children = {}
+    for person in persons:
+        for parent_id in {person.father_id, person.mother_id} - {None}:
+            children.setdefault(parent_id, []).append(person)
+    return children
+
+
+def _ancestor_node(person: Person, persons: dict, generations: int) -> TreeNode:
+    node = TreeNode(person)
+    if generations > 0:
+        node.parents = [
+            _ancestor_node(persons[parent_id], persons, generations - 1)
+            for parent_id in (person.father_id, person.mother_id)
+            if parent_id in persons
+        ]
+    return node
+
+
+def _descendant_node(person: Person, children: dict, generations: int) -> TreeNode:
+    node = TreeNode(person)
+    if generations > 0:
+        node.children = [
+            _descendant_node(child, children, generations - 1) for child in children.get(person.pk, [])
+        ]
+    return node
+
+
+def get_tree(person: Person, generations: int = TREE_GENERATIONS) -> TreeNode:
+    """
+    The focal ``person`` with ``generations`` generations of ancestors and descendants, loaded in a single query
+    through the lineage backend. Nodes on the edge keep ``parents``/``children`` unset so they can be expanded later.
+    """
+    queryset = Person.objects.for_tree()
+    persons = queryset.filter(
+        Q(pk=person.pk)
+        | Q(pk__in=queryset.ancestors_of(person, generations).values('pk'))
+        | Q(pk__in=queryset.descendants_of(person, generations).values('pk'))
+    )
+    persons = {p.pk: p for p in persons}
+    focal = _ancestor_node(persons[person.pk], persons, generations)
+    focal.children = _descendant_node(persons[person.pk], _children_map(persons.values()), generations).children
+    return focal
+
+
+def get_parents(person_id: int) -> list:
+    parent_ids = Person.objects.filter(pk=person_id)
+    parents = Person.objects.for_tree().filter(
+        Q(pk__in=parent_ids.values('father_id')) | Q(pk__in=parent_ids.values('mother_id'))
+    ).order_by('gender', 'pk')
+    return [TreeNode(parent) for parent in parents]
+
+
+def get_children(person_id: int) -> list:
+    children = Person.objects.for_tree().filter(Q(father_id=person_id) | Q(mother_id=person_id))
+    return [TreeNode(child) for child in children]
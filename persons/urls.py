@@ -1,9 +1,13 @@
-from django.urls import path
+from django.urls import path, include
 
-from persons.views import AddPersonView
+from persons.views import AddPersonView, ExportPersonsView, FamilyTreeView, TreeStatisticsView
 
 app_name = 'persons'
 
 urlpatterns = [
-    path('add-person/', AddPersonView.as_view(), name='add-person')
+    path('hx/', include('persons.htmx.urls')),
+    path('add-person/', AddPersonView.as_view(), name='add-person'),
+    path('export/', ExportPersonsView.as_view(), name='export'),
+    path('tree/<int:pk>/', FamilyTreeView.as_view(), name='family-tree'),
+    path('tree/<int:pk>/statistics/', TreeStatisticsView.as_view(), name='tree-statistics'),
 ]
@@ -1,8 +1,74 @@
-from django.views.generic import CreateView
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+from django.views import View
+from django.views.generic import CreateView, DetailView
 
-from persons.forms import AddPersonForm
+from persons.exports import EXPORTERS
+from persons.forms import AddPersonForm, ExportPersonsForm
+from persons.models import Person
+from persons.statistics import TREE_MIGRATION_LIMIT, get_tree_summary
+from persons.tree import TREE_GENERATIONS, TREE_MAX_GENERATIONS, get_tree
+from places.geography import get_geography
 
 
 class AddPersonView(CreateView):
     template_name = 'add_person.html'
     form_class = AddPersonForm
+
+
+class ExportPersonsView(LoginRequiredMixin, View):
+
+    def get(self, request):
+        form = ExportPersonsForm(data=request.GET)
+        if not form.is_valid():
+            return HttpResponseBadRequest(form.errors.as_text())
+        export_format = form.cleaned_data['format']
+        exporter, content_type = EXPORTERS[export_format]
+        response = StreamingHttpResponse(exporter(form.get_queryset()), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="shajareh.{export_format}"'
+        return response
+
+
+class FamilyTreeView(DetailView):
+    """
+    The focal person with a few generations around it. Nodes on the edge are expanded on demand with
+    ``TreeParentsHTMXView`` and ``TreeChildrenHTMXView``.
+    """
+    template_name = 'family_tree.html'
+    context_object_name = 'person'
+    queryset = Person.objects.only('id', 'first_name')
+
+    def get_generations(self) -> int:
+        try:
+            generations = int(self.request.GET.get('generations', TREE_GENERATIONS))
+        except ValueError:
+            generations = TREE_GENERATIONS
+        return min(max(generations, 0), TREE_MAX_GENERATIONS)
+
+    def get_context_data(self, **kwargs):
+        generations = self.get_generations()
+        return super().get_context_data(
+            tree=get_tree(self.object, generations), generations=generations, **kwargs
+        )
+
+
+class TreeStatisticsView(DetailView):
+    """Statistics of the tree rooted at the person, read from its precomputed ``TreeSummary``."""
+    template_name = 'tree_statistics.html'
+    context_object_name = 'person'
+    queryset = Person.objects.only('id', 'first_name')
+
+    def get_context_data(self, **kwargs):
+        summary = get_tree_summary(self.object)
+        geography = get_geography()
+        migrations = [
+            (geography.label(row.birth_place_id), geography.label(row.residence_place_id), row.persons)
+            for row in summary.migration_rows.order_by('-persons')[:TREE_MIGRATION_LIMIT]
+        ]
+        return super().get_context_data(
+            summary=summary,
+            generation_rows=summary.generation_rows.all(),
+            birth_decade_rows=summary.birth_decade_rows.all(),
+            migrations=migrations,
+            **kwargs
+        )
@@ -0,0 +1,62 @@
+import threading
+from dataclasses import dataclass
+
+from common.helpers import get_cache_version
+from places.models import City, Country, Place, Province
+
+GEOGRAPHY_VERSION_CACHE_KEY = 'places:geography-version'
+
+
+@dataclass(frozen=True)
+class PlaceNode:
+    id: int
+    name: str
+    full_name: str
+    city_id: int
+    province_id: int
+    country_id: int
+
+
+class Geography:
+    """The whole place hierarchy of one version, loaded once per process and shared between requests."""
+
+    def __init__(self, version: int):
+        self.version = version
+        self.countries = dict(Country.objects.values_list('id', 'name'))
+        self.provinces = dict(Province.objects.values_list('id', 'name'))
+        self.cities = dict(City.objects.values_list('id', 'name'))
+        self.places = {
+            row[0]: PlaceNode(*row)
+            for row in Place.objects.values_list('id', 'name', 'full_name', 'city_id', 'province_id', 'country_id')
+        }
+
+    def label(self, place_id: int, default: str = None):
+        place = self.places.get(place_id)
+        return default if place is None else place.full_name
+
+    def place_ids(self, city_id: int = None, province_id: int = None, country_id: int = None) -> set:
+        """Ids of the places in a city, province or country, e.g. for ``birth_place_id__in`` filters."""
+        return {
+            place.id for place in self.places.values()
+            if (city_id is None or place.city_id == city_id)
+            and (province_id is None or place.province_id == province_id)
+            and (country_id is None or place.country_id == country_id)
+        }
+
+
+_geography = None
+_geography_lock = threading.Lock()
+
+
+def get_geography() -> Geography:
+    """
+    The process-local geography. It is reloaded only when another process (or this one) bumped the shared version
+    after changing a place, city, province or country.
+    """
+    global _geography
+    version = get_cache_version(GEOGRAPHY_VERSION_CACHE_KEY)
+    if _geography is None or _geography.version != version:
+        with _geography_lock:
+            if _geography is None or _geography.version != version:
+                _geography = Geography(version)
+    return _geography
@@ -0,0 +1,13 @@
+from django.urls import path
+
+from places.htmx.views import PlaceAutocompleteHTMXView, ResidencePlaceAutocompleteHTMXView
+
+app_name = 'places-hx'
+
+urlpatterns = [
+    path('place-autocomplete-htmx/', PlaceAutocompleteHTMXView.as_view(), name='place-autocomplete-htmx'),
+    path(
+        'residence-place-autocomplete-htmx/', ResidencePlaceAutocompleteHTMXView.as_view(),
+        name='residence-place-autocomplete-htmx'
+    ),
+]
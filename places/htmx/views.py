@@ -0,0 +1,28 @@
+from common.htmx.views import AutocompleteHTMXView
+from places.geography import get_geography
+from places.models import Place, ResidencePlace
+
+
+class PlaceAutocompleteHTMXView(AutocompleteHTMXView):
+
+    def get_search_queryset(self, query: str):
+        return (
+            Place.objects.filter(name__startswith=query)
+            .only('id', 'full_name')
+            .order_by('name', 'pk')
+        )
+
+    def get_label(self, obj) -> str:
+        return obj.full_name
+
+
+class ResidencePlaceAutocompleteHTMXView(AutocompleteHTMXView):
+
+    def get_search_queryset(self, query: str):
+        return (
+            ResidencePlace.objects.filter(place__name__startswith=query)
+            .order_by('place__name', 'from_year', 'pk')
+        )
+
+    def get_label(self, obj) -> str:
+        return f'{get_geography().label(obj.place_id)} ({obj.from_year} - {obj.to_year})'
@@ -0,0 +1,25 @@
+from django.apps import apps
+from django.db import models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Concat
+
+
+class PlaceQuerySet(models.QuerySet):
+
+    def refresh_paths(self) -> int:
+        """Set-based counterpart of ``Place.refresh_path``, used when a city, province or country changes."""
+        city = apps.get_model('places', 'City').objects.filter(pk=OuterRef('city_id'))
+        return self.update(
+            full_name=Concat(
+                'name',
+                Value(', '), Subquery(city.values('name')[:1]),
+                Value(', '), Subquery(city.values('province__name')[:1]),
+                Value(', '), Subquery(city.values('province__country__name')[:1]),
+            ),
+            province_id=Subquery(city.values('province_id')[:1]),
+            country_id=Subquery(city.values('province__country_id')[:1]),
+        )
+
+
+class PlaceManager(models.Manager.from_queryset(PlaceQuerySet)):
+    pass
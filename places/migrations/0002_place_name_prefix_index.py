@@ -0,0 +1,17 @@
+# Generated by Django 4.1.13 on 2026-10-18 06:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='place',
+            index=models.Index(fields=['name'], name='places_place_name_prefix', opclasses=('varchar_pattern_ops',)),
+        ),
+    ]
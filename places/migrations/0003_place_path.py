@@ -0,0 +1,47 @@
+# Generated by Django 4.1.13 on 2026-10-18 06:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Concat
+
+
+def fill_paths(apps, schema_editor):
+    Place = apps.get_model('places', 'Place')
+    city = apps.get_model('places', 'City').objects.filter(pk=OuterRef('city_id'))
+    Place.objects.update(
+        full_name=Concat(
+            'name',
+            Value(', '), Subquery(city.values('name')[:1]),
+            Value(', '), Subquery(city.values('province__name')[:1]),
+            Value(', '), Subquery(city.values('province__country__name')[:1]),
+        ),
+        province_id=Subquery(city.values('province_id')[:1]),
+        country_id=Subquery(city.values('province__country_id')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0002_place_name_prefix_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='place',
+            name='country',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='places.country', verbose_name='کشور'),
+        ),
+        migrations.AddField(
+            model_name='place',
+            name='full_name',
+            field=models.CharField(default='', editable=False, max_length=406, verbose_name='نام کامل'),
+        ),
+        migrations.AddField(
+            model_name='place',
+            name='province',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='places.province', verbose_name='استان'),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+    ]
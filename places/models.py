@@ -2,6 +2,7 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 
 from places.enums import PlaceTypeChoices
+from places.managers import PlaceManager
 
 
 class Country(models.Model):
@@ -43,14 +44,44 @@ class Place(models.Model):
     city = models.ForeignKey('places.City', on_delete=models.CASCADE, verbose_name=_('شهر'))
     type = models.IntegerField(verbose_name=_('نوع'), choices=PlaceTypeChoices.choices)
     name = models.CharField(max_length=100, verbose_name=_('نام'))
+    full_name = models.CharField(max_length=406, verbose_name=_('نام کامل'), editable=False, default='')
+    province = models.ForeignKey(
+        'places.Province', on_delete=models.CASCADE, verbose_name=_('استان'), null=True, editable=False
+    )
+    country = models.ForeignKey(
+        'places.Country', on_delete=models.CASCADE, verbose_name=_('کشور'), null=True, editable=False
+    )
+
+    objects = PlaceManager()
 
     class Meta:
         verbose_name = _('مکان')
         verbose_name_plural = _('مکان‌ها')
+        indexes = [
+            models.Index(fields=('name',), opclasses=('varchar_pattern_ops',), name='places_place_name_prefix'),
+        ]
 
     def __str__(self):
         return self.name
 
+    def refresh_path(self):
+        """Store the names and ids of the city, province and country, so that showing a place needs no joins."""
+        if type(self).city.is_cached(self):
+            city = self.city
+        else:
+            city = City.objects.select_related('province__country').get(pk=self.city_id)
+        province = city.province
+        self.full_name = f'{self.name}, {city.name}, {province.name}, {province.country.name}'
+        self.province_id = province.pk
+        self.country_id = province.country_id
+
+    def save(self, *args, **kwargs):
+        self.refresh_path()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'name', 'city'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'full_name', 'province', 'country'}
+        super().save(*args, **kwargs)
+
 
 class ResidencePlace(models.Model):
     place = models.ForeignKey('places.Place', on_delete=models.PROTECT, verbose_name=_('مکان'))
@@ -60,3 +91,6 @@ class ResidencePlace(models.Model):
     class Meta:
         verbose_name = _('محل سکونت')
         verbose_name_plural = _('محل‌های سکونت')
+
+    def __str__(self):
+        return f'{self.place} ({self.from_year} - {self.to_year})'
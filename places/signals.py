@@ -0,0 +1,33 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from common.helpers import bump_cache_version
+from places.geography import GEOGRAPHY_VERSION_CACHE_KEY
+from places.models import City, Country, Place, Province
+
+
+@receiver(post_save, sender=City)
+def refresh_city_paths(sender, instance, created, **kwargs):
+    if not created:
+        Place.objects.filter(city=instance).refresh_paths()
+
+
+@receiver(post_save, sender=Province)
+def refresh_province_paths(sender, instance, created, **kwargs):
+    if not created:
+        Place.objects.filter(city__province=instance).refresh_paths()
+
+
+@receiver(post_save, sender=Country)
+def refresh_country_paths(sender, instance, created, **kwargs):
+    if not created:
+        Place.objects.filter(city__province__country=instance).refresh_paths()
+
+
+@receiver([post_save, post_delete], sender=Country)
+@receiver([post_save, post_delete], sender=Province)
+@receiver([post_save, post_delete], sender=City)
+@receiver([post_save, post_delete], sender=Place)
+def invalidate_geography(sender, **kwargs):
+    transaction.on_commit(lambda: bump_cache_version(GEOGRAPHY_VERSION_CACHE_KEY))
@@ -1,3 +1,75 @@
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from places.geography import get_geography
+from places.models import City, Country, Place, Province
+
+
+class PlacePathTests(TestCase):
+
+    def setUp(self):
+        self.country = Country.objects.create(name='Iran')
+        self.province = Province.objects.create(country=self.country, name='Tehran')
+        self.city = City.objects.create(province=self.province, name='Tehran')
+        self.place = Place.objects.create(city=self.city, name='Tajrish', type=1)
+
+    def path(self) -> tuple:
+        place = Place.objects.get(pk=self.place.pk)
+        return place.full_name, place.province_id, place.country_id
+
+    def test_path_of_new_place(self):
+        self.assertEqual(self.path(), ('Tajrish, Tehran, Tehran, Iran', self.province.pk, self.country.pk))
+
+    def test_renames_rewrite_the_paths(self):
+        self.city.name = 'Shemiran'
+        self.city.save()
+        self.assertEqual(self.path()[0], 'Tajrish, Shemiran, Tehran, Iran')
+        self.province.name = 'Tehran Province'
+        self.province.save()
+        self.assertEqual(self.path()[0], 'Tajrish, Shemiran, Tehran Province, Iran')
+        self.country.name = 'Persia'
+        self.country.save()
+        self.assertEqual(self.path()[0], 'Tajrish, Shemiran, Tehran Province, Persia')
+
+    def test_moves_rewrite_the_paths(self):
+        country = Country.objects.create(name='Other')
+        province = Province.objects.create(country=country, name='Province')
+        self.city.province = province
+        self.city.save()
+        self.assertEqual(self.path(), ('Tajrish, Tehran, Province, Other', province.pk, country.pk))
+        self.province.country = country
+        self.province.save()
+        self.assertEqual(Place.objects.get(pk=self.place.pk).country_id, country.pk)
+
+
+class GeographyTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch('places.geography._geography', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.province = Province.objects.create(country=Country.objects.create(name='Iran'), name='Tehran')
+        self.city = City.objects.create(province=self.province, name='Tehran')
+        self.place = Place.objects.create(city=self.city, name='Tajrish', type=1)
+
+    def test_loaded_once_per_version(self):
+        geography = get_geography()
+        self.assertEqual(geography.label(self.place.pk), 'Tajrish, Tehran, Tehran, Iran')
+        self.assertEqual(geography.place_ids(province_id=self.province.pk), {self.place.pk})
+        self.assertIsNone(geography.label(0))
+        with self.assertNumQueries(0):
+            self.assertIs(get_geography(), geography)
+
+    def test_reloaded_after_a_change(self):
+        geography = get_geography()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.city.name = 'Shemiran'
+            self.city.save()
+        reloaded = get_geography()
+        self.assertIsNot(reloaded, geography)
+        self.assertGreater(reloaded.version, geography.version)
+        self.assertEqual(reloaded.label(self.place.pk), 'Tajrish, Shemiran, Tehran, Iran')
+        self.assertEqual(reloaded.cities[self.city.pk], 'Shemiran')
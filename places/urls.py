@@ -0,0 +1,7 @@
+from django.urls import path, include
+
+app_name = 'places'
+
+urlpatterns = [
+    path('hx/', include('places.htmx.urls')),
+]
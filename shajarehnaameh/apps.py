@@ -0,0 +1,9 @@
+from django.contrib.staticfiles.apps import StaticFilesConfig as BaseStaticFilesConfig
+
+
+class StaticFilesConfig(BaseStaticFilesConfig):
+    # Vendors no page uses, left out of ``collectstatic``.
+    ignore_patterns = [
+        *BaseStaticFilesConfig.ignore_patterns,
+        'fontawesome-free-*', 'isotope-layout', 'php-email-form', 'typed.js', 'waypoints', 'scss', 'testBS.html',
+    ]
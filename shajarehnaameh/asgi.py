@@ -9,8 +9,26 @@ https://docs.djangoproject.com/en/4.1/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.conf import settings
+
+from common.handlers import StreamingASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'shajarehnaameh.settings')
 
-application = get_asgi_application()
+# What ``get_asgi_application`` does, with the handler that streams responses outside of the event loop.
+django.setup(set_prefix=False)
+django_application = StreamingASGIHandler()
+
+# Imported once the apps are loaded.
+from common.templating import preload_templates  # noqa: E402
+from shajarehnaameh.sse import EVENT_STREAM_PATH, event_stream  # noqa: E402
+
+if settings.TEMPLATES_PRELOAD:
+    preload_templates()
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'] == EVENT_STREAM_PATH:
+        return await event_stream(scope, receive, send)
+    return await django_application(scope, receive, send)
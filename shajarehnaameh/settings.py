@@ -37,7 +37,8 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
-    'django.contrib.staticfiles',
+    'shajarehnaameh.apps.StaticFilesConfig',
+    'django.contrib.postgres',
     'django_htmx',
 
     'common',
@@ -48,6 +49,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'common.middleware.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -59,12 +61,15 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'shajarehnaameh.urls'
 
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [BASE_DIR / 'templates']
-        ,
-        'APP_DIRS': True,
+        'DIRS': [BASE_DIR / 'templates'],
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -72,10 +77,16 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            'debug': DEBUG,
+            # In production templates are parsed once per process and kept compiled in memory.
+            'loaders': TEMPLATE_LOADERS if DEBUG else [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)],
         },
     },
 ]
 
+# Compile every project template when a worker starts (see ``common.templating``), instead of on first use.
+TEMPLATES_PRELOAD = config('TEMPLATES_PRELOAD', default=not DEBUG, cast=bool)
+
 WSGI_APPLICATION = 'shajarehnaameh.wsgi.application'
 
 
@@ -131,17 +142,134 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/4.1/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_DIRS = [BASE_DIR / "static"]
 
+# Static build
+# With STATIC_BUILD, ``collectstatic`` writes the bundles below, subsets the fonts to the glyphs used, gives every file
+# a content-hashed name and precompresses them (``common.storage.BuildStaticFilesStorage``). Without it, the
+# ``static_bundle`` template tag links the sources of each bundle one by one.
+
+STATIC_BUILD = config('STATIC_BUILD', default=not DEBUG, cast=bool)
+if STATIC_BUILD:
+    STATICFILES_STORAGE = 'common.storage.BuildStaticFilesStorage'
+
+STATIC_BUNDLES = {
+    'bundles/site.css': [
+        'style/vendor/aos/aos.css',
+        'style/vendor/bootstrap/css/bootstrap.min.css',
+        'style/vendor/bootstrap-icons/bootstrap-icons.css',
+        'style/vendor/boxicons/css/boxicons.min.css',
+        'style/vendor/glightbox/css/glightbox.min.css',
+        'style/vendor/swiper/swiper-bundle.min.css',
+        'style/css/style.css',
+        'style/css/shn.css',
+    ],
+    'bundles/htmx.js': [
+        'js/htmx.min.js',
+        'js/events.js',
+    ],
+    'bundles/site.js': [
+        'style/vendor/purecounter/purecounter_vanilla.js',
+        'style/vendor/aos/aos.js',
+        'style/vendor/bootstrap/js/bootstrap.bundle.min.js',
+        'style/vendor/glightbox/js/glightbox.min.js',
+        'style/vendor/swiper/swiper-bundle.min.js',
+        'style/js/main.js',
+    ],
+}
+# Serve STATIC_ROOT from the application (``common.middleware.StaticFilesMiddleware``); ``runserver`` serves the
+# static files itself while DEBUG is on. Files without a hashed name are cached for STATIC_MAX_AGE seconds.
+
+STATIC_SERVE = config('STATIC_SERVE', default=not DEBUG, cast=bool)
+STATIC_MAX_AGE = config('STATIC_MAX_AGE', default=60, cast=int)
+
+STATIC_TEXT_FONTS = [
+    'fonts/IRANSansWeb(FaNum).ttf',
+    'fonts/IRANSansWeb(FaNum)_Bold.ttf',
+    'fonts/IRANSansWeb(FaNum)_Light.ttf',
+    'fonts/IRANSansWeb(FaNum)_Medium.ttf',
+    'fonts/IRANSansWeb(FaNum)_UltraLight.ttf',
+]
+STATIC_ICON_FONTS = [
+    'style/vendor/bootstrap-icons/fonts/bootstrap-icons.woff2',
+    'style/vendor/bootstrap-icons/fonts/bootstrap-icons.woff',
+    'style/vendor/boxicons/fonts/boxicons.woff2',
+    'style/vendor/boxicons/fonts/boxicons.woff',
+    'style/vendor/boxicons/fonts/boxicons.ttf',
+]
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'
 
+# Cache
+# LocMemCache is per process; use a shared cache (e.g. django.core.cache.backends.redis.RedisCache) with several
+# workers, since live OTP codes are kept in the cache, and the versions bumped by ``common.helpers.bump_cache_version``
+# must reach every worker, or the geography of ``places.geography`` and the cached tree fragments of
+# ``persons.tree`` stay stale in the others (``manage.py check --deploy`` warns about it).
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache', cast=str),
+        'LOCATION': config('CACHE_LOCATION', default='', cast=str),
+    }
+}
+
+# Sessions are read on every OTP step; caching them keeps throttled requests away from the database.
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# Rate limiting
+# (requests, window in seconds) per client IP and per account (mobile number or user in the OTP session). Counts are
+# kept in RATE_LIMIT_CACHE_ALIAS, which must be a shared cache: with LocMemCache every worker process counts on its
+# own and the real limits are multiplied by the number of workers (``manage.py check --deploy`` warns about it).
+
+RATE_LIMITS = {
+    'send-otp': {'ip': (10, 60 * 60), 'account': (3, 15 * 60)},
+    'login': {'ip': (30, 5 * 60), 'account': (10, 15 * 60)},
+    'reset-password': {'ip': (10, 60 * 60), 'account': (5, 60 * 60)},
+}
+RATE_LIMIT_CACHE_ALIAS = 'default'
+RATE_LIMIT_CLIENT_IP_HEADER = config('RATE_LIMIT_CLIENT_IP_HEADER', default='REMOTE_ADDR', cast=str)
+# Proxies that append to RATE_LIMIT_CLIENT_IP_HEADER (e.g. HTTP_X_FORWARDED_FOR); the entry they added is used.
+RATE_LIMIT_TRUSTED_PROXIES = config('RATE_LIMIT_TRUSTED_PROXIES', default=1, cast=int)
+
 # OTP
 
 OTP_EXP_MINUTES = 5
 OTP_VALIDITY_MINUTES = 3 * 30 * 24 * 60  # 3 month
+OTP_MAX_ATTEMPTS = 3
+# users.otp.CacheOTPBackend keeps live codes in OTP_CACHE_ALIAS instead of the database. It needs a shared cache:
+# with LocMemCache a code sent by one worker process is not found by the others (``manage.py check --deploy`` warns).
+OTP_BACKEND = config('OTP_BACKEND', default='users.otp.DatabaseOTPBackend', cast=str)
+OTP_CACHE_ALIAS = 'default'
+# Serve login, register and the OTP steps with the views of ``users.async_views``; meant for ASGI deployments.
+USERS_ASYNC_VIEWS = config('USERS_ASYNC_VIEWS', default=False, cast=bool)
+
+# SMS
+# Messages are queued in the database and sent by the ``send_sms`` worker command.
+
+SMS_GATEWAY = config('SMS_GATEWAY', default='users.sms.ConsoleSMSGateway', cast=str)
+SMS_MAX_ATTEMPTS = 5
+SMS_RETRY_BACKOFF_SECONDS = 30
+# Sent and failed messages (their text is cleared once they leave the queue) are purged after this many days.
+SMS_RETENTION_DAYS = 7
+
+# Events
+# Carry notification and tree changes to the server-sent events stream of ``shajarehnaameh.sse``. The in-process
+# broker only reaches streams of the same process; use ``common.events.PostgresEventBroker`` with several workers or
+# to publish from management commands.
+
+EVENT_BROKER = config('EVENT_BROKER', default='common.events.InProcessEventBroker', cast=str)
+
+# Persons
+
+PERSONS_LINEAGE_BACKEND = config(
+    'PERSONS_LINEAGE_BACKEND', default='persons.lineage.ClosureTableBackend', cast=str
+)
@@ -0,0 +1,116 @@
+"""
+Server-sent events stream of notification and tree changes, served by ``asgi.application`` at ``EVENT_STREAM_PATH``.
+
+This Django release cannot stream from an async view, so the stream is a plain ASGI application: each open
+connection is one coroutine waiting on an ``asyncio.Queue`` of ``common.events``, with no thread or database
+connection held while it is idle. Events only tell the page what changed; ``static/js/events.js`` turns them into
+``sse:<event>`` HTMX triggers and the page fetches the fragments it shows again.
+"""
+import asyncio
+import json
+from http.cookies import SimpleCookie
+from importlib import import_module
+from types import SimpleNamespace
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+
+from common.events import get_event_broker
+from persons.models import TREE_EVENT_CHANNEL, Person
+from persons.tree import TREE_GENERATIONS, TREE_MAX_GENERATIONS, get_tree
+from users.managers import NOTIFICATIONS_EVENT_CHANNEL
+
+EVENT_STREAM_PATH = '/events/'
+KEEPALIVE_SECONDS = 15
+RETRY_MILLISECONDS = 5000
+
+
+async def aget_user(scope):
+    cookies = SimpleCookie()
+    for name, value in scope.get('headers', []):
+        if name == b'cookie':
+            cookies.load(value.decode('latin-1'))
+    session_key = cookies[settings.SESSION_COOKIE_NAME].value if settings.SESSION_COOKIE_NAME in cookies else None
+    session = import_module(settings.SESSION_ENGINE).SessionStore(session_key)
+    return await sync_to_async(get_user)(SimpleNamespace(session=session))
+
+
+def _tree_person_ids(node) -> set:
+    ids = {node.person.pk}
+    for relative in (node.parents or []) + (node.children or []):
+        ids |= _tree_person_ids(relative)
+    return ids
+
+
+def get_tree_person_ids(person_id: str, generations: str):
+    """Ids of the persons on the tree page of ``person_id``, or ``None`` when the parameters are invalid."""
+    try:
+        person = Person.objects.only('id').get(pk=int(person_id))
+        generations = min(max(int(generations), 0), TREE_MAX_GENERATIONS)
+    except (ValueError, Person.DoesNotExist):
+        return None
+    return _tree_person_ids(get_tree(person, generations))
+
+
+async def get_subscriptions(scope) -> dict:
+    """Map the channels of the stream to a filter on their event data."""
+    subscriptions = {}
+    user = await aget_user(scope)
+    if user.is_authenticated:
+        subscriptions[NOTIFICATIONS_EVENT_CHANNEL.format(user_id=user.pk)] = lambda data: True
+    query = parse_qs(scope.get('query_string', b'').decode())
+    if 'tree' in query:
+        generations = query.get('generations', [TREE_GENERATIONS])[0]
+        person_ids = await sync_to_async(get_tree_person_ids)(query['tree'][0], generations)
+        if person_ids is not None:
+            subscriptions[TREE_EVENT_CHANNEL] = lambda data: data is None or not person_ids.isdisjoint(data)
+    return subscriptions
+
+
+async def wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def send_body(send, body: str):
+    await send({'type': 'http.response.body', 'body': body.encode(), 'more_body': True})
+
+
+async def event_stream(scope, receive, send):
+    subscriptions = await get_subscriptions(scope)
+    if not subscriptions:
+        await send({'type': 'http.response.start', 'status': 204, 'headers': []})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            # Proxies such as nginx would otherwise buffer the stream.
+            (b'x-accel-buffering', b'no'),
+        ],
+    })
+    await send_body(send, f'retry: {RETRY_MILLISECONDS}\n\n')
+    disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+    async with get_event_broker().subscribe(subscriptions) as queue:
+        try:
+            while not disconnected.done():
+                event = asyncio.ensure_future(queue.get())
+                await asyncio.wait(
+                    {event, disconnected}, timeout=KEEPALIVE_SECONDS, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not event.done():
+                    event.cancel()
+                    if not disconnected.done():
+                        await send_body(send, ': keepalive\n\n')
+                    continue
+                channel, data = event.result()
+                if subscriptions[channel](data):
+                    await send_body(send, f'event: {channel.split(":")[0]}\ndata: {json.dumps(data)}\n\n')
+        finally:
+            disconnected.cancel()
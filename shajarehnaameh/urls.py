@@ -24,4 +24,5 @@ urlpatterns = [
     path('common/', include('common.urls')),
     path('users/', include('users.urls')),
     path('persons/', include('persons.urls')),
+    path('places/', include('places.urls')),
 ]
@@ -9,8 +9,13 @@ https://docs.djangoproject.com/en/4.1/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'shajarehnaameh.settings')
 
 application = get_wsgi_application()
+
+if settings.TEMPLATES_PRELOAD:
+    from common.templating import preload_templates
+    preload_templates()
@@ -0,0 +1,35 @@
+// Selection handling for common.widgets.AutocompleteSelect; searching and paging are done by HTMX.
+document.addEventListener('click', function (event) {
+    var remove = event.target.closest('[data-autocomplete-remove]');
+    if (remove) {
+        remove.closest('[data-autocomplete-selected]').remove();
+        return;
+    }
+    var option = event.target.closest('[data-autocomplete-value]');
+    if (!option) {
+        return;
+    }
+    var widget = option.closest('[data-autocomplete]');
+    var selected = widget.querySelector('.autocomplete-selected');
+    if (!widget.hasAttribute('data-multiple')) {
+        selected.innerHTML = '';
+    }
+    if (!selected.querySelector('input[value="' + option.dataset.autocompleteValue + '"]')) {
+        var badge = document.createElement('span');
+        badge.className = 'badge rounded-pill bg-primary';
+        badge.setAttribute('data-autocomplete-selected', '');
+        badge.textContent = option.textContent.trim();
+        var input = document.createElement('input');
+        input.type = 'hidden';
+        input.name = widget.dataset.name;
+        input.value = option.dataset.autocompleteValue;
+        var button = document.createElement('button');
+        button.type = 'button';
+        button.className = 'btn-close btn-close-white ms-1';
+        button.setAttribute('data-autocomplete-remove', '');
+        badge.append(input, button);
+        selected.append(badge);
+    }
+    widget.querySelector('.autocomplete-results').innerHTML = '';
+    widget.querySelector('input[type="search"]').value = '';
+});
@@ -0,0 +1,20 @@
+// Relays the server-sent events of shajarehnaameh.sse as "sse:<event>" HTMX triggers on the body, so fragments refresh
+// themselves with hx-trigger="sse:<event> from:body". Polling fragments check window.shnEventsConnected to pause.
+document.addEventListener('DOMContentLoaded', function () {
+    var element = document.querySelector('[data-event-stream]');
+    if (!element || !window.EventSource) {
+        return;
+    }
+    var source = new EventSource(element.dataset.eventStream);
+    source.onopen = function () {
+        window.shnEventsConnected = true;
+    };
+    source.onerror = function () {
+        window.shnEventsConnected = false;
+    };
+    element.dataset.events.split(' ').forEach(function (name) {
+        source.addEventListener(name, function (event) {
+            htmx.trigger(document.body, 'sse:' + name, {data: JSON.parse(event.data)});
+        });
+    });
+});
@@ -1,6 +1,62 @@
 from django.contrib import admin
+from django.utils.translation import gettext_lazy as _
 
-from users.models import ShnUser, Notification
+from common.pagination import KeysetPaginationAdminMixin
+from users.models import AuthOTP, ShnUser, Notification, SMSMessage
 
 admin.site.register(ShnUser)
-admin.site.register(Notification)
+
+
+class AuthOTPAdmin(KeysetPaginationAdminMixin, admin.ModelAdmin):
+    """Read-only; live codes would let staff sign in as any user, so ``code`` is never shown."""
+    list_display = ('user', 'usage', 'confirmed', 'created_at', )
+    exclude = ('code', )
+    list_filter = ('usage', 'confirmed', )
+    list_select_related = ('user', )
+    raw_id_fields = ('user', )
+    # Newest first through the primary key index.
+    ordering = ('-pk', )
+    sortable_by = ()
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+admin.site.register(AuthOTP, AuthOTPAdmin)
+
+
+class NotificationAdmin(KeysetPaginationAdminMixin, admin.ModelAdmin):
+    list_display = ('title', 'user', 'seen', 'created_at', )
+    list_filter = ('seen', )
+    list_select_related = ('user', )
+    raw_id_fields = ('user', )
+    ordering = ('-pk', )
+    sortable_by = ()
+    actions = ('mark_seen', )
+
+    @admin.action(description=_('علامت‌گذاری به عنوان خوانده شده'))
+    def mark_seen(self, request, queryset):
+        queryset.mark_seen()
+
+
+admin.site.register(Notification, NotificationAdmin)
+
+
+class SMSMessageAdmin(admin.ModelAdmin):
+    """Read-only; the text of queued messages holds login codes and is never shown."""
+    list_display = ('mobile', 'status', 'attempts', 'created_at', 'sent_at', )
+    list_filter = ('status', )
+    search_fields = ('mobile', )
+    exclude = ('text', )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+admin.site.register(SMSMessage, SMSMessageAdmin)
@@ -0,0 +1,152 @@
+"""
+Async versions of the login, register and OTP views, selected in ``users.urls`` by ``settings.USERS_ASYNC_VIEWS``
+and served natively under ASGI. Classes keep the names of their ``users.views`` counterparts so that either module
+can back the same urls.
+
+Django 4.1 has no async API for sessions, ``authenticate`` or ``login``; those steps (and password hashing, which
+is CPU bound) run in a thread, while the OTP checks, the rate limits and the user lookups use the async ORM and cache
+methods directly on the event loop.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth import login as auth_login
+from django.core.exceptions import ValidationError
+from django.http import Http404, HttpResponseRedirect
+from django.utils.cache import add_never_cache_headers
+
+from common.mixins import AsyncRateLimitMixin
+from users import enums, views as users_views
+from users.exeptions import SendOTPError
+from users.forms import AsyncConfirmOTPForm
+from users.models import ShnUser
+from users.views import OTP_USER_SESSION
+
+
+async def aget_user_from_session(request) -> ShnUser:
+    registered_user_id = await sync_to_async(request.session.get)(OTP_USER_SESSION)
+    if registered_user_id is None:
+        raise Http404()
+    try:
+        return await ShnUser.objects.aget(pk=registered_user_id)
+    except (ShnUser.DoesNotExist, ValidationError):
+        raise Http404()
+
+
+async def aset_session(request, key: str, value):
+    await sync_to_async(request.session.__setitem__)(key, value)
+
+
+class AsyncLoginMixin(AsyncRateLimitMixin):
+    http_method_names = ['get', 'post', 'options']
+
+    async def dispatch(self, request, *args, **kwargs):
+        # What ``LoginView.dispatch`` decorators do; CSRF is checked by ``CsrfViewMiddleware``.
+        request.sensitive_post_parameters = '__ALL__'
+        if self.redirect_authenticated_user and await sync_to_async(lambda: request.user.is_authenticated)():
+            response = HttpResponseRedirect(self.get_success_url())
+        else:
+            response = await super().dispatch(request, *args, **kwargs)
+        add_never_cache_headers(response)
+        return response
+
+    async def get(self, request, *args, **kwargs):
+        return self.render_to_response(self.get_context_data())
+
+    async def post(self, request, *args, **kwargs):
+        form = self.get_form()
+        # ``authenticate`` has no async version in this Django release.
+        if not await sync_to_async(form.is_valid)():
+            return self.form_invalid(form)
+
+        user = form.get_user()
+        if not await user.ahas_valid_otp(usage=enums.OTPUsageChoices.REGISTER):
+            await aset_session(request, OTP_USER_SESSION, str(user.id))
+            return self.confirm_required_response()
+
+        await sync_to_async(auth_login)(request, user)
+        return self.success_response()
+
+
+class AsyncRegisterMixin:
+    http_method_names = ['get', 'post', 'options']
+
+    async def get(self, request, *args, **kwargs):
+        self.object = None
+        return self.render_to_response(self.get_context_data())
+
+    async def post(self, request, *args, **kwargs):
+        self.object = None
+        form = self.get_form()
+        if not await sync_to_async(form.is_valid)():
+            return self.form_invalid(form)
+
+        self.object = await sync_to_async(form.save)()
+        await aset_session(request, OTP_USER_SESSION, form.get_user_id())
+        return HttpResponseRedirect(self.get_success_url())
+
+
+class AsyncSendOTPMixin(AsyncRateLimitMixin):
+
+    async def get(self, request):
+        registered_user = await aget_user_from_session(request)
+        try:
+            await registered_user.asend_otp(self.get_usage())
+        except SendOTPError:
+            return self.send_failed_response()
+        return self.sent_response()
+
+
+class AsyncConfirmOTPMixin:
+    """The user is loaded once per request by the async handlers; ``get_user_from_session`` then returns it."""
+    form_class = AsyncConfirmOTPForm
+    http_method_names = ['get', 'post', 'options']
+
+    def get_user_from_session(self):
+        return self.registered_user
+
+    async def get(self, request, *args, **kwargs):
+        self.registered_user = await aget_user_from_session(request)
+        return self.render_to_response(self.get_context_data())
+
+    async def post(self, request, *args, **kwargs):
+        self.registered_user = await aget_user_from_session(request)
+        form = self.get_form()
+        if not await form.ais_valid():
+            return self.form_invalid(form)
+        return await self.aform_valid(form)
+
+    async def aform_valid(self, form):
+        await form.aconfirm()
+        await sync_to_async(self.request.session.pop)(OTP_USER_SESSION)
+        return HttpResponseRedirect(self.get_success_url())
+
+
+class AsyncConfirmLoginOTPMixin(AsyncConfirmOTPMixin):
+
+    async def aform_valid(self, form):
+        await super().aform_valid(form)
+        await sync_to_async(auth_login)(self.request, form.user)
+        return self.success_response()
+
+
+class ShnLoginView(AsyncLoginMixin, users_views.ShnLoginView):
+    pass
+
+
+class RegisterView(AsyncRegisterMixin, users_views.RegisterView):
+    pass
+
+
+class SendRegisterOTPView(AsyncSendOTPMixin, users_views.SendRegisterOTPView):
+    pass
+
+
+class ConfirmRegisterOTPView(AsyncConfirmOTPMixin, users_views.ConfirmRegisterOTPView):
+    pass
+
+
+class SendLoginOTPView(AsyncSendOTPMixin, users_views.SendLoginOTPView):
+    pass
+
+
+class ConfirmLoginOTPView(AsyncConfirmLoginOTPMixin, users_views.ConfirmLoginOTPView):
+    pass
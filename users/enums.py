@@ -11,3 +11,9 @@ class UserTypeChoices(models.IntegerChoices):
 class OTPUsageChoices(models.TextChoices):
     REGISTER = 'RG', _('ثبت‌نام')
     RESET_PASSWORD = 'RP', _('فراموشی رمز‌عبور')
+
+
+class SMSStatusChoices(models.IntegerChoices):
+    PENDING = 0, _('در صف ارسال')
+    SENT = 1, _('ارسال شده')
+    FAILED = 2, _('ناموفق')
@@ -32,14 +32,18 @@ class ConfirmOTPForm(forms.Form):
         self.user = user
         self.usage = usage
 
+    @staticmethod
+    def otp_error(error: Exception) -> ValidationError:
+        if isinstance(error, OTPIsInvalid):
+            return ValidationError(_('رمز یک‌بارمصرف وارد شده صحیح نیست.'))
+        return ValidationError(_('لطفا یک رمز یک‌بارمصرف جدید دریافت کنید.'))
+
     def clean_otp(self):
         entered_otp = self.cleaned_data['otp']
         try:
             self.user.check_otp(self.usage, entered_otp)
-        except (OTPDoesNotExist, OTPExpired):
-            raise ValidationError(_('لطفا یک رمز یک‌بارمصرف جدید دریافت کنید.'))
-        except OTPIsInvalid:
-            raise ValidationError(_('رمز یک‌بارمصرف وارد شده صحیح نیست.'))
+        except (OTPDoesNotExist, OTPExpired, OTPIsInvalid) as error:
+            raise self.otp_error(error)
 
         return entered_otp
 
@@ -47,6 +51,26 @@ class ConfirmOTPForm(forms.Form):
         self.user.confirm_otp(self.usage)
 
 
+class AsyncConfirmOTPForm(ConfirmOTPForm):
+    """``ConfirmOTPForm`` for async views: the code is checked by ``ais_valid`` with the async OTP API."""
+
+    def clean_otp(self):
+        return self.cleaned_data['otp']
+
+    async def ais_valid(self) -> bool:
+        if not self.is_valid():
+            return False
+        try:
+            await self.user.acheck_otp(self.usage, self.cleaned_data['otp'])
+        except (OTPDoesNotExist, OTPExpired, OTPIsInvalid) as error:
+            self.add_error('otp', self.otp_error(error))
+            return False
+        return True
+
+    async def aconfirm(self):
+        await self.user.aconfirm_otp(self.usage)
+
+
 class ResetPasswordForm(PlaceholderFormMixin, forms.Form):
     mobile_validator = MobileNumberValidator()
     mobile = forms.CharField(validators=[mobile_validator], label=_('شماره موبایل'))
@@ -0,0 +1,27 @@
+"""Async counterparts of ``users.htmx.views``, built from the mixins in ``users.async_views``."""
+from users import async_views
+from users.htmx import views as users_htmx_views
+
+
+class ShnLoginHTMXView(async_views.AsyncLoginMixin, users_htmx_views.ShnLoginHTMXView):
+    pass
+
+
+class RegisterHTMXView(async_views.AsyncRegisterMixin, users_htmx_views.RegisterHTMXView):
+    """Renders on every GET: ``FragmentCacheMixin`` only wraps the sync ``get``."""
+
+
+class SendOTPRegisterHTMXView(async_views.AsyncSendOTPMixin, users_htmx_views.SendOTPRegisterHTMXView):
+    pass
+
+
+class ConfirmRegisterHTMXView(async_views.AsyncConfirmOTPMixin, users_htmx_views.ConfirmRegisterHTMXView):
+    pass
+
+
+class SendOTPLoginHTMXView(async_views.AsyncSendOTPMixin, users_htmx_views.SendOTPLoginHTMXView):
+    pass
+
+
+class ConfirmLoginHTMXView(async_views.AsyncConfirmLoginOTPMixin, users_htmx_views.ConfirmLoginHTMXView):
+    pass
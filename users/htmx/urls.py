@@ -1,16 +1,22 @@
+from django.conf import settings
 from django.urls import path
 
 from . import views as users_htmx_views
 
+if settings.USERS_ASYNC_VIEWS:
+    from . import async_views as flow_views
+else:
+    flow_views = users_htmx_views
+
 app_name = 'users-hx'
 
 urlpatterns = [
-    path('login-htmx/', users_htmx_views.ShnLoginHTMXView.as_view(), name='login-htmx'),
-    path('register-htmx/', users_htmx_views.RegisterHTMXView.as_view(), name='register-htmx'),
-    path('send-otp-register-htmx/', users_htmx_views.SendOTPRegisterHTMXView.as_view(), name='send-otp-register-htmx'),
-    path('confirm-register-htmx/', users_htmx_views.ConfirmRegisterHTMXView.as_view(), name='confirm-register-htmx'),
-    path('send-otp-login-htmx/', users_htmx_views.SendOTPLoginHTMXView.as_view(), name='send-otp-login-htmx'),
-    path('confirm-login-htmx/', users_htmx_views.ConfirmLoginHTMXView.as_view(), name='confirm-login-htmx'),
+    path('login-htmx/', flow_views.ShnLoginHTMXView.as_view(), name='login-htmx'),
+    path('register-htmx/', flow_views.RegisterHTMXView.as_view(), name='register-htmx'),
+    path('send-otp-register-htmx/', flow_views.SendOTPRegisterHTMXView.as_view(), name='send-otp-register-htmx'),
+    path('confirm-register-htmx/', flow_views.ConfirmRegisterHTMXView.as_view(), name='confirm-register-htmx'),
+    path('send-otp-login-htmx/', flow_views.SendOTPLoginHTMXView.as_view(), name='send-otp-login-htmx'),
+    path('confirm-login-htmx/', flow_views.ConfirmLoginHTMXView.as_view(), name='confirm-login-htmx'),
     path('reset-password-htmx/', users_htmx_views.ResetPasswordHTMXView.as_view(), name='reset-password-htmx'),
     path(
         'send-otp-reset-password-htmx/',
@@ -27,4 +33,19 @@ urlpatterns = [
         users_htmx_views.ConfirmResetPasswordHTMXView.as_view(),
         name='confirm-reset-password-htmx'
     ),
+    path(
+        'unread-notifications-htmx/',
+        users_htmx_views.UnreadNotificationsHTMXView.as_view(),
+        name='unread-notifications-htmx'
+    ),
+    path(
+        'mark-notifications-seen-htmx/',
+        users_htmx_views.MarkNotificationsSeenHTMXView.as_view(),
+        name='mark-notifications-seen-htmx'
+    ),
+    path(
+        'notifications-htmx/',
+        users_htmx_views.NotificationListHTMXView.as_view(),
+        name='notifications-htmx'
+    ),
 ]
@@ -1,9 +1,17 @@
+from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from django.views.generic import ListView, TemplateView
 from django_htmx.http import HttpResponseClientRefresh
 
+from common.mixins import FragmentCacheMixin, KeysetPaginationMixin
 from users import views as user_views
+from users.models import Notification
 
 
+# Without ``FragmentCacheMixin``: ``LoginView`` is ``never_cache``, so browsers would never revalidate the partial.
 class ShnLoginHTMXView(user_views.ShnLoginView):
     template_name = 'htmx/login_htmx.html'
     send_otp_url = reverse_lazy('users:users-hx:send-otp-login-htmx')
@@ -13,7 +21,7 @@ class ShnLoginHTMXView(user_views.ShnLoginView):
         return HttpResponseClientRefresh()
 
 
-class RegisterHTMXView(user_views.RegisterView):
+class RegisterHTMXView(FragmentCacheMixin, user_views.RegisterView):
     template_name = 'htmx/register_htmx.html'
     success_url = reverse_lazy('users:users-hx:send-otp-register-htmx')
 
@@ -38,7 +46,7 @@ class ConfirmLoginHTMXView(user_views.ConfirmLoginOTPView):
         return HttpResponseClientRefresh()
 
 
-class ResetPasswordHTMXView(user_views.ResetPasswordView):
+class ResetPasswordHTMXView(FragmentCacheMixin, user_views.ResetPasswordView):
     template_name = 'htmx/reset_password_htmx.html'
     success_url = reverse_lazy('users:users-hx:send-otp-reset-password-htmx')
 
@@ -55,3 +63,38 @@ class ConfirmResetPasswordOTPHTMXView(user_views.ConfirmResetPasswordOTPView):
 class ConfirmResetPasswordHTMXView(user_views.ConfirmResetPasswordView):
     template_name = 'htmx/confirm_reset_password_htmx.html'
     success_url = reverse_lazy('users:users-hx:login-htmx')
+
+
+def unread_notifications_etag(request):
+    # The user row is already loaded by the authentication middleware, so this costs no query.
+    if request.user.is_authenticated:
+        return str(request.user.unread_notifications)
+    return None
+
+
+@method_decorator(cache_control(private=True, no_cache=True), name='dispatch')
+@method_decorator(condition(etag_func=unread_notifications_etag), name='dispatch')
+class UnreadNotificationsHTMXView(LoginRequiredMixin, TemplateView):
+    """Polled by the header badge; answers 304 while the unread count is unchanged."""
+    template_name = 'htmx/unread_notifications_htmx.html'
+
+
+class MarkNotificationsSeenHTMXView(LoginRequiredMixin, TemplateView):
+    template_name = 'htmx/unread_notifications_htmx.html'
+    http_method_names = ['post']
+
+    def post(self, request, *args, **kwargs):
+        Notification.objects.mark_all_seen(request.user)
+        request.user.refresh_from_db(fields=['unread_notifications'])
+        return self.render_to_response(self.get_context_data())
+
+
+class NotificationListHTMXView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
+    """The user's notifications, newest first; each page loads the next one when its end is revealed."""
+    template_name = 'htmx/notifications_htmx.html'
+    context_object_name = 'notifications'
+    paginate_by = 10
+
+    def get_queryset(self):
+        # Served by ``users_notification_list_idx``.
+        return Notification.objects.filter(user=self.request.user).order_by('-created_at', '-pk')
@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from users import enums
+from users.models import AuthOTP, ShnUser
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a large AuthOTP table, print the query plans of the OTP lookups and fail if any of them scans the whole '
+        'table. Everything is written inside a transaction that is rolled back at the end, so it can run in CI.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2_000_000)
+        parser.add_argument('--users', type=int, default=50_000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--analyze', action='store_true', help='Run the queries (EXPLAIN ANALYZE).')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Query plans are only checked on PostgreSQL.')
+        with transaction.atomic():
+            failures = self.explain_all(options)
+            transaction.set_rollback(True)
+        if failures:
+            raise CommandError(f'Sequential scan on {AuthOTP._meta.db_table} in: {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS('All OTP lookups use an index.'))
+
+    def seed(self, options):
+        users = [
+            ShnUser(username=f'explain-{index}', mobile=f'00{index:09d}', password='!')
+            for index in range(options['users'])
+        ]
+        ShnUser.objects.bulk_create(users, batch_size=options['batch_size'])
+        # Confirmations spread over a year, with one pending code in every three rows.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {AuthOTP._meta.db_table} (user_id, usage, code, created_at, attempts, confirmed) '
+                f'SELECT seeded.ids[(1 + mod(serial, seeded.total))::int], '
+                f'CASE WHEN mod(serial, 2) = 0 THEN %s ELSE %s END, lpad(mod(serial, 100000)::text, 5, %s), '
+                f'now() - mod(serial, 525600) * interval %s, 0, mod(serial, 3) <> 0 '
+                f'FROM generate_series(1, %s) serial, ('
+                f'SELECT array_agg(id) ids, count(*) total FROM {ShnUser._meta.db_table} WHERE username LIKE %s'
+                f') seeded',
+                [
+                    enums.OTPUsageChoices.REGISTER, enums.OTPUsageChoices.RESET_PASSWORD, '0', '1 minute',
+                    options['rows'], 'explain-%',
+                ]
+            )
+            cursor.execute(f'ANALYZE {AuthOTP._meta.db_table}')
+        return users[len(users) // 2]
+
+    def explain_all(self, options) -> list:
+        user = self.seed(options)
+        usage = enums.OTPUsageChoices.REGISTER
+        queries = {
+            'has_valid_otp': AuthOTP.objects.confirmed(user, usage, settings.OTP_VALIDITY_MINUTES).values('pk')[:1],
+            'send_otp': AuthOTP.objects.pending(user, usage).values('pk')[:1],
+            'check_otp': AuthOTP.objects.pending(user, usage).order_by('-created_at')[:1],
+            'confirm_otp': AuthOTP.objects.filter(user=user, usage=usage).order_by('-created_at')[:1],
+        }
+        failures = []
+        for name, queryset in queries.items():
+            plan = queryset.explain(analyze=options['analyze'])
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(plan)
+            if f'Seq Scan on {AuthOTP._meta.db_table}' in plan:
+                failures.append(name)
+        return failures
@@ -0,0 +1,119 @@
+import asyncio
+import statistics
+import time
+from importlib import import_module
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import BaseCommand
+from django.test import AsyncClient, override_settings
+from django.urls import include, path
+from django.utils.http import urlencode
+
+from users import async_views, enums, views as users_views
+from users.models import AuthOTP, SMSMessage, ShnUser
+from users.otp import CacheOTPBackend, get_otp_backend
+from users.views import OTP_USER_SESSION
+
+USERNAME_PREFIX = 'loadtest-'
+# The test client's multipart body cannot be read by the ASGI request in this Django release.
+FORM_CONTENT_TYPE = 'application/x-www-form-urlencoded'
+
+# Both versions of the register OTP flow, served side by side while the command runs.
+urlpatterns = [
+    path('', include('shajarehnaameh.urls')),
+    path('loadtest/sync/send-otp/', users_views.SendRegisterOTPView.as_view()),
+    path('loadtest/sync/confirm/', users_views.ConfirmRegisterOTPView.as_view()),
+    path('loadtest/async/send-otp/', async_views.SendRegisterOTPView.as_view()),
+    path('loadtest/async/confirm/', async_views.ConfirmRegisterOTPView.as_view()),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Run concurrent register OTP flows (send the code, then confirm it) through the ASGI handler, once with the '
+        'sync views and once with the async ones, and compare their throughput. Rate limits are disabled and the '
+        'users, sessions and queued messages created are deleted at the end.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--flows', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--modes', nargs='+', choices=('sync', 'async'), default=['sync', 'async'])
+
+    def handle(self, *args, **options):
+        self.session_keys = []
+        self.cleanup()
+        overrides = {'ROOT_URLCONF': __name__, 'RATE_LIMITS': {}, 'ALLOWED_HOSTS': ['testserver']}
+        try:
+            with override_settings(**overrides):
+                for mode in options['modes']:
+                    sessions = self.create_sessions(mode, options['flows'])
+                    results = asyncio.run(self.run_flows(mode, sessions, options['concurrency']))
+                    self.report(mode, *results)
+        finally:
+            self.cleanup()
+
+    def create_sessions(self, mode, count) -> list:
+        """One user with a registration waiting for its OTP, and its session key, per flow."""
+        offset = len(self.session_keys)
+        users = ShnUser.objects.bulk_create([
+            ShnUser(username=f'{USERNAME_PREFIX}{mode}-{index}', mobile=f'01{offset + index:09d}', password='!')
+            for index in range(count)
+        ])
+        session_store = import_module(settings.SESSION_ENGINE).SessionStore
+        sessions = []
+        for user in users:
+            session = session_store()
+            session[OTP_USER_SESSION] = str(user.pk)
+            session.create()
+            sessions.append((user, session.session_key))
+            self.session_keys.append(session.session_key)
+        return sessions
+
+    @staticmethod
+    def get_code(user) -> str:
+        usage = enums.OTPUsageChoices.REGISTER
+        if isinstance(get_otp_backend(), CacheOTPBackend):
+            return caches[settings.OTP_CACHE_ALIAS].get(CacheOTPBackend._keys(user, usage)[0])
+        return AuthOTP.objects.pending(user, usage).latest('created_at').code
+
+    async def run_flow(self, mode, user, session_key, semaphore) -> tuple:
+        async with semaphore:
+            client = AsyncClient()
+            client.cookies[settings.SESSION_COOKIE_NAME] = session_key
+            started = time.perf_counter()
+            sent = await client.get(f'/loadtest/{mode}/send-otp/')
+            code = await sync_to_async(self.get_code)(user)
+            confirmed = await client.post(
+                f'/loadtest/{mode}/confirm/', urlencode({'otp': code or ''}), content_type=FORM_CONTENT_TYPE
+            )
+            ok = sent.status_code == 302 and confirmed.status_code == 302
+            return time.perf_counter() - started, ok
+
+    async def run_flows(self, mode, sessions, concurrency) -> tuple:
+        semaphore = asyncio.Semaphore(concurrency)
+        started = time.perf_counter()
+        results = await asyncio.gather(*[
+            self.run_flow(mode, user, session_key, semaphore) for user, session_key in sessions
+        ])
+        return time.perf_counter() - started, results
+
+    def report(self, mode, elapsed, results):
+        latencies = sorted(latency for latency, _ in results)
+        failed = sum(1 for _, ok in results if not ok)
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{mode} views'))
+        self.stdout.write(
+            f'{len(results)} flows in {elapsed:.2f}s: {len(results) / elapsed:.1f} flows/s, '
+            f'median {statistics.median(latencies) * 1000:.1f}ms, '
+            f'p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f}ms, {failed} failed'
+        )
+
+    def cleanup(self):
+        users = ShnUser.objects.filter(username__startswith=USERNAME_PREFIX)
+        SMSMessage.objects.filter(mobile__in=users.values('mobile')).delete()
+        users.delete()
+        session_store = import_module(settings.SESSION_ENGINE).SessionStore
+        for session_key in self.session_keys:
+            session_store(session_key).delete()
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management import BaseCommand
+
+from users.tasks import OTP_PURGE_BATCH_SIZE, purge_expired_otps, purge_sms_messages
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete expired OTP codes, outdated confirmations and old sent or failed SMS messages in small batches. Run it '
+        'periodically, e.g. from cron, or keep it running with --every.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=OTP_PURGE_BATCH_SIZE)
+        parser.add_argument('--pause', type=float, default=0.1, help='Seconds to wait between batches.')
+        parser.add_argument('--every', type=int, default=None, help='Repeat the purge every given number of seconds.')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            deleted = purge_expired_otps(
+                options['batch_size'], options['pause'],
+                on_batch=lambda count: self.stdout.write(f'{count} rows deleted'),
+            )
+            messages = purge_sms_messages(
+                options['batch_size'], options['pause'],
+                on_batch=lambda count: self.stdout.write(f'{count} SMS messages deleted'),
+            )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'{deleted} expired OTP rows and {messages} SMS messages purged '
+                    f'in {time.perf_counter() - started:.1f}s.'
+                )
+            )
+            if options['every'] is None:
+                return
+            time.sleep(options['every'])
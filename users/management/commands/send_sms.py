@@ -0,0 +1,24 @@
+import time
+
+from django.core.management import BaseCommand
+
+from users.tasks import SMS_BATCH_SIZE, deliver_sms_batch
+
+
+class Command(BaseCommand):
+    help = 'Send queued SMS messages in batches, retrying failed ones with backoff. Keeps polling unless --once.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=SMS_BATCH_SIZE)
+        parser.add_argument('--poll', type=float, default=1, help='Seconds to wait when the queue is empty.')
+        parser.add_argument('--once', action='store_true', help='Send the due messages and exit.')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = deliver_sms_batch(options['batch_size'])
+            if sent or failed:
+                self.stdout.write(f'{sent} messages sent, {failed} failed')
+                continue
+            if options['once']:
+                return
+            time.sleep(options['poll'])
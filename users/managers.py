@@ -1,10 +1,114 @@
-from django.db import models
+from collections import Counter
 
+from django.apps import apps
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from common.events import publish_on_commit
 from users.helpers import generate_otp_code
 
+NOTIFICATIONS_EVENT_CHANNEL = 'notifications:{user_id}'
+
+
+class AuthOTPQuerySet(models.QuerySet):
+
+    def pending(self, user, usage):
+        """Codes of ``user`` not confirmed and not expired yet; served by ``users_authotp_lookup_idx``."""
+        unexpired_otp_time = timezone.now() - timezone.timedelta(minutes=settings.OTP_EXP_MINUTES)
+        return self.filter(user=user, usage=usage, confirmed=False, created_at__gt=unexpired_otp_time)
 
-class AuthOTPManager(models.Manager):
+    def confirmed(self, user, usage, validity_minutes: int):
+        """Confirmations of ``user`` that are still valid; served by ``users_authotp_confirmed_idx``."""
+        validity_period = timezone.now() - timezone.timedelta(minutes=validity_minutes)
+        return self.filter(user=user, usage=usage, confirmed=True, created_at__gt=validity_period)
+
+
+class AuthOTPManager(models.Manager.from_queryset(AuthOTPQuerySet)):
 
     def create_otp(self, **kwargs):
         otp_code = generate_otp_code()
         return self.create(code=otp_code, **kwargs)
+
+
+class SMSMessageManager(models.Manager):
+
+    def enqueue(self, mobile: str, text: str):
+        return self.create(mobile=mobile, text=text, next_attempt_at=timezone.now())
+
+    async def aenqueue(self, mobile: str, text: str):
+        return await self.acreate(mobile=mobile, text=text, next_attempt_at=timezone.now())
+
+
+NOTIFICATION_BATCH_SIZE = 1000
+
+
+def _change_unread_counts(counts: Counter, sign: int = 1):
+    """
+    Add (or with ``sign=-1`` subtract) ``counts[user_id]`` to the users' unread counters, with one update per
+    distinct count; in a fan-out almost every count is 1.
+    """
+    user_ids_by_count = {}
+    for user_id, count in counts.items():
+        user_ids_by_count.setdefault(count, []).append(user_id)
+    for count, user_ids in user_ids_by_count.items():
+        apps.get_model('users', 'ShnUser').objects.filter(pk__in=user_ids).update(
+            unread_notifications=F('unread_notifications') + sign * count
+        )
+    for user_id in counts:
+        publish_notifications_changed(user_id)
+
+
+def publish_notifications_changed(user_id):
+    publish_on_commit(NOTIFICATIONS_EVENT_CHANNEL.format(user_id=user_id), None)
+
+
+class NotificationQuerySet(models.QuerySet):
+
+    def unseen(self):
+        """Served by the partial ``users_notification_unseen_idx``."""
+        return self.filter(seen=False)
+
+    def mark_seen(self) -> int:
+        """Mark the notifications as seen in bulk, keeping the unread counters of their users in step."""
+        with transaction.atomic():
+            # Locked, so that concurrent calls do not decrement the counters twice for the same rows.
+            rows = list(self.unseen().select_for_update().values_list('pk', 'user_id'))
+            updated = self.model.objects.filter(pk__in=[pk for pk, _ in rows]).update(seen=True)
+            _change_unread_counts(Counter(user_id for _, user_id in rows), sign=-1)
+        return updated
+
+    def delete(self):
+        with transaction.atomic():
+            counts = Counter(self.unseen().select_for_update().values_list('user_id', flat=True))
+            result = super().delete()
+            _change_unread_counts(counts, sign=-1)
+        return result
+
+
+class NotificationManager(models.Manager.from_queryset(NotificationQuerySet)):
+
+    def mark_all_seen(self, user) -> int:
+        return self.filter(user=user).mark_seen()
+
+    def bulk_notify(self, user_ids, title: str, content: str, batch_size: int = NOTIFICATION_BATCH_SIZE) -> int:
+        """
+        Fan a notification out to every user in ``user_ids`` (ids or a ``values_list`` queryset), with one insert
+        and one counter update per batch.
+        """
+        created, batch = 0, []
+        for user_id in user_ids:
+            batch.append(user_id)
+            if len(batch) == batch_size:
+                created += self._notify_batch(batch, title, content)
+                batch = []
+        if batch:
+            created += self._notify_batch(batch, title, content)
+        return created
+
+    def _notify_batch(self, user_ids: list, title: str, content: str) -> int:
+        with transaction.atomic():
+            self.bulk_create([self.model(user_id=user_id, title=title, content=content) for user_id in user_ids])
+            _change_unread_counts(Counter(user_ids))
+        return len(user_ids)
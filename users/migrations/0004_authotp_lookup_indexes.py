@@ -0,0 +1,34 @@
+# Generated by Django 4.1.13 on 2026-10-18 06:41
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_authotp_usage_alter_shnuser_mobile'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='authotp',
+            name='usage',
+            field=models.CharField(choices=[('RG', 'ثبت\u200cنام'), ('RP', 'فراموشی رمز\u200cعبور')], max_length=2, verbose_name='کاربرد'),
+        ),
+        migrations.AddIndex(
+            model_name='authotp',
+            index=models.Index(fields=['user', 'usage', 'created_at'], name='users_authotp_lookup_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='authotp',
+            index=models.Index(condition=models.Q(('confirmed', True)), fields=['user', 'usage', 'created_at'], name='users_authotp_confirmed_idx'),
+        ),
+        # The FK index is dropped only once the composite index starting with user_id exists.
+        migrations.AlterField(
+            model_name='authotp',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='کاربر'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.13 on 2026-10-18 06:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_authotp_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='authotp',
+            index=models.Index(fields=['confirmed', 'created_at'], name='users_authotp_purge_idx'),
+        ),
+    ]
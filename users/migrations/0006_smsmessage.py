@@ -0,0 +1,35 @@
+# Generated by Django 4.1.13 on 2026-10-18 06:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_authotp_purge_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SMSMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mobile', models.CharField(max_length=11, verbose_name='شماره موبایل')),
+                ('text', models.TextField(verbose_name='متن')),
+                ('status', models.SmallIntegerField(choices=[(0, 'در صف ارسال'), (1, 'ارسال شده'), (2, 'ناموفق')], default=0, verbose_name='وضعیت')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='تعداد تلاش')),
+                ('next_attempt_at', models.DateTimeField(verbose_name='زمان تلاش بعدی')),
+                ('last_error', models.TextField(blank=True, verbose_name='آخرین خطا')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='زمان ایجاد')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='زمان ارسال')),
+            ],
+            options={
+                'verbose_name': 'پیامک',
+                'verbose_name_plural': 'پیامک\u200cها',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='smsmessage',
+            index=models.Index(condition=models.Q(('status', 0)), fields=['next_attempt_at'], name='users_smsmessage_pending_idx'),
+        ),
+    ]
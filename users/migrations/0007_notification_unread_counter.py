@@ -0,0 +1,34 @@
+# Generated by Django 4.1.13 on 2026-10-18 06:49
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_unread_notifications(apps, schema_editor):
+    ShnUser = apps.get_model('users', 'ShnUser')
+    Notification = apps.get_model('users', 'Notification')
+    unread = Notification.objects.filter(user=OuterRef('pk'), seen=False).values('user').annotate(
+        count=Count('pk')
+    ).values('count')
+    ShnUser.objects.update(unread_notifications=Coalesce(Subquery(unread), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_smsmessage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shnuser',
+            name='unread_notifications',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='اعلان\u200cهای خوانده نشده'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('seen', False)), fields=['user', 'created_at'], name='users_notification_unseen_idx'),
+        ),
+        migrations.RunPython(fill_unread_notifications, migrations.RunPython.noop),
+    ]
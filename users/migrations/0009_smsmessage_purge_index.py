@@ -0,0 +1,22 @@
+# Generated by Django 4.1.13 on 2026-10-18 07:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_notification_list_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='smsmessage',
+            name='text',
+            field=models.TextField(blank=True, verbose_name='متن'),
+        ),
+        migrations.AddIndex(
+            model_name='smsmessage',
+            index=models.Index(fields=['created_at'], name='users_smsmessage_purge_idx'),
+        ),
+    ]
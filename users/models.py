@@ -2,14 +2,14 @@ import uuid
 
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django_jalali.db import models as j_models
 
 from . import enums
-from .exeptions import SendOTPError, OTPDoesNotExist, OTPExpired, OTPIsInvalid
-from .managers import AuthOTPManager
+from .managers import AuthOTPManager, NotificationManager, SMSMessageManager, publish_notifications_changed
+from .otp import get_otp_backend
 from .validators import MobileNumberValidator
 
 
@@ -29,6 +29,10 @@ class ShnUser(AbstractUser):
         verbose_name=_('نوع کاربر'), choices=enums.UserTypeChoices.choices, default=enums.UserTypeChoices.NORMAL
     )
     image = models.ImageField(verbose_name=_('عکس'), null=True, blank=True)
+    # Kept in step by ``Notification`` and its manager, so the header badge needs no count query.
+    unread_notifications = models.PositiveIntegerField(
+        verbose_name=_('اعلان‌های خوانده نشده'), default=0, editable=False
+    )
 
     USERNAME_FIELD = 'mobile'
 
@@ -39,46 +43,45 @@ class ShnUser(AbstractUser):
     def __str__(self):
         return self.mobile
 
-    def send_otp(self, usage: enums.OTPUsageChoices):
-        unexpired_otp_time = timezone.now() - timezone.timedelta(minutes=settings.OTP_EXP_MINUTES)
-        unexpired_otp_exists = self.authotp_set.filter(
-            usage=usage, confirmed=False, created_at__gt=unexpired_otp_time
-        ).exists()
-        if unexpired_otp_exists:
-            raise SendOTPError()
+    def save(self, *args, **kwargs):
+        # The unread counter is only written with ``F()`` updates; a full save of a stale instance would reset it.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'unread_notifications'
+            ]
+        super().save(*args, **kwargs)
 
-        otp = AuthOTP.objects.create_otp(user=self, usage=usage)
-        otp.send_by_sms()
+    def send_otp(self, usage: enums.OTPUsageChoices):
+        get_otp_backend().send(self, usage)
 
     def check_otp(self, usage: enums.OTPUsageChoices, otp_code: str):
-        unexpired_otp_time = timezone.now() - timezone.timedelta(minutes=settings.OTP_EXP_MINUTES)
-        try:
-            otp = self.authotp_set.filter(
-                usage=usage, confirmed=False, created_at__gt=unexpired_otp_time
-            ).latest('created_at')
-        except AuthOTP.DoesNotExist:
-            raise OTPDoesNotExist()
-
-        if otp.expired or otp.attempts > 3:
-            raise OTPExpired()
-
-        if otp.code != otp_code:
-            otp.attempts += 1
-            otp.save()
-            raise OTPIsInvalid()
+        get_otp_backend().check(self, usage, otp_code)
 
     def confirm_otp(self, usage: enums.OTPUsageChoices):
-        otp = self.authotp_set.filter(usage=usage).latest('created_at')
-        otp.confirmed = True
-        otp.save()
+        get_otp_backend().confirm(self, usage)
 
     def has_valid_otp(self, usage: enums.OTPUsageChoices, validity_minutes: int = settings.OTP_VALIDITY_MINUTES):
-        validity_period = timezone.now() - timezone.timedelta(minutes=validity_minutes)
-        return self.authotp_set.filter(confirmed=True, usage=usage, created_at__gt=validity_period).exists()
+        return AuthOTP.objects.confirmed(self, usage, validity_minutes).exists()
+
+    async def asend_otp(self, usage: enums.OTPUsageChoices):
+        await get_otp_backend().asend(self, usage)
+
+    async def acheck_otp(self, usage: enums.OTPUsageChoices, otp_code: str):
+        await get_otp_backend().acheck(self, usage, otp_code)
+
+    async def aconfirm_otp(self, usage: enums.OTPUsageChoices):
+        await get_otp_backend().aconfirm(self, usage)
+
+    async def ahas_valid_otp(
+            self, usage: enums.OTPUsageChoices, validity_minutes: int = settings.OTP_VALIDITY_MINUTES
+    ) -> bool:
+        return await AuthOTP.objects.confirmed(self, usage, validity_minutes).aexists()
 
 
 class AuthOTP(models.Model):
-    user = models.ForeignKey('users.ShnUser', on_delete=models.CASCADE, verbose_name=_('کاربر'))
+    # Indexed as the leading column of ``users_authotp_lookup_idx``.
+    user = models.ForeignKey('users.ShnUser', on_delete=models.CASCADE, verbose_name=_('کاربر'), db_index=False)
     usage = models.CharField(max_length=2, verbose_name=_('کاربرد'), choices=enums.OTPUsageChoices.choices)
     code = models.CharField(max_length=5, verbose_name=_('رمز یک‌بارمصرف'))
     created_at = models.DateTimeField(auto_now=True, verbose_name=_('زمان ایجاد'))
@@ -91,6 +94,14 @@ class AuthOTP(models.Model):
         verbose_name = _('رمز یک‌بارمصرف')
         verbose_name_plural = _('رمز‌های یک‌بارمصرف')
         ordering = ('created_at', )
+        indexes = [
+            models.Index(fields=('user', 'usage', 'created_at'), name='users_authotp_lookup_idx'),
+            models.Index(
+                fields=('user', 'usage', 'created_at'), condition=models.Q(confirmed=True),
+                name='users_authotp_confirmed_idx'
+            ),
+            models.Index(fields=('confirmed', 'created_at'), name='users_authotp_purge_idx'),
+        ]
 
     @property
     def expired(self) -> bool:
@@ -98,7 +109,44 @@ class AuthOTP(models.Model):
         return timezone.now() > expiration_time
 
     def send_by_sms(self):
-        print(self.code)
+        """Queue the code for the SMS worker once the current transaction commits."""
+        mobile, text = self.user.mobile, str(_('رمز یک‌بارمصرف شجره‌نامه: %(code)s') % {'code': self.code})
+        transaction.on_commit(lambda: SMSMessage.objects.enqueue(mobile, text))
+
+    async def asend_by_sms(self):
+        """Queue the code for the SMS worker; async code runs in autocommit, so it is queued right away."""
+        mobile, text = self.user.mobile, str(_('رمز یک‌بارمصرف شجره‌نامه: %(code)s') % {'code': self.code})
+        await SMSMessage.objects.aenqueue(mobile, text)
+
+
+class SMSMessage(models.Model):
+    mobile = models.CharField(max_length=11, verbose_name=_('شماره موبایل'))
+    # Holds login codes; cleared once the message is sent or has failed.
+    text = models.TextField(verbose_name=_('متن'), blank=True)
+    status = models.SmallIntegerField(
+        verbose_name=_('وضعیت'), choices=enums.SMSStatusChoices.choices, default=enums.SMSStatusChoices.PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(verbose_name=_('تعداد تلاش'), default=0)
+    next_attempt_at = models.DateTimeField(verbose_name=_('زمان تلاش بعدی'))
+    last_error = models.TextField(verbose_name=_('آخرین خطا'), blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('زمان ایجاد'))
+    sent_at = models.DateTimeField(verbose_name=_('زمان ارسال'), null=True, blank=True)
+
+    objects = SMSMessageManager()
+
+    class Meta:
+        verbose_name = _('پیامک')
+        verbose_name_plural = _('پیامک‌ها')
+        indexes = [
+            models.Index(
+                fields=('next_attempt_at', ), condition=models.Q(status=enums.SMSStatusChoices.PENDING),
+                name='users_smsmessage_pending_idx'
+            ),
+            models.Index(fields=('created_at', ), name='users_smsmessage_purge_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.mobile}: {self.get_status_display()}'
 
 
 class Notification(models.Model):
@@ -108,9 +156,46 @@ class Notification(models.Model):
     seen = models.BooleanField(verbose_name=_('خوانده شده'), default=False)
     created_at = j_models.jDateTimeField(auto_now_add=True, verbose_name=_('زمان ایجاد'))
 
+    objects = NotificationManager()
+
     class Meta:
         verbose_name = _('اعلان')
         verbose_name_plural = _('اعلان‌ها')
+        indexes = [
+            models.Index(
+                fields=('user', 'created_at'), condition=models.Q(seen=False), name='users_notification_unseen_idx'
+            ),
+            models.Index(fields=('user', 'created_at'), name='users_notification_list_idx'),
+        ]
 
     def __str__(self):
         return self.title
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_unread = not instance.__dict__.get('seen', True)
+        return instance
+
+    def _change_unread_count(self, change: int):
+        ShnUser.objects.filter(pk=self.user_id).update(unread_notifications=models.F('unread_notifications') + change)
+        publish_notifications_changed(self.user_id)
+
+    def save(self, *args, **kwargs):
+        was_unread = getattr(self, '_loaded_unread', False) if not self._state.adding else False
+        with transaction.atomic():
+            if was_unread != (not self.seen):
+                # Re-read under a lock, as the row may have been marked seen since it was loaded.
+                was_unread = Notification.objects.select_for_update().filter(pk=self.pk, seen=False).exists()
+            super().save(*args, **kwargs)
+            if was_unread != (not self.seen):
+                self._change_unread_count(-1 if was_unread else 1)
+        self._loaded_unread = not self.seen
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            was_unread = Notification.objects.select_for_update().filter(pk=self.pk, seen=False).exists()
+            result = super().delete(*args, **kwargs)
+            if was_unread:
+                self._change_unread_count(-1)
+        return result
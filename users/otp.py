@@ -0,0 +1,149 @@
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.utils.module_loading import import_string
+
+from users import enums
+from users.exeptions import OTPDoesNotExist, OTPExpired, OTPIsInvalid, SendOTPError
+from users.helpers import generate_otp_code
+
+
+class BaseOTPBackend:
+    """
+    Strategy used by ``ShnUser.send_otp``/``check_otp``/``confirm_otp`` to keep the codes not confirmed yet. The
+    ``a``-prefixed methods are used by the async views; by default they run the sync ones in a thread.
+    """
+
+    def send(self, user, usage: enums.OTPUsageChoices):
+        raise NotImplementedError('subclasses of BaseOTPBackend must provide a send() method')
+
+    def check(self, user, usage: enums.OTPUsageChoices, otp_code: str):
+        raise NotImplementedError('subclasses of BaseOTPBackend must provide a check() method')
+
+    def confirm(self, user, usage: enums.OTPUsageChoices):
+        raise NotImplementedError('subclasses of BaseOTPBackend must provide a confirm() method')
+
+    async def asend(self, user, usage: enums.OTPUsageChoices):
+        await sync_to_async(self.send)(user, usage)
+
+    async def acheck(self, user, usage: enums.OTPUsageChoices, otp_code: str):
+        await sync_to_async(self.check)(user, usage, otp_code)
+
+    async def aconfirm(self, user, usage: enums.OTPUsageChoices):
+        await sync_to_async(self.confirm)(user, usage)
+
+
+class DatabaseOTPBackend(BaseOTPBackend):
+    """Keeps every code as an ``AuthOTP`` row."""
+
+    def send(self, user, usage):
+        if apps.get_model('users', 'AuthOTP').objects.pending(user, usage).exists():
+            raise SendOTPError()
+        otp = apps.get_model('users', 'AuthOTP').objects.create_otp(user=user, usage=usage)
+        otp.send_by_sms()
+
+    def check(self, user, usage, otp_code):
+        try:
+            otp = apps.get_model('users', 'AuthOTP').objects.pending(user, usage).latest('created_at')
+        except apps.get_model('users', 'AuthOTP').DoesNotExist:
+            raise OTPDoesNotExist()
+
+        if otp.expired or otp.attempts > settings.OTP_MAX_ATTEMPTS:
+            raise OTPExpired()
+
+        if otp.code != otp_code:
+            # Updated in the database so that concurrent attempts are all counted.
+            type(otp).objects.filter(pk=otp.pk).update(attempts=F('attempts') + 1)
+            raise OTPIsInvalid()
+
+    def confirm(self, user, usage):
+        otp = user.authotp_set.filter(usage=usage).latest('created_at')
+        otp.confirmed = True
+        otp.save()
+
+
+class CacheOTPBackend(BaseOTPBackend):
+    """
+    Keeps live codes in the cache, expiring with its TTL, and counts attempts with the atomic ``incr``. Only the
+    confirmation is written to the database, as the ``AuthOTP`` row ``ShnUser.has_valid_otp`` looks for.
+    """
+
+    def __init__(self):
+        self.cache = caches[settings.OTP_CACHE_ALIAS]
+
+    @staticmethod
+    def _keys(user, usage) -> tuple:
+        return f'users:otp:{user.pk}:{usage}', f'users:otp-attempts:{user.pk}:{usage}'
+
+    def send(self, user, usage):
+        code_key, attempts_key = self._keys(user, usage)
+        timeout = settings.OTP_EXP_MINUTES * 60
+        code = generate_otp_code()
+        # ``add`` only writes when there is no live code, which replaces the separate existence check.
+        if not self.cache.add(code_key, code, timeout):
+            raise SendOTPError()
+        self.cache.set(attempts_key, 0, timeout)
+        apps.get_model('users', 'AuthOTP')(user=user, usage=usage, code=code).send_by_sms()
+
+    def check(self, user, usage, otp_code):
+        code_key, attempts_key = self._keys(user, usage)
+        code = self.cache.get(code_key)
+        if code is None:
+            raise OTPDoesNotExist()
+        try:
+            attempts = self.cache.incr(attempts_key)
+        except ValueError:
+            raise OTPExpired()
+
+        # Every check is counted, so this is the number of failed attempts before this one.
+        if attempts - 1 > settings.OTP_MAX_ATTEMPTS:
+            raise OTPExpired()
+
+        if code != otp_code:
+            raise OTPIsInvalid()
+
+    def confirm(self, user, usage):
+        code_key, attempts_key = self._keys(user, usage)
+        code = self.cache.get(code_key, '')
+        apps.get_model('users', 'AuthOTP').objects.create(user=user, usage=usage, code=code, confirmed=True)
+        self.cache.delete_many([code_key, attempts_key])
+
+    async def asend(self, user, usage):
+        code_key, attempts_key = self._keys(user, usage)
+        timeout = settings.OTP_EXP_MINUTES * 60
+        code = generate_otp_code()
+        if not await self.cache.aadd(code_key, code, timeout):
+            raise SendOTPError()
+        await self.cache.aset(attempts_key, 0, timeout)
+        await apps.get_model('users', 'AuthOTP')(user=user, usage=usage, code=code).asend_by_sms()
+
+    async def acheck(self, user, usage, otp_code):
+        code_key, attempts_key = self._keys(user, usage)
+        code = await self.cache.aget(code_key)
+        if code is None:
+            raise OTPDoesNotExist()
+        try:
+            attempts = await self.cache.aincr(attempts_key)
+        except ValueError:
+            raise OTPExpired()
+
+        if attempts - 1 > settings.OTP_MAX_ATTEMPTS:
+            raise OTPExpired()
+
+        if code != otp_code:
+            raise OTPIsInvalid()
+
+    async def aconfirm(self, user, usage):
+        code_key, attempts_key = self._keys(user, usage)
+        code = await self.cache.aget(code_key, '')
+        await apps.get_model('users', 'AuthOTP').objects.acreate(user=user, usage=usage, code=code, confirmed=True)
+        await self.cache.adelete_many([code_key, attempts_key])
+
+
+@lru_cache(maxsize=None)
+def get_otp_backend() -> BaseOTPBackend:
+    return import_string(settings.OTP_BACKEND)()
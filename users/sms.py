@@ -0,0 +1,57 @@
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from users.exeptions import SMSDeliveryError
+
+
+def describe_error(error: Exception) -> str:
+    if isinstance(error, SMSDeliveryError) and str(error):
+        return str(error)
+    return f'{error.__class__.__name__}: {error}' if str(error) else error.__class__.__name__
+
+
+class BaseSMSGateway:
+    """Provider used by the SMS worker. Gateways with a bulk API should override ``send_many``."""
+
+    def send(self, mobile: str, text: str):
+        """Deliver one message, raising ``SMSDeliveryError`` when the provider refuses it."""
+        raise NotImplementedError('subclasses of BaseSMSGateway must provide a send() method')
+
+    def send_many(self, messages) -> list:
+        """
+        Deliver a batch of ``SMSMessage``; return the error of each message, ``None`` for the delivered ones. Any
+        exception of ``send``, e.g. a timeout, fails only its own message.
+        """
+        errors = []
+        for message in messages:
+            try:
+                self.send(message.mobile, message.text)
+            except Exception as error:
+                errors.append(describe_error(error))
+            else:
+                errors.append(None)
+        return errors
+
+
+class ConsoleSMSGateway(BaseSMSGateway):
+
+    def send(self, mobile, text):
+        print(f'{mobile}: {text}')
+
+
+class FakeSMSGateway(BaseSMSGateway):
+    """Keeps delivered messages in ``outbox``; mobiles listed in ``failing`` are refused. Meant for tests."""
+    outbox = []
+    failing = set()
+
+    def send(self, mobile, text):
+        if mobile in self.failing:
+            raise SMSDeliveryError(f'{mobile} is not reachable')
+        self.outbox.append((mobile, text))
+
+
+@lru_cache(maxsize=None)
+def get_sms_gateway() -> BaseSMSGateway:
+    return import_string(settings.SMS_GATEWAY)()
@@ -0,0 +1,94 @@
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from users.enums import SMSStatusChoices
+from users.models import AuthOTP, SMSMessage
+from users.sms import describe_error, get_sms_gateway
+
+OTP_PURGE_BATCH_SIZE = 5000
+SMS_BATCH_SIZE = 100
+
+
+def purge_expired_otps(batch_size: int = OTP_PURGE_BATCH_SIZE, pause: float = 0, on_batch=None) -> int:
+    """
+    Delete codes that were never confirmed and are expired, and confirmations older than the validity period.
+    Rows are deleted in batches of ``batch_size``. Meant to be scheduled, e.g. by running the ``purge_expired_otps``
+    command from cron.
+    """
+    now = timezone.now()
+    expired = (
+        Q(confirmed=False, created_at__lt=now - timezone.timedelta(minutes=settings.OTP_EXP_MINUTES))
+        | Q(confirmed=True, created_at__lt=now - timezone.timedelta(minutes=settings.OTP_VALIDITY_MINUTES))
+    )
+    return _delete_in_batches(AuthOTP.objects.filter(expired), batch_size, pause, on_batch)
+
+
+def purge_sms_messages(batch_size: int = OTP_PURGE_BATCH_SIZE, pause: float = 0, on_batch=None) -> int:
+    """Delete sent and failed messages of the SMS queue older than ``SMS_RETENTION_DAYS``, in batches."""
+    created_before = timezone.now() - timezone.timedelta(days=settings.SMS_RETENTION_DAYS)
+    queryset = SMSMessage.objects.exclude(status=SMSStatusChoices.PENDING).filter(created_at__lt=created_before)
+    return _delete_in_batches(queryset, batch_size, pause, on_batch)
+
+
+def _delete_in_batches(queryset, batch_size: int, pause: float, on_batch) -> int:
+    """Each batch of ``batch_size`` rows is deleted in its own short transaction, so locks are never held long."""
+    deleted = 0
+    while True:
+        ids = list(queryset.order_by().values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += queryset.model.objects.filter(pk__in=ids).delete()[0]
+        if on_batch is not None:
+            on_batch(deleted)
+        if len(ids) < batch_size:
+            return deleted
+        time.sleep(pause)
+
+
+def deliver_sms_batch(batch_size: int = SMS_BATCH_SIZE) -> tuple:
+    """
+    Send the due messages of the SMS queue through the configured gateway. The batch stays locked while it is sent,
+    and locked rows are skipped, so several workers can run side by side. Failed messages are retried with
+    exponential backoff until ``SMS_MAX_ATTEMPTS``; a gateway that fails as a whole fails every message of the batch,
+    and the worker carries on. Return the number of sent and failed messages.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        messages = list(
+            SMSMessage.objects.select_for_update(skip_locked=True)
+            .filter(status=SMSStatusChoices.PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        if not messages:
+            return 0, 0
+        try:
+            errors = get_sms_gateway().send_many(messages)
+        except Exception as error:
+            # Raising would roll back the batch, and messages the gateway already sent would be sent again.
+            errors = [describe_error(error)] * len(messages)
+        sent = failed = 0
+        for message, error in zip(messages, errors):
+            message.attempts += 1
+            if error is None:
+                message.status = SMSStatusChoices.SENT
+                message.sent_at = timezone.now()
+                # The text holds login codes; it is not kept once it has left the queue.
+                message.text = ''
+                sent += 1
+                continue
+            message.last_error = error
+            failed += 1
+            if message.attempts >= settings.SMS_MAX_ATTEMPTS:
+                message.status = SMSStatusChoices.FAILED
+                message.text = ''
+            else:
+                backoff = settings.SMS_RETRY_BACKOFF_SECONDS * 2 ** (message.attempts - 1)
+                message.next_attempt_at = now + timezone.timedelta(seconds=backoff)
+        SMSMessage.objects.bulk_update(
+            messages, ['text', 'status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at'], batch_size=batch_size
+        )
+    return sent, failed
@@ -1,3 +1,292 @@
-from django.test import TestCase
+import time
+from collections import Counter
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings, tag
+from django.urls import reverse
+from django.utils import timezone
+
+from users.enums import OTPUsageChoices, SMSStatusChoices
+from users.exeptions import OTPDoesNotExist, OTPExpired, OTPIsInvalid, SendOTPError
+from users.managers import _change_unread_counts
+from users.models import AuthOTP, Notification, ShnUser, SMSMessage
+from users.otp import CacheOTPBackend
+from users.sms import FakeSMSGateway, get_sms_gateway
+from users.tasks import deliver_sms_batch, purge_expired_otps, purge_sms_messages
+
+
+@tag('slow')
+@skipUnless(connection.vendor == 'postgresql', 'Query plans are only checked on PostgreSQL.')
+class OTPQueryPlanTests(TestCase):
+    """Seeds 300,000 OTP rows; run it on its own with ``manage.py test --tag slow``."""
+
+    def test_otp_lookups_do_not_scan_the_table(self):
+        # The command raises CommandError when any OTP lookup plans a sequential scan.
+        call_command('explain_otp_queries', rows=300_000, users=10_000, stdout=StringIO())
+
+
+OTP_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'otp': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'otp-tests'},
+}
+
+
+@override_settings(CACHES=OTP_CACHES, OTP_CACHE_ALIAS='otp')
+class CacheOTPBackendTests(TestCase):
+    usage = OTPUsageChoices.REGISTER
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = ShnUser.objects.create_user(username='user', mobile='09120000001', password='password')
+
+    def setUp(self):
+        caches['otp'].clear()
+        self.backend = CacheOTPBackend()
+        self.code_key, self.attempts_key = self.backend._keys(self.user, self.usage)
+        self.backend.send(self.user, self.usage)
+        self.code = caches['otp'].get(self.code_key)
+        self.wrong_code = '11111' if self.code == '00000' else '00000'
+
+    def test_one_live_code_at_a_time(self):
+        with self.assertRaises(SendOTPError):
+            self.backend.send(self.user, self.usage)
+        self.backend.send(self.user, OTPUsageChoices.RESET_PASSWORD)
+
+    def test_lockout_after_max_attempts(self):
+        for _ in range(settings.OTP_MAX_ATTEMPTS + 1):
+            with self.assertRaises(OTPIsInvalid):
+                self.backend.check(self.user, self.usage, self.wrong_code)
+        # Locked out: even the right code is refused until the code expires.
+        with self.assertRaises(OTPExpired):
+            self.backend.check(self.user, self.usage, self.code)
+
+    def test_code_expires_with_the_cache_timeout(self):
+        self.backend.check(self.user, self.usage, self.code)
+        expired_at = time.time() + settings.OTP_EXP_MINUTES * 60 + 1
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=expired_at):
+            with self.assertRaises(OTPDoesNotExist):
+                self.backend.check(self.user, self.usage, self.code)
+
+    def test_missing_attempts_fail_closed(self):
+        caches['otp'].delete(self.attempts_key)
+        with self.assertRaises(OTPExpired):
+            self.backend.check(self.user, self.usage, self.code)
+
+    def test_confirm(self):
+        self.backend.check(self.user, self.usage, self.code)
+        self.backend.confirm(self.user, self.usage)
+        self.assertEqual(
+            list(AuthOTP.objects.values_list('user', 'usage', 'code', 'confirmed')),
+            [(self.user.pk, self.usage, self.code, True)],
+        )
+        self.assertEqual(caches['otp'].get_many([self.code_key, self.attempts_key]), {})
+        self.assertTrue(self.user.has_valid_otp(self.usage))
+        # The confirmed code is gone, so a new one can be sent.
+        self.backend.send(self.user, self.usage)
+
+    async def test_async_round_trip(self):
+        with self.assertRaises(SendOTPError):
+            await self.backend.asend(self.user, self.usage)
+        with self.assertRaises(OTPIsInvalid):
+            await self.backend.acheck(self.user, self.usage, self.wrong_code)
+        await self.backend.acheck(self.user, self.usage, self.code)
+        await self.backend.aconfirm(self.user, self.usage)
+        self.assertEqual(await AuthOTP.objects.filter(confirmed=True).acount(), 1)
+        self.assertIsNone(await caches['otp'].aget(self.code_key))
+
+
+@override_settings(SMS_GATEWAY='users.sms.FakeSMSGateway', SMS_MAX_ATTEMPTS=2)
+class DeliverSMSBatchTests(TestCase):
+
+    def setUp(self):
+        get_sms_gateway.cache_clear()
+        self.addCleanup(get_sms_gateway.cache_clear)
+        FakeSMSGateway.outbox, FakeSMSGateway.failing = [], set()
+
+    def make_due(self):
+        SMSMessage.objects.update(next_attempt_at=timezone.now())
+
+    def test_sent_message_text_is_cleared(self):
+        message = SMSMessage.objects.enqueue('09120000001', 'code: 12345')
+        self.assertEqual(deliver_sms_batch(), (1, 0))
+        self.assertEqual(FakeSMSGateway.outbox, [('09120000001', 'code: 12345')])
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.text), (SMSStatusChoices.SENT, ''))
+
+    def test_refused_message_is_retried_then_failed(self):
+        FakeSMSGateway.failing = {'09120000002'}
+        message = SMSMessage.objects.enqueue('09120000002', 'code: 12345')
+        self.assertEqual(deliver_sms_batch(), (0, 1))
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts, message.text), (SMSStatusChoices.PENDING, 1, 'code: 12345'))
+        self.assertGreater(message.next_attempt_at, timezone.now())
+        self.make_due()
+        self.assertEqual(deliver_sms_batch(), (0, 1))
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.text), (SMSStatusChoices.FAILED, ''))
+
+    def test_unexpected_error_fails_only_its_message(self):
+        SMSMessage.objects.enqueue('09120000001', 'first')
+        SMSMessage.objects.enqueue('09120000002', 'second')
+        with mock.patch.object(FakeSMSGateway, 'send', side_effect=[None, TimeoutError('timed out')]):
+            self.assertEqual(deliver_sms_batch(), (1, 1))
+        self.assertEqual(
+            list(SMSMessage.objects.order_by('pk').values_list('status', 'last_error')),
+            [(SMSStatusChoices.SENT, ''), (SMSStatusChoices.PENDING, 'TimeoutError: timed out')],
+        )
+
+    def test_failing_gateway_fails_the_batch_without_raising(self):
+        SMSMessage.objects.enqueue('09120000001', 'first')
+        with mock.patch.object(FakeSMSGateway, 'send_many', side_effect=ConnectionError('down')):
+            self.assertEqual(deliver_sms_batch(), (0, 1))
+        message = SMSMessage.objects.get()
+        self.assertEqual((message.status, message.attempts), (SMSStatusChoices.PENDING, 1))
+
+    def test_purge_keeps_pending_messages(self):
+        SMSMessage.objects.enqueue('09120000001', 'sent')
+        deliver_sms_batch()
+        pending = SMSMessage.objects.enqueue('09120000002', 'pending')
+        SMSMessage.objects.update(created_at=timezone.now() - timezone.timedelta(days=30))
+        self.assertEqual(purge_sms_messages(), 1)
+        self.assertQuerysetEqual(SMSMessage.objects.all(), [pending])
+
+
+class NotificationListTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = ShnUser.objects.create_user(username='user', mobile='09120000001', password='password')
+        other = ShnUser.objects.create_user(username='other', mobile='09120000002', password='password')
+        for index in range(25):
+            Notification.objects.create(user=cls.user, title=f'notification {index}', content='-')
+        Notification.objects.create(user=other, title='other', content='-')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_load_more_pages(self):
+        url, titles = reverse('users:users-hx:notifications-htmx'), []
+        while url is not None:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            titles += [notification.title for notification in response.context['notifications']]
+            url = response.context['next_page_url']
+        self.assertEqual(titles, [f'notification {index}' for index in reversed(range(25))])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('users:users-hx:notifications-htmx'), {'cursor': 'invalid'})
+        self.assertEqual(response.status_code, 404)
+
+
+class UnreadNotificationsTests(TestCase):
+    """``ShnUser.unread_notifications`` is kept in step with the unseen notifications by every write path."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            ShnUser.objects.create_user(username=f'user{index}', mobile=f'0912000000{index}', password='password')
+            for index in range(3)
+        ]
+
+    def unread_counters(self) -> list:
+        counters = dict(ShnUser.objects.values_list('pk', 'unread_notifications'))
+        return [counters[user.pk] for user in self.users]
+
+    def assertCountsExact(self, expected: list):
+        self.assertEqual(
+            [Notification.objects.filter(user=user, seen=False).count() for user in self.users], expected
+        )
+        self.assertEqual(self.unread_counters(), expected)
+
+    def test_save_and_delete(self):
+        first = Notification.objects.create(user=self.users[0], title='first', content='-')
+        second = Notification.objects.create(user=self.users[0], title='second', content='-')
+        self.assertCountsExact([2, 0, 0])
+        # Two instances of the same row marked seen count once.
+        stale = Notification.objects.get(pk=first.pk)
+        first.seen = True
+        first.save()
+        stale.seen = True
+        stale.save()
+        self.assertCountsExact([1, 0, 0])
+        first.seen = False
+        first.save()
+        self.assertCountsExact([2, 0, 0])
+        second.delete()
+        self.assertCountsExact([1, 0, 0])
+        first.seen = True
+        first.save()
+        first.delete()
+        self.assertCountsExact([0, 0, 0])
+
+    def test_bulk_paths(self):
+        user_ids = [self.users[0].pk, self.users[0].pk, self.users[1].pk, self.users[2].pk, self.users[2].pk]
+        self.assertEqual(Notification.objects.bulk_notify(user_ids, 'title', '-', batch_size=2), 5)
+        self.assertCountsExact([2, 1, 2])
+        self.assertEqual(Notification.objects.mark_all_seen(self.users[0]), 2)
+        self.assertCountsExact([0, 1, 2])
+        Notification.objects.filter(user=self.users[2]).first().delete()
+        self.assertCountsExact([0, 1, 1])
+        Notification.objects.filter(user__in=self.users[:2]).delete()
+        self.assertCountsExact([0, 0, 1])
+        Notification.objects.filter(user=self.users[2]).mark_seen()
+        self.assertCountsExact([0, 0, 0])
+
+    def test_one_update_per_distinct_count(self):
+        counts = Counter({self.users[0].pk: 1, self.users[1].pk: 1, self.users[2].pk: 3})
+        with self.assertNumQueries(2):
+            _change_unread_counts(counts)
+        self.assertEqual(self.unread_counters(), [1, 1, 3])
+
+    def test_badge_is_not_modified_while_the_count_is_unchanged(self):
+        url = reverse('users:users-hx:unread-notifications-htmx')
+        self.client.force_login(self.users[0])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Notification.objects.create(user=self.users[1], title='other', content='-')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Notification.objects.create(user=self.users[0], title='new', content='-')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class PurgeExpiredOTPsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = ShnUser.objects.create_user(username='user', mobile='09120000001', password='password')
+
+    def create_otp(self, confirmed: bool, minutes_ago: int) -> AuthOTP:
+        otp = AuthOTP.objects.create_otp(user=self.user, usage=OTPUsageChoices.REGISTER, confirmed=confirmed)
+        # ``created_at`` is ``auto_now``, so it is only moved back with an update.
+        AuthOTP.objects.filter(pk=otp.pk).update(created_at=timezone.now() - timezone.timedelta(minutes=minutes_ago))
+        return otp
+
+    def test_boundaries_across_batches(self):
+        expired_minutes, validity_minutes = settings.OTP_EXP_MINUTES, settings.OTP_VALIDITY_MINUTES
+        for _ in range(3):
+            self.create_otp(False, expired_minutes + 1)
+        for _ in range(2):
+            self.create_otp(True, validity_minutes + 1)
+        kept = [
+            self.create_otp(False, expired_minutes - 1),
+            # Confirmations last for the validity period, not the expiry of the code.
+            self.create_otp(True, expired_minutes + 1),
+            self.create_otp(True, validity_minutes - 1),
+        ]
+        batches = []
+        self.assertEqual(purge_expired_otps(batch_size=2, on_batch=batches.append), 5)
+        self.assertEqual(batches, [2, 4, 5])
+        self.assertQuerysetEqual(AuthOTP.objects.all(), kept, ordered=False)
+        self.assertEqual(purge_expired_otps(batch_size=2), 0)
+
+    def test_command(self):
+        self.create_otp(False, settings.OTP_EXP_MINUTES + 1)
+        stdout = StringIO()
+        call_command('purge_expired_otps', batch_size=10, pause=0, stdout=stdout)
+        self.assertIn('1 expired OTP rows and 0 SMS messages purged', stdout.getvalue())
+        self.assertFalse(AuthOTP.objects.exists())
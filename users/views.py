@@ -10,6 +10,8 @@ from django.utils.translation import gettext as _
 from django.views import View
 from django.views.generic import CreateView, FormView
 
+from common.mixins import RateLimitMixin
+from common.ratelimit import get_client_ip
 from users import enums
 from users.exeptions import SendOTPError
 from users.forms import LoginForm, RegisterForm, ConfirmOTPForm, ResetPasswordForm, ConfirmResetPasswordForm
@@ -19,11 +21,15 @@ OTP_USER_SESSION = 'registered_user_id'
 RESET_PASSWORD_USER_SESSION = 'reset_password_user_id'
 
 
-class ShnLoginView(LoginView):
+class ShnLoginView(RateLimitMixin, LoginView):
     form_class = LoginForm
     template_name = 'login.html'
     send_otp_url = reverse_lazy('users:send-otp-login')
     redirect_authenticated_user = True
+    rate_limit_scope = 'login'
+
+    def get_rate_limit_identities(self) -> dict:
+        return {'ip': get_client_ip(self.request), 'account': self.request.POST.get('username')}
 
     def success_response(self):
         return HttpResponseRedirect(self.get_success_url())
@@ -54,9 +60,11 @@ class RegisterView(CreateView):
         return response
 
 
-class SendOTPView(View):
+class SendOTPView(RateLimitMixin, View):
     usage: enums.OTPUsageChoices = None
     confirm_otp_url = None
+    rate_limit_scope = 'send-otp'
+    rate_limit_methods = ('GET', )
 
     def get_usage(self):
         if self.usage is None:
@@ -76,18 +84,32 @@ class SendOTPView(View):
         registered_user_id = self.request.session.get(OTP_USER_SESSION)
         return get_object_or_404(ShnUser, pk=registered_user_id)
 
+    def get_rate_limit_identities(self) -> dict:
+        return {'ip': get_client_ip(self.request), 'account': self.request.session.get(OTP_USER_SESSION)}
+
+    def rate_limited_response(self, retry_after: int):
+        messages.error(self.request, self.rate_limit_message(retry_after), extra_tags='danger')
+        return HttpResponseRedirect(self.get_confirm_otp_url())
+
+    def sent_response(self):
+        messages.success(self.request, _('رمز یک‌بارمصرف به موبایل شما ارسال شد.'), extra_tags='success')
+        return HttpResponseRedirect(self.get_confirm_otp_url())
+
+    def send_failed_response(self):
+        messages.error(
+            self.request,
+            _('ارسال رمز یک‌بارمصرف با خطا روبرو شد. لطفا لحظاتی بعد دوباره تلاش کنید.'),
+            extra_tags='danger'
+        )
+        return HttpResponseRedirect(self.get_confirm_otp_url())
+
     def get(self, request):
         registered_user = self.get_user_from_session()
         try:
             registered_user.send_otp(self.get_usage())
-            messages.success(request, _('رمز یک‌بارمصرف به موبایل شما ارسال شد.'), extra_tags='success')
         except SendOTPError:
-            messages.error(
-                request,
-                _('ارسال رمز یک‌بارمصرف با خطا روبرو شد. لطفا لحظاتی بعد دوباره تلاش کنید.'),
-                extra_tags='danger'
-            )
-        return HttpResponseRedirect(self.get_confirm_otp_url())
+            return self.send_failed_response()
+        return self.sent_response()
 
 
 class SendRegisterOTPView(SendOTPView):
@@ -153,10 +175,14 @@ class ConfirmLoginOTPView(ConfirmOTOViewMixin, FormView):
         return self.success_response()
 
 
-class ResetPasswordView(FormView):
+class ResetPasswordView(RateLimitMixin, FormView):
     form_class = ResetPasswordForm
     template_name = 'reset_password.html'
     success_url = reverse_lazy('users:send-otp-reset-password')
+    rate_limit_scope = 'reset-password'
+
+    def get_rate_limit_identities(self) -> dict:
+        return {'ip': get_client_ip(self.request), 'account': self.request.POST.get('mobile')}
 
     def form_valid(self, form):
         response = super(ResetPasswordView, self).form_valid(form)